@@ -1,4 +1,5 @@
 from django.db import models
+from music_beta.images import image_set, is_local, placeholder_set
 from music_beta.models import User, Track
 import uuid
 import os
@@ -62,18 +63,25 @@ class ArtistProfile(models.Model):
     def profile_picture_url(self):
         """
         Returns the URL for the artist's profile picture.
-        If no image is set or accessible, returns a fallback placeholder image URL.
+        If no image is set or accessible, returns a local placeholder image URL.
 
         Returns:
-            str: URL to the artist's profile picture or a fallback image.
+            str: URL to the artist's profile picture or a placeholder image.
         """
-        if self.profile_picture and hasattr(self.profile_picture, 'url'):
+        if is_local(self.profile_picture):
             try:
-                # Access URL to ensure file exists
-                _ = self.profile_picture.url
                 return self.profile_picture.url
             except Exception:
                 # Fall back to placeholder if image access fails
                 pass
-        # Fallback placeholder URL with random image keyed by user id
-        return f'https://picsum.photos/300?random={self.user.id}'
+        return placeholder_set(f'profile-{self.user_id}').src
+
+    @property
+    def profile_picture_set(self):
+        """
+        Returns the resized derivatives of the profile picture for src/srcset.
+
+        Returns:
+            ImageSet: Derivatives of the profile picture, or a placeholder.
+        """
+        return image_set(self.profile_picture, f'profile-{self.user_id}')
@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.http import HttpResponseForbidden
 from music_beta.models import User, Track
+from music_beta.session_user import get_session_user
 from .models import ArtistProfile
 from .forms import ArtistProfileForm
 
@@ -15,15 +16,13 @@ def artist_profile(request):
         messages.error(request, 'You must be logged in to view your artist profile.')
         return redirect('login')
 
-    user_id = request.session['user_id']
-    try:
-        user = User.objects.get(id=user_id)
-        if user.user_type != 'artist':
-            messages.error(request, 'You must be an artist to access this page.')
-            return redirect('home')
-    except User.DoesNotExist:
+    user = get_session_user(request)
+    if user is None:
         messages.error(request, 'User not found.')
         return redirect('login')
+    if user.user_type != 'artist':
+        messages.error(request, 'You must be an artist to access this page.')
+        return redirect('home')
 
     # Get or create artist profile
     profile, created = ArtistProfile.objects.get_or_create(user=user)
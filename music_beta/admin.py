@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Genre, Artist, Album, Track, ServiceRequest, User, Copyright
+from .models import Genre, Artist, Album, Track, ServiceRequest, User, Copyright, AnalysisJob
 
 
 @admin.register(Genre)
@@ -29,12 +29,21 @@ class AlbumAdmin(admin.ModelAdmin):
 
 @admin.register(Track)
 class TrackAdmin(admin.ModelAdmin):
-    list_display = ('title', 'artist', 'album', 'duration')
-    list_filter = ('album__genre', 'artist')
+    list_display = ('title', 'artist', 'album', 'duration', 'analysis_status')
+    list_filter = ('album__genre', 'artist', 'analysis_status')
     search_fields = ('title', 'artist__name', 'album__title')
     ordering = ('album', 'title')
 
 
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ('track', 'status', 'attempts', 'available_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('track__title',)
+    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('-created_at',)
+
+
 @admin.register(ServiceRequest)
 class ServiceRequestAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'company', 'service_type', 'created_at')
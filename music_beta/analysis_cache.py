@@ -0,0 +1,145 @@
+"""
+Persistent on-disk cache of audio analysis results, keyed by content hash.
+
+Entries are small JSON files named after the SHA-256 of the audio bytes, so a
+re-upload or duplicate file is a lookup instead of a full librosa analysis.
+The cache directory is bounded in size; when it grows past the bound the
+least recently used entries (by modification time, refreshed on every hit)
+are evicted.
+"""
+import json
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+
+class AnalysisCache:
+    """
+    Size-bounded LRU cache of analysis results stored as files in a directory.
+
+    Args:
+        directory (str): Directory holding the cache entries
+        max_bytes (int): Total size the entries may occupy on disk
+    """
+
+    # After an eviction the cache is trimmed to this fraction of max_bytes so
+    # that every write past the bound does not trigger a directory scan.
+    LOW_WATERMARK = 0.9
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._size = None  # Approximate total size, computed lazily
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, key):
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key (str): Cache key (content hash)
+
+        Returns:
+            dict: The cached metadata or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+            os.utime(path)  # Refresh the LRU position
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, value):
+        """
+        Store an entry, evicting least recently used entries past the size bound.
+
+        Args:
+            key (str): Cache key (content hash)
+            value (dict): JSON-serializable metadata
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file and rename so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry_size for _, entry_size, _ in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """Yield (path, size, mtime) for every cache entry."""
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """Delete the least recently used entries until below the low watermark."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.LOW_WATERMARK
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for path, _, _ in list(self._entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+
+_cache = None
+
+
+def get_analysis_cache():
+    """
+    Return the process-wide analysis cache configured in settings.
+
+    Returns:
+        AnalysisCache: The cache, or None if AUDIO_ANALYSIS_CACHE_DIR is None
+    """
+    global _cache
+    directory = getattr(settings, 'AUDIO_ANALYSIS_CACHE_DIR',
+                        os.path.join(settings.BASE_DIR, 'cache', 'audio_analysis'))
+    if directory is None:
+        return None
+
+    max_bytes = getattr(settings, 'AUDIO_ANALYSIS_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+    if _cache is None or _cache.directory != str(directory) or _cache.max_bytes != max_bytes:
+        _cache = AnalysisCache(directory, max_bytes)
+    return _cache
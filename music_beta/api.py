@@ -4,45 +4,283 @@
 #  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
 #  Vestibulum commodo. Ut rhoncus gravida arcu.
 
-from rest_framework import viewsets, permissions
+import hashlib
+from calendar import timegm
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.cache import get_conditional_response
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import viewsets, permissions, serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from .models import Genre, Artist, Album, Track, User, AdCampaign, Copyright, ServiceRequest
 from .serializers import (
     GenreSerializer, ArtistSerializer, AlbumSerializer, TrackSerializer,
-    UserSerializer, AdCampaignSerializer, CopyrightSerializer, ServiceRequestSerializer
+    GenreListSerializer, ArtistListSerializer, AlbumListSerializer, TrackListSerializer, CopyrightListSerializer,
+    UserSerializer, AdCampaignSerializer, CopyrightSerializer, ServiceRequestSerializer,
+    TrendingEntrySerializer, requested_fields
 )
+from .catalog import get_model_version
+from .changes import ResyncRequired, changes_since, latest_token
+from .manifest import get_manifest
+from .pagination import CatalogCursorPagination
+from .session_user import get_session_user
+from .trending import DEFAULT_WINDOW, WINDOWS, top_trending
+
+def optimize_queryset(queryset, serializer, fields=None, plan=None):
+    """
+    Fetch only what `serializer` needs to render `fields`.
+
+    Relations rendered as anything but primary keys are joined with
+    select_related (forward foreign keys) or prefetch_related (many-to-many
+    and reverse relations). When every requested field is a model column,
+    the other columns are deferred with only().
+
+    Args:
+        queryset (QuerySet): Base queryset
+        serializer (Serializer): Serializer instance rendering the rows
+        fields (set): Requested field names, or None for all fields
+        plan (dict): Declared prefetch plan, mapping field names to the
+            lookups (strings or Prefetch objects) prefetched when the field
+            is rendered; used instead of the derived prefetch for the field
+
+    Returns:
+        QuerySet: Optimized queryset
+    """
+    model = queryset.model
+    names = fields if fields is not None else set(serializer.fields)
+    select, prefetch, columns = set(), set(), {model._meta.pk.name}
+    planned = []
+    columns_only = fields is not None
+
+    for name in names:
+        if plan and name in plan and name in serializer.fields:
+            planned.extend(plan[name])
+            continue
+        field = serializer.fields.get(name)
+        if field is None or field.source == '*':
+            columns_only = False
+            continue
+        source = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            # Properties such as image_url may read any column
+            columns_only = False
+            continue
+
+        pk_only = isinstance(getattr(field, 'child_relation', field), serializers.PrimaryKeyRelatedField)
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.add(source)
+        elif model_field.is_relation and not pk_only:
+            select.add(source)
+            columns.add(source)
+        elif model_field.concrete:
+            columns.add(source)
+
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch or planned:
+        queryset = queryset.prefetch_related(*sorted(prefetch), *planned)
+    if columns_only and not select:
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified validation for list and retrieve.
+
+    The validators are derived from the model version, which is read from the
+    cache (see catalog.py), so a request carrying a current If-None-Match or
+    If-Modified-Since gets a 304 without querying the database or running
+    the serializer.
+    """
+
+    def get_validators(self, request):
+        """
+        Return the (etag, last_modified) of the current response.
+
+        The ETag covers the model version and everything else the body
+        depends on: the path and query string and the rendered format.
+        """
+        model = self.queryset.model
+        version, modified = get_model_version(model)
+        key = f'{model._meta.label_lower}:{version}:{request.get_full_path()}:{request.accepted_renderer.format}'
+        return f'"{hashlib.md5(key.encode()).hexdigest()}"', modified
+
+    def conditional(self, request, render, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=timegm(last_modified.utctimetuple()))
+        if response is None:
+            response = render(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+        # Clients may reuse the response, but must revalidate it first
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, super().retrieve, *args, **kwargs)
+
+
+class CatalogViewSetMixin(ConditionalGetMixin):
+    """
+    Cursor pagination, `fields=` sparse fieldsets and conditional GETs for the
+    catalog viewsets, with select_related/prefetch_related derived from the
+    requested fields.
 
-class GenreViewSet(viewsets.ModelViewSet):
+    Viewsets declare:
+        prefetch_plan: {field name: [lookups]} prefetched when the field is
+            rendered, for relations where the derived prefetch would fetch
+            more than needed
+        list_serializer_class: Read-only fast-path serializer for list
+    """
+    pagination_class = CatalogCursorPagination
+    prefetch_plan = {}
+    list_serializer_class = None
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in ('GET', 'HEAD'):
+            return queryset
+        return optimize_queryset(queryset, self.get_serializer(), requested_fields(self.request), self.prefetch_plan)
+
+
+class GenreViewSet(CatalogViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows genres to be viewed or edited.
     """
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    list_serializer_class = GenreListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class ArtistViewSet(viewsets.ModelViewSet):
+class ArtistViewSet(CatalogViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows artists to be viewed or edited.
     """
     queryset = Artist.objects.all()
     serializer_class = ArtistSerializer
+    list_serializer_class = ArtistListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class AlbumViewSet(viewsets.ModelViewSet):
+class AlbumViewSet(CatalogViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows albums to be viewed or edited.
     """
     queryset = Album.objects.all()
     serializer_class = AlbumSerializer
+    list_serializer_class = AlbumListSerializer
+    # Only the genre ids are rendered
+    prefetch_plan = {'genre': [Prefetch('genre', queryset=Genre.objects.only('pk'))]}
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-class TrackViewSet(viewsets.ModelViewSet):
+class TrackViewSet(CatalogViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows tracks to be viewed or edited.
     """
-    queryset = Track.objects.all()
+    # The waveform blob has its own endpoint
+    queryset = Track.objects.defer('waveform')
     serializer_class = TrackSerializer
+    list_serializer_class = TrackListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+class TrendingViewSet(viewsets.ViewSet):
+    """
+    API endpoint that lists the trending tracks of a window.
+
+    Query parameters:
+        window: 1h, 24h (default) or 7d
+        limit: Number of tracks, 1 to 50 (default 10)
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def list(self, request):
+        window = request.query_params.get('window', DEFAULT_WINDOW)
+        if window not in WINDOWS:
+            raise ValidationError({'window': f"Must be one of: {', '.join(WINDOWS)}"})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            raise ValidationError({'limit': "Must be an integer"})
+
+        entries = top_trending(window, limit=limit)
+        return Response({
+            'window': window,
+            'results': TrendingEntrySerializer(entries, many=True).data,
+        })
+
+class ChangesViewSet(viewsets.ViewSet):
+    """
+    API endpoint that lists catalog rows changed since a token.
+
+    Query parameters:
+        since: Token from the previous response (default 0, the whole log)
+        limit: Log entries to read, 1 to 1000 (default 500)
+
+    Rows are returned in their current state; deleted rows have action
+    "delete" and no data. Keep the returned `next` token and call again while
+    `more` is true. A 410 response means the token is too old; re-download the
+    catalog and continue from the `next` token in the 410 body.
+    """
+    permission_classes = [permissions.AllowAny]
+    serializer_classes = {
+        Genre: GenreListSerializer,
+        Artist: ArtistListSerializer,
+        Album: AlbumListSerializer,
+        Track: TrackListSerializer,
+        Copyright: CopyrightListSerializer,
+    }
+    prefetch_plans = {
+        Album: AlbumViewSet.prefetch_plan,
+    }
+
+    def serialize(self, model, queryset):
+        serializer_class = self.serializer_classes[model]
+        context = {'request': self.request}
+        queryset = optimize_queryset(queryset, serializer_class(context=context), plan=self.prefetch_plans.get(model))
+        return serializer_class(queryset, many=True, context=context).data
+
+    def list(self, request):
+        try:
+            since = max(int(request.query_params.get('since', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', 500)), 1), 1000)
+        except ValueError:
+            raise ValidationError({'since': "since and limit must be integers"})
+
+        try:
+            return Response(changes_since(since, limit, self.serialize))
+        except ResyncRequired as e:
+            return Response({'detail': str(e), 'resync': True, 'next': latest_token()},
+                            status=status.HTTP_410_GONE)
+
+class ManifestViewSet(viewsets.ViewSet):
+    """
+    API endpoint that points to the current compressed catalog manifest.
+
+    Returns the manifest url, sha256, size in bytes and the change feed token
+    it is current to. The manifest is rebuilt first if the catalog changed.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def list(self, request):
+        manifest = get_manifest()
+        url = reverse('catalog_manifest_file', kwargs={'name': manifest['name']})
+        response = Response(dict(manifest, url=request.build_absolute_uri(url)))
+        response['Cache-Control'] = 'no-cache'
+        return response
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     API endpoint that allows users to be viewed or edited.
@@ -55,16 +293,16 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         Filter queryset to return only the current user's data unless the user is admin.
         """
-        user_id = self.request.session.get('user_id')
-        if not user_id:
+        user = get_session_user(self.request)
+        if user is None:
             return User.objects.none()
 
         # Check if user is admin (for simplicity, we're just checking if user_id is 1)
-        if user_id == 1:
+        if user.pk == 1:
             return User.objects.all()
 
         # Regular users can only see their own data
-        return User.objects.filter(id=user_id)
+        return User.objects.filter(id=user.pk)
 
     def get_permissions(self):
         """
@@ -84,12 +322,13 @@ class AdCampaignViewSet(viewsets.ModelViewSet):
     serializer_class = AdCampaignSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class CopyrightViewSet(viewsets.ModelViewSet):
+class CopyrightViewSet(CatalogViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows copyright information to be viewed or edited.
     """
     queryset = Copyright.objects.all()
     serializer_class = CopyrightSerializer
+    list_serializer_class = CopyrightListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
 class ServiceRequestViewSet(viewsets.ModelViewSet):
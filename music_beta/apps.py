@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MusicBetaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'music_beta'
+
+    def ready(self):
+        # Connect the signal receivers that keep the catalog indexes in sync
+        from . import signals  # noqa: F401
@@ -0,0 +1,254 @@
+"""
+In-memory prefix index for typeahead suggestions.
+
+Artist names, album titles, track titles and composer names are kept in a
+sorted array of (term, kind, key) tuples, where the terms are the casefolded
+name and every word-start suffix of it ("dark side of the moon", "side of the
+moon", ...). A lookup is a binary search followed by a short forward scan, so
+suggestions never touch the database. Model signals apply changes made in
+this process incrementally. When another process changed the catalog, the
+next lookup applies the change log entries since the index's token (see
+music_beta/changes.py) the same way; only a token that predates a compaction
+needs a full rebuild.
+"""
+import threading
+from bisect import bisect_left, insort
+
+from .catalog import VersionedIndex, get_catalog_version
+from .changes import CHANGE_MODELS, ResyncRequired, change_name, changes_since, latest_token
+from .models import Album, Artist, CatalogChange, Track
+
+# Stop scanning after this many candidate entries per requested suggestion;
+# a word such as "the" can start thousands of terms.
+MAX_SCAN_FACTOR = 20
+
+# Change log entries read per query while catching up
+CATCH_UP_BATCH = 500
+
+# Change feed name -> fields the index reads from the changed rows
+INDEXED_FIELDS = {
+    'artist': ['id', 'name'],
+    'album': ['id', 'title'],
+    'track': ['id', 'title', 'composer'],
+}
+
+
+def prefix_terms(label):
+    """
+    Return the searchable terms of a name: the whole name and every word-start suffix.
+
+    Args:
+        label (str): Name or title
+
+    Returns:
+        set: Casefolded terms
+    """
+    words = (label or '').casefold().split()
+    return {' '.join(words[i:]) for i in range(len(words))}
+
+
+class PrefixIndex(VersionedIndex):
+    """Sorted-array prefix index over catalog names."""
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []  # Sorted (term, kind, key) tuples
+        self.labels = {}  # (kind, key) -> display label
+        self.composer_tracks = {}  # composer key -> set of track ids
+        self.track_composers = {}  # track id -> composer key
+        self.token = 0  # Change log token the index reflects
+        self._lock = threading.RLock()
+        self._catch_up_lock = threading.Lock()
+
+    def _add(self, kind, key, label):
+        self._remove(kind, key)
+        if not label:
+            return
+        self.labels[(kind, key)] = label
+        for term in prefix_terms(label):
+            insort(self.entries, (term, kind, key))
+
+    def _remove(self, kind, key):
+        label = self.labels.pop((kind, key), None)
+        if label is None:
+            return
+        for term in prefix_terms(label):
+            i = bisect_left(self.entries, (term, kind, key))
+            if i < len(self.entries) and self.entries[i] == (term, kind, key):
+                del self.entries[i]
+
+    def _set_track_composer(self, track_id, composer):
+        """Keep one composer suggestion per distinct name, shared by its tracks."""
+        old_key = self.track_composers.pop(track_id, None)
+        if old_key is not None:
+            tracks = self.composer_tracks[old_key]
+            tracks.discard(track_id)
+            if not tracks:
+                del self.composer_tracks[old_key]
+                self._remove('composer', old_key)
+
+        composer = (composer or '').strip()
+        if composer:
+            key = composer.casefold()
+            self.track_composers[track_id] = key
+            if key not in self.composer_tracks:
+                self.composer_tracks[key] = set()
+                self._add('composer', key, composer)
+            self.composer_tracks[key].add(track_id)
+
+    def update(self, instance, version=None):
+        """Apply a saved artist, album or track."""
+        with self._lock:
+            if isinstance(instance, Artist):
+                self._add('artist', instance.pk, instance.name)
+            elif isinstance(instance, Album):
+                self._add('album', instance.pk, instance.title)
+            elif isinstance(instance, Track):
+                self._add('track', instance.pk, instance.title)
+                self._set_track_composer(instance.pk, instance.composer)
+            if version is not None:
+                self.advance(version)
+
+    def delete(self, instance, version=None):
+        """Apply a deleted artist, album or track."""
+        with self._lock:
+            if isinstance(instance, Artist):
+                self._remove('artist', instance.pk)
+            elif isinstance(instance, Album):
+                self._remove('album', instance.pk)
+            elif isinstance(instance, Track):
+                self._remove('track', instance.pk)
+                self._set_track_composer(instance.pk, None)
+            if version is not None:
+                self.advance(version)
+
+    def rebuild(self):
+        """
+        Build a fresh index from the database and swap it in.
+
+        Lookups keep using the current index while the new one is built.
+        """
+        token = latest_token()
+        entries = []
+        labels = {}
+        composer_tracks = {}
+        track_composers = {}
+        sources = [
+            ('artist', Artist.objects.values_list('id', 'name')),
+            ('album', Album.objects.values_list('id', 'title')),
+            ('track', Track.objects.values_list('id', 'title')),
+        ]
+        for kind, rows in sources:
+            for pk, label in rows.iterator():
+                if label:
+                    labels[(kind, pk)] = label
+                    entries.extend((term, kind, pk) for term in prefix_terms(label))
+
+        for track_id, composer in Track.objects.exclude(composer__isnull=True).exclude(composer='') \
+                .values_list('id', 'composer').iterator():
+            key = composer.strip().casefold()
+            track_composers[track_id] = key
+            if key not in composer_tracks:
+                composer_tracks[key] = set()
+                labels[('composer', key)] = composer.strip()
+                entries.extend((term, 'composer', key) for term in prefix_terms(composer))
+            composer_tracks[key].add(track_id)
+
+        # One sort instead of an insort per entry
+        entries.sort()
+        with self._lock:
+            self.entries = entries
+            self.labels = labels
+            self.composer_tracks = composer_tracks
+            self.track_composers = track_composers
+            self.token = token
+
+    def ensure_current(self):
+        """
+        Catch up with changes made by other processes.
+
+        One thread catches up at a time; lookups in other threads meanwhile
+        answer from the index as it is, unless it was never built.
+        """
+        version = get_catalog_version()
+        if version == self.version:
+            return
+        if not self._catch_up_lock.acquire(blocking=self.version is None):
+            return
+        try:
+            if self.version is None:
+                self.rebuild()
+            else:
+                try:
+                    self.catch_up()
+                except ResyncRequired:
+                    self.rebuild()
+            # Entries still held back by the change feed are applied on a later lookup
+            if not CatalogChange.objects.filter(id__gt=self.token).exists():
+                self.version = version
+        finally:
+            self._catch_up_lock.release()
+
+    def catch_up(self):
+        """
+        Apply the change log entries recorded since the index's token.
+
+        Raises:
+            ResyncRequired: If the token predates a compaction of the log
+        """
+        while True:
+            feed = changes_since(self.token, CATCH_UP_BATCH, self._indexed_rows)
+            for change in feed['changes']:
+                if change['model'] not in INDEXED_FIELDS:
+                    continue
+                model = CHANGE_MODELS[change['model']]
+                if change['data'] is None:
+                    self.delete(model(pk=change['id']))
+                else:
+                    self.update(model(**change['data']))
+            self.token = feed['next']
+            if not feed['more']:
+                return
+
+    def _indexed_rows(self, model, queryset):
+        fields = INDEXED_FIELDS.get(change_name(model))
+        return list(queryset.values(*fields)) if fields else []
+
+    def suggest(self, prefix, limit=10):
+        """
+        Return suggestions whose name, or a word in it, starts with `prefix`.
+
+        Args:
+            prefix (str): Text typed so far
+            limit (int): Maximum number of suggestions
+
+        Returns:
+            list: Dicts with 'kind', 'id' (or composer name) and 'label'
+        """
+        prefix = ' '.join(prefix.casefold().split())
+        if not prefix:
+            return []
+
+        self.ensure_current()
+        with self._lock:
+            suggestions = []
+            seen = set()
+            i = bisect_left(self.entries, (prefix,))
+            end = min(len(self.entries), i + limit * MAX_SCAN_FACTOR)
+            while i < end and len(suggestions) < limit:
+                term, kind, key = self.entries[i]
+                if not term.startswith(prefix):
+                    break
+                if (kind, key) not in seen:
+                    seen.add((kind, key))
+                    suggestions.append({'kind': kind, 'id': key, 'label': self.labels[(kind, key)]})
+                i += 1
+        return suggestions
+
+
+_index = PrefixIndex()
+
+
+def get_autocomplete_index():
+    """Return the process-wide autocomplete index."""
+    return _index
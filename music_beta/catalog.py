@@ -0,0 +1,202 @@
+"""
+Catalog version counters shared by every process.
+
+Any change to the catalog models (Genre, Artist, Album, Track) bumps the
+catalog version. Process-local derived data (search and autocomplete indexes,
+cached catalog state) records the version it was built from and catches up
+when the shared version has moved on.
+
+Each API model additionally has its own version and last-modified time,
+which the API uses for ETag/Last-Modified validation (see music_beta/api.py).
+These are also bumped by writes that bypass model signals but change what
+the API returns, such as batched play counts.
+
+The counters are VersionCounter rows. A bump locks its row, so bumps from
+web processes, process_analysis_jobs and analyze_library never collide or
+get lost, whatever the cache backend. Reads are served from the cache for
+VERSION_COUNTER_CACHE_TIMEOUT seconds, so the API's conditional GETs and the
+index checks don't query on every request. The process that bumps sees the
+new version at once; with a per-process cache, other processes see it
+within the timeout.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Genre, VersionCounter
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_POPULATED_KEY = 'catalog:populated:{version}'
+MODEL_VERSION_KEY = 'catalog:version:{label}'
+COUNTER_CACHE_KEY = 'counter:{key}'
+
+# (version, populated) of the last catalog_is_populated() answer in this process
+_populated = (None, None)
+
+
+def _timeout():
+    return getattr(settings, 'VERSION_COUNTER_CACHE_TIMEOUT', 1)
+
+
+def _seed():
+    # Seeding from the clock means a recreated counter never hands out a
+    # version number that was already used
+    return {'value': time.time_ns(), 'modified': timezone.now().replace(microsecond=0)}
+
+
+def _read_counter(key):
+    """
+    Return the value and modification time of a counter, creating it if it
+    is missing.
+
+    Returns:
+        tuple: (int value, datetime modified)
+    """
+    cache_key = COUNTER_CACHE_KEY.format(key=key)
+    counter = cache.get(cache_key)
+    if counter is None:
+        row, _ = VersionCounter.objects.get_or_create(key=key, defaults=_seed())
+        counter = (row.value, row.modified)
+        cache.set(cache_key, counter, timeout=_timeout())
+    return counter
+
+
+def _get_counter(key):
+    """Return the current value of a version counter."""
+    return _read_counter(key)[0]
+
+
+def _bump_counter(key):
+    """
+    Atomically increment a version counter.
+
+    Its modification time moves forward by at least a second: HTTP dates
+    have one second resolution, and two changes within the same second would
+    otherwise share a Last-Modified value.
+
+    Returns:
+        int: The new value
+    """
+    now = timezone.now().replace(microsecond=0)
+    counters = VersionCounter.objects.filter(key=key)
+    with transaction.atomic():
+        changes = {
+            'value': F('value') + 1,
+            'modified': Greatest('modified', Value(now, output_field=DateTimeField())) + timedelta(seconds=1),
+        }
+        if not counters.update(**changes):
+            VersionCounter.objects.get_or_create(key=key, defaults=_seed())
+            counters.update(**changes)
+        # The update keeps the row locked until the transaction ends, so this reads our own bump
+        counter = counters.values_list('value', 'modified').get()
+    cache.set(COUNTER_CACHE_KEY.format(key=key), counter, timeout=_timeout())
+    return counter[0]
+
+
+def get_catalog_version():
+    """
+    Return the current catalog version.
+
+    Returns:
+        int: Catalog version
+    """
+    return _get_counter(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """
+    Atomically increment the catalog version.
+
+    Returns:
+        int: The new catalog version
+    """
+    return _bump_counter(CATALOG_VERSION_KEY)
+
+
+def get_model_version(model):
+    """
+    Return the version and last-modified time of a model's rows.
+
+    Args:
+        model (type): Model class
+
+    Returns:
+        tuple: (int version, datetime last modified)
+    """
+    return _read_counter(MODEL_VERSION_KEY.format(label=model._meta.label_lower))
+
+
+def bump_model_version(model):
+    """
+    Record that rows of `model` changed.
+
+    Args:
+        model (type): Model class
+
+    Returns:
+        int: The new model version
+    """
+    return _bump_counter(MODEL_VERSION_KEY.format(label=model._meta.label_lower))
+
+
+def catalog_is_populated():
+    """
+    Return whether the catalog has any genres.
+
+    The answer is memoized per catalog version, in this process and in the
+    cache, so it only costs a query once after each catalog change.
+
+    Returns:
+        bool: True if at least one genre exists
+    """
+    global _populated
+    version = get_catalog_version()
+    if _populated[0] == version:
+        return _populated[1]
+
+    key = CATALOG_POPULATED_KEY.format(version=version)
+    populated = cache.get(key)
+    if populated is None:
+        populated = Genre.objects.exists()
+        cache.set(key, populated, timeout=24 * 60 * 60)
+    _populated = (version, populated)
+    return populated
+
+
+class VersionedIndex:
+    """
+    Base class for process-local indexes kept in step with the catalog version.
+
+    Subclasses implement rebuild(). Signal receivers apply changes made in
+    this process incrementally and then call advance(); changes made by other
+    processes are picked up by ensure_current(), which rebuilds the index.
+    """
+
+    def __init__(self):
+        self.version = None
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def ensure_current(self):
+        """Rebuild the index if the catalog changed since it was built."""
+        version = get_catalog_version()
+        if self.version != version:
+            self.rebuild()
+            self.version = version
+
+    def advance(self, version):
+        """
+        Record that a local change produced `version`.
+
+        If another process changed the catalog in between, the index is left
+        stale so the next ensure_current() rebuilds it.
+        """
+        if self.version is not None and version == self.version + 1:
+            self.version = version
@@ -0,0 +1,165 @@
+"""
+Incremental catalog change feed.
+
+Every save or delete of a catalog API model appends a CatalogChange row
+(written from model signals, see music_beta/signals.py). Clients sync by
+asking for the changes after the last token they saw and get back the
+current state of each changed row, or a delete marker. The token is the id
+of the last log entry returned.
+
+The log is compacted by `manage.py compact_catalog_changes`:
+- Entries superseded by a later entry for the same object are dropped. This
+  is always safe, because any client that had not seen the old entry will
+  see the newer one.
+- Delete entries older than CATALOG_CHANGES_RETENTION_DAYS are dropped, and
+  the highest dropped id is recorded as the horizon. Clients holding a token
+  below the horizon may have missed a delete and are told to resync.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Album, Artist, CatalogChange, CatalogChangeCompaction, Copyright, Genre, Track
+
+# Feed name -> model of the tracked catalog API models
+CHANGE_MODELS = {
+    'genre': Genre,
+    'artist': Artist,
+    'album': Album,
+    'track': Track,
+    'copyright': Copyright,
+}
+
+
+class ResyncRequired(Exception):
+    """The client's token predates a compaction that dropped delete entries."""
+
+
+def _settle_delay():
+    return getattr(settings, 'CATALOG_CHANGES_SETTLE_SECONDS', 1)
+
+
+def _retention():
+    return timedelta(days=getattr(settings, 'CATALOG_CHANGES_RETENTION_DAYS', 30))
+
+
+def change_name(model):
+    """Return the feed name of a model, or None if it is not tracked."""
+    for name, tracked in CHANGE_MODELS.items():
+        if model is tracked:
+            return name
+    return None
+
+
+def record_changes(model, object_ids, action=CatalogChange.ACTION_UPSERT):
+    """
+    Append change log entries for rows of `model`.
+
+    Args:
+        model (type): Tracked model class
+        object_ids (iterable): Primary keys of the changed rows
+        action (str): CatalogChange.ACTION_UPSERT or ACTION_DELETE
+    """
+    name = change_name(model)
+    entries = [CatalogChange(model=name, object_id=object_id, action=action) for object_id in object_ids]
+    if entries:
+        CatalogChange.objects.bulk_create(entries)
+
+
+def _horizon():
+    return CatalogChangeCompaction.objects.aggregate(horizon=Max('horizon'))['horizon'] or 0
+
+
+def latest_token():
+    """Return the token of the newest change, for clients starting from a full download."""
+    latest = CatalogChange.objects.aggregate(latest=Max('id'))['latest'] or 0
+    return max(latest, _horizon())
+
+
+def changes_since(since, limit, serialize):
+    """
+    Return the changes recorded after a token.
+
+    Entries newer than CATALOG_CHANGES_SETTLE_SECONDS are held back. On
+    databases with concurrent writers, ids can commit out of order, and the
+    delay keeps a client from moving its token past an id that commits later.
+
+    Args:
+        since (int): Token of the last change the client has seen
+        limit (int): Maximum number of log entries to read
+        serialize (callable): serialize(model, queryset) -> list of dicts
+            with an 'id' key; used to render the current rows
+
+    Returns:
+        dict: 'changes' (list of {model, id, action, data}), 'next' (token
+        to pass as `since` next time) and 'more' (whether more entries are
+        waiting)
+
+    Raises:
+        ResyncRequired: If `since` predates the compaction horizon
+    """
+    horizon = _horizon()
+    if since < horizon:
+        raise ResyncRequired(f"Token {since} predates compaction up to {horizon}")
+
+    settled = timezone.now() - timedelta(seconds=_settle_delay())
+    entries = list(CatalogChange.objects.filter(id__gt=since, created_at__lte=settled)
+                   .order_by('id').values_list('id', 'model', 'object_id')[:limit + 1])
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Only the latest entry per object matters; the row is read in its current state
+    latest = {}
+    for entry_id, name, object_id in entries:
+        latest[(name, object_id)] = entry_id
+
+    rows = {}
+    for name, model in CHANGE_MODELS.items():
+        ids = [object_id for (entry_name, object_id) in latest if entry_name == name]
+        if ids:
+            rows[name] = {row['id']: row for row in serialize(model, model.objects.filter(pk__in=ids))}
+
+    changes = []
+    for (name, object_id), entry_id in sorted(latest.items(), key=lambda item: item[1]):
+        data = rows.get(name, {}).get(object_id)
+        changes.append({
+            'model': name,
+            'id': object_id,
+            'action': CatalogChange.ACTION_UPSERT if data is not None else CatalogChange.ACTION_DELETE,
+            'data': data,
+        })
+
+    return {
+        'changes': changes,
+        'next': entries[-1][0] if entries else since,
+        'more': more,
+    }
+
+
+@transaction.atomic
+def compact_changes(retention=None):
+    """
+    Drop superseded entries and expired delete entries from the change log.
+
+    Args:
+        retention (timedelta): How long delete entries are kept, defaults to
+            CATALOG_CHANGES_RETENTION_DAYS
+
+    Returns:
+        int: Number of entries removed
+    """
+    latest_ids = (CatalogChange.objects.values('model', 'object_id')
+                  .annotate(latest=Max('id')).values_list('latest', flat=True))
+    removed, _ = CatalogChange.objects.exclude(id__in=latest_ids).delete()
+
+    cutoff = timezone.now() - (retention if retention is not None else _retention())
+    expired = CatalogChange.objects.filter(action=CatalogChange.ACTION_DELETE, created_at__lt=cutoff)
+    horizon = expired.aggregate(horizon=Max('id'))['horizon']
+    if horizon is not None:
+        expired_count, _ = expired.delete()
+        removed += expired_count
+        CatalogChangeCompaction.objects.create(horizon=horizon, removed=removed)
+    return removed
@@ -0,0 +1,95 @@
+"""
+Custom model fields for the music_beta app.
+"""
+import hashlib
+
+from django.core.files import File
+from django.db import models
+from django.db.models.fields.files import FieldFile
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Compute the SHA-256 of a file without reading it into memory at once.
+
+    Args:
+        file_path (str): Path to the file
+        chunk_size (int): Bytes read per iteration
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class HashingFile(File):
+    """
+    File wrapper that feeds every chunk the storage writes into a SHA-256.
+
+    Storages write uploads by iterating chunks(), so the digest is computed in
+    the same pass as the write instead of reading the file again afterwards.
+    """
+
+    def __init__(self, content):
+        super().__init__(content, name=content.name)
+        self.hasher = hashlib.sha256()
+
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size):
+            self.hasher.update(chunk)
+            yield chunk
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+class HashedFieldFile(FieldFile):
+    """FieldFile that records the SHA-256 of saved content on its model instance."""
+
+    def save(self, name, content, save=True):
+        if hasattr(content, 'temporary_file_path'):
+            # Large uploads are already on disk and are moved, not copied, into
+            # place; hash the temporary file so the move is kept.
+            digest = file_sha256(content.temporary_file_path())
+            super().save(name, content, save=False)
+        else:
+            content = HashingFile(content)
+            super().save(name, content, save=False)
+            digest = content.hexdigest()
+
+        setattr(self.instance, self.field.hash_field, digest)
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+    def delete(self, save=True):
+        setattr(self.instance, self.field.hash_field, '')
+        super().delete(save=save)
+
+    delete.alters_data = True
+
+
+class HashedFileField(models.FileField):
+    """
+    FileField that stores the SHA-256 of the uploaded content in `hash_field`.
+
+    The hash field must be declared after this field on the model so the digest
+    computed while the file is written is included in the same save.
+    """
+    attr_class = HashedFieldFile
+
+    def __init__(self, *args, hash_field='content_hash', **kwargs):
+        self.hash_field = hash_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['hash_field'] = self.hash_field
+        return name, path, args, kwargs
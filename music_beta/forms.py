@@ -1,10 +1,9 @@
 from django import forms
 from django.core.validators import RegexValidator
-from django.core.files.storage import default_storage
 import os
 
 from .models import Genre, Track, ClientCampaign
-from .utils import extract_audio_metadata
+from .jobs import enqueue_analysis
 
 class ServiceRequestForm(forms.Form):
     """Form for service requests."""
@@ -133,54 +132,17 @@ class TrackForm(forms.ModelForm):
 
     def save(self, commit=True):
         """
-        Override the save method to extract metadata from the audio file.
+        Override the save method to queue analysis of the uploaded audio file.
+
+        The upload is saved right away with an "analysis pending" status; the
+        metadata is extracted later by `manage.py process_analysis_jobs`.
         """
         instance = super().save(commit=False)
 
         # Check if an audio file was uploaded
-        if self.cleaned_data.get('audio_file'):
-            # Get the file path
-            file_path = default_storage.path(self.cleaned_data['audio_file'].name)
-
-            # Extract metadata
-            metadata = extract_audio_metadata(file_path)
-
-            # Update instance with metadata
-            if metadata:
-                # Only update fields that are not already set
-                if not instance.title and 'title' in metadata:
-                    instance.title = metadata['title']
-
-                if not instance.duration and 'duration' in metadata:
-                    instance.duration = metadata['duration']
-
-                if not instance.year and 'year' in metadata:
-                    instance.year = metadata['year']
-
-                if not instance.genre_tag and 'genre_tag' in metadata:
-                    instance.genre_tag = metadata['genre_tag']
-
-                if not instance.composer and 'composer' in metadata:
-                    instance.composer = metadata['composer']
-
-                if not instance.track_number and 'track_number' in metadata:
-                    instance.track_number = metadata['track_number']
-
-                if 'bitrate' in metadata:
-                    instance.bitrate = metadata['bitrate']
-
-                if 'sample_rate' in metadata:
-                    instance.sample_rate = metadata['sample_rate']
-
-                # New fields from librosa analysis
-                if not instance.bpm and 'bpm' in metadata:
-                    instance.bpm = metadata['bpm']
-
-                if not instance.key and 'key' in metadata:
-                    instance.key = metadata['key']
-
-                if not instance.mood and 'mood' in metadata:
-                    instance.mood = metadata['mood']
+        analyze = bool(self.cleaned_data.get('audio_file')) and 'audio_file' in self.changed_data
+        if analyze:
+            instance.analysis_status = Track.ANALYSIS_PENDING
 
         # Ensure copyright is set
         if not instance.copyright:
@@ -191,6 +153,17 @@ class TrackForm(forms.ModelForm):
 
         if commit:
             instance.save()
+            if analyze:
+                enqueue_analysis(instance)
+        elif analyze:
+            # Queue the job once the caller has saved the track
+            save_m2m = self.save_m2m
+
+            def save_m2m_and_enqueue():
+                save_m2m()
+                enqueue_analysis(instance)
+
+            self.save_m2m = save_m2m_and_enqueue
 
         return instance
 
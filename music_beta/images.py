@@ -0,0 +1,229 @@
+"""
+Fixed-size image derivatives and local placeholders.
+
+Uploaded artist images, album covers and profile pictures are served as
+square WebP and JPEG derivatives at the DERIVATIVE_SIZES instead of the
+original upload. Derivatives are generated when the image is saved (see
+music_beta/signals.py) or lazily the first time they are asked for, and kept
+in the default storage under IMAGE_DERIVATIVE_DIR, so each is generated once.
+
+Rows without an image get one of a small palette of generated placeholders
+instead of a hotlinked picsum.photos image. Without Pillow, originals are
+served as they are and placeholders fall back to a static SVG.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.templatetags.static import static
+
+# Try to import Pillow, but serve originals if it's not available
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Derivative name -> edge length in pixels; derivatives are square crops
+DERIVATIVE_SIZES = {
+    'list': 96,
+    'card': 300,
+    'hero': 1200,
+}
+DEFAULT_SIZE = 'card'
+# File extension -> Pillow format; FALLBACK_FORMAT is used for <img>, WebP for <source>
+FORMATS = {
+    'webp': 'WEBP',
+    'jpg': 'JPEG',
+}
+FALLBACK_FORMAT = 'jpg'
+# Placeholder background colors; rows are spread over them by a hash of their seed
+PLACEHOLDER_COLORS = ['#4a5568', '#2b6cb0', '#2f855a', '#b7791f', '#c53030', '#6b46c1', '#2c7a7b', '#97266d']
+PLACEHOLDER_STATIC = 'images/placeholder.svg'
+
+
+def _directory():
+    return getattr(settings, 'IMAGE_DERIVATIVE_DIR', 'derivatives')
+
+
+def _quality():
+    return getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+
+
+def _hash(value):
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+
+def derivative_name(key, size, ext):
+    """Storage name of a derivative."""
+    return f'{_directory()}/{key}/{size}.{ext}'
+
+
+def is_local(field_file):
+    """Whether a file field holds an uploaded file (seeded rows may hold remote URLs)."""
+    return bool(field_file) and not field_file.name.startswith(('http://', 'https://'))
+
+
+class ImageSet:
+    """
+    URLs of an image at the derivative sizes, ready for src and srcset.
+
+    Args:
+        urls (dict): {ext: {size: url}} of the derivatives that exist
+        src (str): URL to use when there are no derivatives
+    """
+
+    def __init__(self, urls=None, src=None):
+        self.urls = urls or {}
+        self._src = src
+
+    def url(self, size=DEFAULT_SIZE, ext=FALLBACK_FORMAT):
+        """URL of one derivative, or of the nearest smaller one that exists."""
+        available = self.urls.get(ext, {})
+        if size in available:
+            return available[size]
+        smaller = [name for name in DERIVATIVE_SIZES if name in available
+                   and DERIVATIVE_SIZES[name] <= DERIVATIVE_SIZES[size]]
+        return available[smaller[-1]] if smaller else self._src
+
+    def _srcset(self, ext):
+        return ', '.join(f'{url} {DERIVATIVE_SIZES[size]}w' for size, url in self.urls.get(ext, {}).items())
+
+    @property
+    def src(self):
+        return self.url()
+
+    @property
+    def srcset(self):
+        return self._srcset(FALLBACK_FORMAT)
+
+    @property
+    def webp_srcset(self):
+        return self._srcset('webp')
+
+    def __str__(self):
+        return self.src or ''
+
+
+def _save_image(image, name, ext):
+    buffer = BytesIO()
+    image.save(buffer, FORMATS[ext], quality=_quality(), optimize=True)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def _available(key):
+    """Return the derivative sizes stored for a key, memoized in the cache."""
+    cache_key = f'image:derivatives:{key}'
+    sizes = cache.get(cache_key)
+    if sizes is None:
+        sizes = [size for size in DERIVATIVE_SIZES
+                 if all(default_storage.exists(derivative_name(key, size, ext)) for ext in FORMATS)]
+        if sizes:
+            cache.set(cache_key, sizes, timeout=None)
+    return sizes
+
+
+def _write_derivatives(image, key):
+    """Write the derivatives of a Pillow image and return the sizes written."""
+    edge = min(image.size)
+    # Never upscale: sizes above the source are skipped, except the smallest
+    sizes = [size for size, length in DERIVATIVE_SIZES.items() if length <= edge] or [next(iter(DERIVATIVE_SIZES))]
+    for size in sizes:
+        length = DERIVATIVE_SIZES[size]
+        resized = ImageOps.fit(image, (length, length), Image.LANCZOS)
+        for ext in FORMATS:
+            _save_image(resized, derivative_name(key, size, ext), ext)
+    cache.set(f'image:derivatives:{key}', sizes, timeout=None)
+    return sizes
+
+
+def generate_derivatives(field_file):
+    """
+    Generate the derivatives of an uploaded image unless they exist.
+
+    Args:
+        field_file (FieldFile): Image file field value
+
+    Returns:
+        list: Sizes available, empty if the file could not be read
+    """
+    if not PIL_AVAILABLE or not is_local(field_file):
+        return []
+    key = _hash(field_file.name)
+    sizes = _available(key)
+    if sizes or cache.get(f'image:failed:{key}'):
+        return sizes
+
+    try:
+        with field_file.storage.open(field_file.name, 'rb') as f:
+            image = Image.open(f)
+            image = ImageOps.exif_transpose(image)
+            if image.mode != 'RGB':
+                # Flatten transparency onto white; JPEG has no alpha channel
+                background = Image.new('RGB', image.size, 'white')
+                background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+                image = background
+            return _write_derivatives(image, key)
+    except Exception as e:
+        print(f"Error generating derivatives of {field_file.name}: {str(e)}")
+        # Don't retry on every page view; the file is served as it is
+        cache.set(f'image:failed:{key}', True, timeout=3600)
+        return []
+
+
+def _image_set(key, sizes, src=None):
+    urls = {ext: {size: default_storage.url(derivative_name(key, size, ext)) for size in sizes} for ext in FORMATS}
+    return ImageSet(urls, src=src)
+
+
+def placeholder_set(seed):
+    """
+    Return the placeholder image set for a row without an image.
+
+    Args:
+        seed (str): Stable identifier of the row, e.g. 'artist-12'
+
+    Returns:
+        ImageSet: One of the PLACEHOLDER_COLORS placeholders
+    """
+    if not PIL_AVAILABLE:
+        return ImageSet(src=static(PLACEHOLDER_STATIC))
+    index = int(hashlib.sha256(seed.encode()).hexdigest(), 16) % len(PLACEHOLDER_COLORS)
+    key = f'placeholder-{index}'
+    sizes = _available(key)
+    if not sizes:
+        try:
+            edge = max(DERIVATIVE_SIZES.values())
+            sizes = _write_derivatives(Image.new('RGB', (edge, edge), PLACEHOLDER_COLORS[index]), key)
+        except Exception as e:
+            print(f"Error generating placeholder {key}: {str(e)}")
+            return ImageSet(src=static(PLACEHOLDER_STATIC))
+    return _image_set(key, sizes)
+
+
+def image_set(field_file, seed):
+    """
+    Return the image set of an image field, or a placeholder.
+
+    Args:
+        field_file (FieldFile): Image file field value, may be empty
+        seed (str): Stable identifier of the row, used to pick a placeholder
+
+    Returns:
+        ImageSet: Derivatives of the image; the original if they cannot be
+        generated; a placeholder if there is no uploaded image
+    """
+    if not is_local(field_file):
+        return placeholder_set(seed)
+    sizes = generate_derivatives(field_file)
+    if sizes:
+        return _image_set(_hash(field_file.name), sizes)
+    try:
+        return ImageSet(src=field_file.url)
+    except Exception:
+        return placeholder_set(seed)
@@ -0,0 +1,220 @@
+"""
+Database-backed job queue for audio analysis and transcoding.
+
+Uploads only enqueue an AnalysisJob; a separate worker process
+(`manage.py process_analysis_jobs`) claims jobs, runs the analysis and writes
+the results back to the track. A successful analysis queues the transcode
+stage, which encodes the HLS ladder (see music_beta/transcode.py). No
+external broker is needed.
+"""
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .images import is_local
+from .models import AnalysisJob, Track
+from .transcode import ladder_for, transcode_track
+from .utils import AUDIO_METADATA_FIELDS, apply_audio_metadata, extract_audio_metadata
+
+
+def _max_attempts():
+    return getattr(settings, 'ANALYSIS_JOB_MAX_ATTEMPTS', 3)
+
+
+def _visibility_timeout():
+    return getattr(settings, 'ANALYSIS_JOB_VISIBILITY_TIMEOUT', 300)
+
+
+def _retry_delay(attempts):
+    """Exponential backoff in seconds before the next attempt."""
+    return getattr(settings, 'ANALYSIS_JOB_RETRY_DELAY', 30) * 2 ** max(attempts - 1, 0)
+
+
+def enqueue_analysis(track):
+    """
+    Mark a track as "analysis pending" and queue a job for it.
+
+    A track only ever has one queued job; enqueueing again reuses it.
+
+    Args:
+        track (Track): Saved track with an audio file
+
+    Returns:
+        AnalysisJob: The queued job
+    """
+    # The renditions of the previous file no longer match the audio
+    Track.objects.filter(pk=track.pk).update(analysis_status=Track.ANALYSIS_PENDING, renditions=[])
+    track.analysis_status = Track.ANALYSIS_PENDING
+    track.renditions = []
+    return _enqueue(track, AnalysisJob.STAGE_ANALYSIS)
+
+
+def enqueue_transcode(track):
+    """
+    Queue the HLS transcode of a track with an uploaded audio file.
+
+    Args:
+        track (Track): Saved track
+
+    Returns:
+        AnalysisJob: The queued job, or None if there is nothing to transcode
+    """
+    if not is_local(track.audio_file) or not ladder_for(None):
+        return None
+    return _enqueue(track, AnalysisJob.STAGE_TRANSCODE)
+
+
+def _enqueue(track, stage):
+    job = AnalysisJob.objects.filter(track=track, stage=stage, status=AnalysisJob.STATUS_QUEUED).first()
+    if job is None:
+        job = AnalysisJob.objects.create(track=track, stage=stage, max_attempts=_max_attempts())
+    return job
+
+
+def _claimable(now):
+    """Jobs that are queued and due, or whose worker's lock has expired."""
+    return (Q(status=AnalysisJob.STATUS_QUEUED, available_at__lte=now)
+            | Q(status=AnalysisJob.STATUS_RUNNING, locked_until__lte=now))
+
+
+def claim_next_job(visibility_timeout=None):
+    """
+    Atomically claim the next available job.
+
+    The claim is a conditional UPDATE, so two workers can never own the same
+    job. The job stays invisible to other workers for `visibility_timeout`
+    seconds; after that it is handed out again.
+
+    Args:
+        visibility_timeout (int): Seconds the claim is valid for
+
+    Returns:
+        AnalysisJob: The claimed job or None if the queue is empty
+    """
+    timeout = visibility_timeout or _visibility_timeout()
+    now = timezone.now()
+
+    # Jobs abandoned by a worker on their last attempt are not retried again
+    AnalysisJob.objects.filter(
+        status=AnalysisJob.STATUS_RUNNING, locked_until__lte=now, attempts__gte=F('max_attempts'),
+    ).update(status=AnalysisJob.STATUS_FAILED, last_error='Visibility timeout expired', updated_at=now)
+
+    candidates = (AnalysisJob.objects.filter(_claimable(now))
+                  .order_by('available_at', 'id')
+                  .values_list('id', flat=True)[:10])
+    for job_id in candidates:
+        claimed = AnalysisJob.objects.filter(_claimable(now), pk=job_id).update(
+            status=AnalysisJob.STATUS_RUNNING,
+            locked_until=now + timedelta(seconds=timeout),
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if claimed:
+            return AnalysisJob.objects.select_related('track').get(pk=job_id)
+
+    return None
+
+
+def _finish(job, **changes):
+    """Update a job only if this worker still owns the claim."""
+    changes['updated_at'] = timezone.now()
+    return AnalysisJob.objects.filter(
+        pk=job.pk, status=AnalysisJob.STATUS_RUNNING, attempts=job.attempts,
+    ).update(**changes)
+
+
+def _analyze(job):
+    track = job.track
+    timings = {}
+    metadata = extract_audio_metadata(track.audio_file.path, timings=timings, content_hash=track.content_hash)
+    apply_audio_metadata(track, metadata)
+    track.analysis_status = Track.ANALYSIS_DONE
+    track.save(update_fields=AUDIO_METADATA_FIELDS + ['analysis_status'])
+    # The ladder skips rungs above the bitrate found by the analysis
+    enqueue_transcode(track)
+    return timings
+
+
+def _transcode(job):
+    track = job.track
+    start = time.perf_counter()
+    # The encoder must finish before the claim expires and another worker starts over
+    timeout = (job.locked_until - timezone.now()).total_seconds() if job.locked_until else None
+    track.renditions = transcode_track(track, timeout=timeout)
+    track.save(update_fields=['renditions'])
+    return {'transcode': time.perf_counter() - start}
+
+
+STAGES = {
+    AnalysisJob.STAGE_ANALYSIS: _analyze,
+    AnalysisJob.STAGE_TRANSCODE: _transcode,
+}
+
+
+def run_job(job):
+    """
+    Run the job's stage on its track and record the outcome.
+
+    Args:
+        job (AnalysisJob): A job returned by claim_next_job
+
+    Returns:
+        bool: True if the stage succeeded
+    """
+    track = job.track
+    try:
+        timings = STAGES[job.stage](job)
+    except Exception as e:
+        print(f"Error in {job.stage} of track {track.pk}: {e}")
+        if job.attempts >= job.max_attempts:
+            _finish(job, status=AnalysisJob.STATUS_FAILED, last_error=traceback.format_exc())
+            if job.stage == AnalysisJob.STAGE_ANALYSIS:
+                Track.objects.filter(pk=track.pk).update(analysis_status=Track.ANALYSIS_FAILED)
+        else:
+            _finish(
+                job,
+                status=AnalysisJob.STATUS_QUEUED,
+                available_at=timezone.now() + timedelta(seconds=_retry_delay(job.attempts)),
+                locked_until=None,
+                last_error=traceback.format_exc(),
+            )
+        return False
+
+    _finish(job, status=AnalysisJob.STATUS_DONE, locked_until=None, last_error='')
+    job.timings = timings
+    return True
+
+
+def process_jobs(max_jobs=None, visibility_timeout=None, drain=True, poll_interval=5, on_job=None):
+    """
+    Claim and run jobs until the queue is empty or `max_jobs` have run.
+
+    Args:
+        max_jobs (int): Stop after this many jobs (None for no limit)
+        visibility_timeout (int): Seconds each claim is valid for
+        drain (bool): Return once the queue is empty instead of polling
+        poll_interval (float): Seconds to sleep between polls of an empty queue
+        on_job (callable): Called with (job, succeeded) after every job
+
+    Returns:
+        int: Number of jobs processed
+    """
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job(visibility_timeout)
+        if job is None:
+            if drain:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        succeeded = run_job(job)
+        processed += 1
+        if on_job:
+            on_job(job, succeeded)
+
+    return processed
@@ -0,0 +1,118 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from music_beta.catalog import bump_model_version
+from music_beta.changes import record_changes
+from music_beta.models import Track
+from music_beta.utils import apply_audio_metadata, extract_audio_metadata
+
+# Track fields backfilled by this command
+METADATA_FIELDS = ['bpm', 'key', 'bitrate', 'sample_rate', 'duration', 'waveform']
+LIBRARY_FIELDS = METADATA_FIELDS + ['analysis_status', 'updated_at']
+
+
+def analyze_file(track_id, file_path, content_hash):
+    """
+    Analyze one audio file. Runs in a worker process, so it must not touch the database.
+
+    Returns:
+        tuple: (track_id, metadata dict, error message or None)
+    """
+    try:
+        return track_id, extract_audio_metadata(file_path, content_hash=content_hash), None
+    except Exception as e:
+        return track_id, {}, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Backfill bpm, key, bitrate, sample_rate and duration for every track with an audio file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of analysis processes (defaults to the number of CPU cores)')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Tracks analyzed and written back per bulk_update')
+        parser.add_argument('--checkpoint', default=os.path.join(settings.BASE_DIR, 'analyze_library.checkpoint.json'),
+                            help='File recording the last track id written back; removed after a complete run')
+        parser.add_argument('--reset', action='store_true', help='Ignore the checkpoint and start from the first track')
+        parser.add_argument('--force', action='store_true', help='Re-analyze tracks that were already analyzed')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        # A checkpoint only resumes a run with the same --force option
+        last_id = 0 if options['reset'] else self.read_checkpoint(checkpoint, options['force'])
+        if last_id:
+            self.stdout.write(f'Resuming after track {last_id}')
+
+        tracks = Track.objects.exclude(audio_file='').exclude(audio_file__isnull=True)
+        if not options['force']:
+            tracks = tracks.exclude(analysis_status=Track.ANALYSIS_DONE)
+        tracks = tracks.only('id', 'audio_file', 'content_hash', *LIBRARY_FIELDS).order_by('id')
+
+        # Worker processes must not inherit open database connections
+        connections.close_all()
+
+        analyzed = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = list(tracks.filter(id__gt=last_id)[:options['batch_size']])
+                if not batch:
+                    break
+
+                by_id = {track.id: track for track in batch}
+                work = [(track.id, track.audio_file.path, track.content_hash) for track in batch]
+                results = pool.map(analyze_file, *zip(*work))
+
+                now = timezone.now()
+                for track_id, metadata, error in results:
+                    track = by_id[track_id]
+                    track.updated_at = now
+                    if metadata:
+                        apply_audio_metadata(track, metadata, fields=METADATA_FIELDS)
+                        track.analysis_status = Track.ANALYSIS_DONE
+                        analyzed += 1
+                    else:
+                        track.analysis_status = Track.ANALYSIS_FAILED
+                        failed += 1
+                        self.stdout.write(self.style.ERROR(f'Could not analyze track {track_id}: {error or "no metadata"}'))
+
+                # bulk_update sends no signals and skips auto_now
+                Track.objects.bulk_update(batch, LIBRARY_FIELDS)
+                bump_model_version(Track)
+                record_changes(Track, by_id)
+                last_id = batch[-1].id
+                self.write_checkpoint(checkpoint, last_id, options['force'])
+                self.stdout.write(f'Analyzed up to track {last_id} ({analyzed} done, {failed} failed)')
+
+        # The next run starts over, so it picks up failed, re-uploaded and older tracks
+        self.remove_checkpoint(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f'Library analysis completed: {analyzed} analyzed, {failed} failed'))
+
+    def read_checkpoint(self, path, force):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get('force', False) != force:
+            return 0
+        return data.get('last_track_id', 0)
+
+    def write_checkpoint(self, path, last_id, force):
+        # Write then rename so an interrupted run never leaves a truncated file
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_track_id': last_id, 'force': force}, f)
+        os.replace(tmp_path, path)
+
+    def remove_checkpoint(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,56 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from tfn_ctv.routing import MiddlewareChain, RoutedWSGIHandler
+
+DEFAULT_PATHS = ['/health/', '/music/api/genres/', '/music/api/tracks/?page_size=10', '/music/music/stream/1/']
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-request cost of the full MIDDLEWARE with the lean MIDDLEWARE_ROUTES chains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help=f"Paths to request (default: {' '.join(DEFAULT_PATHS)})")
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path and chain')
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed requests before measuring')
+        parser.add_argument('--host', default=None, help='Host header (default: the first of ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        full = MiddlewareChain(settings.MIDDLEWARE)
+        routed = RoutedWSGIHandler()
+        allowed = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host and host != '*']
+        host = options['host'] or next(iter(allowed), 'localhost')
+        factory = RequestFactory(HTTP_HOST=host)
+
+        def measure(chain, path):
+            for _ in range(options['warmup']):
+                chain.get_response(factory.get(path)).close()
+            timings = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options['requests']):
+                    request = factory.get(path)
+                    start = time.perf_counter()
+                    response = chain.get_response(request)
+                    timings.append(time.perf_counter() - start)
+                    response.close()
+            return statistics.median(timings) * 1e6, len(queries) / options['requests'], response.status_code
+
+        self.stdout.write(f"{'path':<40} {'status':>6} {'full us':>9} {'lean us':>9} {'saved us':>9} "
+                          f"{'full q':>7} {'lean q':>7}")
+        for path in options['paths'] or DEFAULT_PATHS:
+            lean = routed.chain_for(path.split('?')[0])
+            if lean is None:
+                raise CommandError(f'{path} is not in MIDDLEWARE_ROUTES, so it already runs the full MIDDLEWARE')
+            full_time, full_queries, status = measure(full, path)
+            lean_time, lean_queries, _ = measure(lean, path)
+            self.stdout.write(f'{path:<40} {status:>6} {full_time:>9.0f} {lean_time:>9.0f} '
+                              f'{full_time - lean_time:>9.0f} {full_queries:>7.1f} {lean_queries:>7.1f}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Median of {options['requests']} requests per path; 'q' is database queries per request"))
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from music_beta.models import User
+
+DB_ENGINE = 'django.contrib.sessions.backends.db'
+SIGNED_COOKIES_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
+
+def session_queries(queries):
+    """
+    Count the reads and writes of the session table among captured queries.
+
+    Returns:
+        tuple: (reads, writes)
+    """
+    table = Session._meta.db_table
+    statements = [query['sql'].lstrip().upper() for query in queries if table in query['sql']]
+    reads = sum(1 for sql in statements if sql.startswith('SELECT'))
+    return reads, len(statements) - reads
+
+
+class Command(BaseCommand):
+    help = 'Count session table reads and writes per authenticated page view for each session engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            help='Paths to view while logged in (default: home, music platform and dashboard)')
+        parser.add_argument('--views', type=int, default=20, help='Times each path is viewed')
+        parser.add_argument('--user', default=None, help='Username to log in as (default: the first client)')
+        parser.add_argument('--host', default=None, help='Host header (default: the first of ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.filter(user_type='client').order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to log in as; create one or pass --user')
+
+        paths = options['paths'] or [reverse('home'), reverse('music_platform'), reverse('client_dashboard')]
+        allowed = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host and host != '*']
+        host = options['host'] or next(iter(allowed), 'localhost')
+        engines = list(dict.fromkeys([DB_ENGINE, 'tfn_ctv.sessions.db', 'tfn_ctv.sessions.cached_db',
+                                      settings.SESSION_ENGINE, SIGNED_COOKIES_ENGINE]))
+        credentials = {'username': user.username, 'password': user.password}
+
+        self.stdout.write(f"{'engine':<48} {'login w':>7} {'relogin w':>9} {'view r':>7} {'view w':>7}")
+        for engine in engines:
+            # A new client per engine, so SessionMiddleware is loaded with the overridden engine
+            with override_settings(SESSION_ENGINE=engine):
+                client = Client(HTTP_HOST=host)
+                with CaptureQueriesContext(connection) as queries:
+                    client.post(reverse('login'), credentials)
+                _, login_writes = session_queries(queries)
+                with CaptureQueriesContext(connection) as queries:
+                    client.post(reverse('login'), credentials)
+                _, relogin_writes = session_queries(queries)
+
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(options['views']):
+                        for path in paths:
+                            client.get(path)
+                reads, writes = session_queries(queries)
+                client.get(reverse('logout'))
+
+            count = options['views'] * len(paths)
+            self.stdout.write(f'{engine:<48} {login_writes:>7} {relogin_writes:>9} '
+                              f'{reads / count:>7.2f} {writes / count:>7.2f}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['views']} views of {', '.join(paths)} as {user.username}; "
+            "'r'/'w' are session table reads/writes (per view for the page views)"))
@@ -0,0 +1,124 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from music_beta.models import Track
+
+# SQLite's own defaults, for the "before" run
+DEFAULT_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full', 'mmap_size': 0, 'cache_size': -2000}
+
+
+def percentile(values, fraction):
+    """Return the value below which the given fraction of the sorted values lie."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Measure music_platform reads against concurrent update_play_count writes on a copy of the SQLite '
+            'database, with SQLite defaults and with SQLITE_PRAGMAS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10, help='Duration of each run')
+        parser.add_argument('--readers', type=int, default=4, help='Threads requesting the music platform page')
+        parser.add_argument('--writers', type=int, default=2, help='Threads posting plays')
+        parser.add_argument('--buffered', action='store_true',
+                            help='Keep the play buffer settings instead of writing every play through')
+        parser.add_argument('--host', default=None, help='Host header (default: the first of ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite')
+        track_ids = list(Track.objects.values_list('pk', flat=True)[:500])
+        if not track_ids:
+            raise CommandError('No tracks to play; load some data first (e.g. generate_fake_data)')
+
+        allowed = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host and host != '*']
+        self.host = options['host'] or next(iter(allowed), 'localhost')
+        self.track_ids = track_ids
+        overrides = {'RATE_LIMITS': []}
+        if not options['buffered']:
+            overrides['PLAY_COUNT_MAX_PENDING'] = 1
+
+        self.stdout.write(f"{'profile':<10} {'reads/s':>8} {'read p50':>9} {'read p95':>9} "
+                          f"{'writes/s':>9} {'write p95':>10} {'errors':>7}")
+        with tempfile.TemporaryDirectory() as directory:
+            for profile, pragmas in [('before', DEFAULT_PRAGMAS), ('after', settings.SQLITE_PRAGMAS)]:
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                self.copy_database(path)
+                with override_settings(SQLITE_PRAGMAS=pragmas, **overrides):
+                    reads, writes, errors = self.run(path, options)
+                seconds = options['seconds']
+                self.stdout.write(
+                    f'{profile:<10} {len(reads) / seconds:>8.1f} {percentile(reads, 0.5):>7.1f}ms '
+                    f'{percentile(reads, 0.95):>7.1f}ms {len(writes) / seconds:>9.1f} '
+                    f'{percentile(writes, 0.95):>8.1f}ms {errors:>7}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['readers']} readers and {options['writers']} writers for {options['seconds']}s per run; "
+            "errors are failed requests, e.g. 'database is locked'"))
+
+    def copy_database(self, path):
+        """Copy the current database to path, so the benchmark doesn't change real play counts."""
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def run(self, path, options):
+        """
+        Run the readers and writers against the database at path.
+
+        Returns:
+            tuple: (read latencies in ms, write latencies in ms, number of failed requests)
+        """
+        settings_dict = connection.settings_dict
+        original_name = settings_dict['NAME']
+        # Connections opened from now on, one per thread, use the copy (the test runner switches databases the
+        # same way)
+        connection.close()
+        settings_dict['NAME'] = path
+        reads, writes, failures = [], [], []
+        deadline = time.monotonic() + options['seconds']
+
+        def worker(write):
+            client = Client(HTTP_HOST=self.host, raise_request_exception=False)
+            try:
+                while time.monotonic() < deadline:
+                    start = time.perf_counter()
+                    if write:
+                        track_id = random.choice(self.track_ids)
+                        response = client.post(reverse('update_play_count', args=[track_id]))
+                        failed = response.status_code != 200 or not response.json().get('success')
+                    else:
+                        response = client.get(reverse('music_platform'))
+                        failed = response.status_code != 200
+                    (writes if write else reads).append((time.perf_counter() - start) * 1000)
+                    if failed:
+                        failures.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(False,)) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=(True,)) for _ in range(options['writers'])]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            settings_dict['NAME'] = original_name
+        return reads, writes, len(failures)
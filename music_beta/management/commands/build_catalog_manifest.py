@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from music_beta.manifest import build_manifest
+
+
+class Command(BaseCommand):
+    help = 'Build the compressed catalog manifest behind /music/api/manifest/ (incremental unless --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Read the whole catalog instead of only rows changed since the last build')
+
+    def handle(self, *args, **options):
+        manifest = build_manifest(full=options['full'])
+        kind = 'incrementally' if manifest['incremental'] else 'from scratch'
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {manifest['name']} {kind} ({manifest['bytes']} bytes, token {manifest['token']})"))
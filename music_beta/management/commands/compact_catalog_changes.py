@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from music_beta.changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Compact the catalog change log behind /music/api/changes/ (run periodically, e.g. daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None,
+                            help='Days to keep delete entries (default: CATALOG_CHANGES_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        retention = options['retention_days']
+        removed = compact_changes(timedelta(days=retention) if retention is not None else None)
+        self.stdout.write(self.style.SUCCESS(f'Compacted the catalog change log ({removed} entries removed)'))
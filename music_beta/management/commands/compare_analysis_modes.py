@@ -0,0 +1,105 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music_beta.models import Track
+from music_beta.utils import (
+    ANALYSIS_MODE_EXCERPT, ANALYSIS_MODE_FULL, LIBROSA_AVAILABLE, analysis_settings, analyze_audio,
+)
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac', '.aiff')
+
+
+def bpm_error(reference, estimate):
+    """
+    Relative tempo error, also reporting half/double tempo (octave) errors.
+
+    Returns:
+        tuple: (absolute error in BPM, True if the estimate is an octave error)
+    """
+    error = abs(reference - estimate)
+    octave = any(abs(reference * factor - estimate) <= 0.04 * reference * factor for factor in (0.5, 2.0))
+    return error, octave
+
+
+class Command(BaseCommand):
+    help = 'Compare fast "excerpt" BPM/key analysis against full analysis on a reference set of audio files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            help='Audio files or directories (defaults to the audio files of existing tracks)')
+        parser.add_argument('--limit', type=int, default=None, help='Analyze at most this many files')
+        parser.add_argument('--tolerance', type=float, default=2.0,
+                            help='BPM difference still counted as agreeing with full analysis')
+
+    def handle(self, *args, **options):
+        if not LIBROSA_AVAILABLE:
+            raise CommandError('librosa is required to compare analysis modes')
+
+        files = self.reference_files(options['paths'])[:options['limit']]
+        if not files:
+            raise CommandError('No reference audio files found')
+
+        config = analysis_settings(ANALYSIS_MODE_EXCERPT)
+        self.stdout.write(
+            f"Excerpt mode: {config['windows']} windows of {config['window_seconds']}s at {config['sample_rate']} Hz"
+        )
+
+        rows = []
+        for path in files:
+            full, full_time = self.analyze(path, ANALYSIS_MODE_FULL)
+            fast, fast_time = self.analyze(path, ANALYSIS_MODE_EXCERPT)
+            if 'bpm' not in full or 'bpm' not in fast:
+                self.stdout.write(self.style.ERROR(f'Could not analyze {path}'))
+                continue
+
+            error, octave = bpm_error(full['bpm'], fast['bpm'])
+            key_match = full.get('key') == fast.get('key')
+            rows.append((error, octave, key_match, full_time, fast_time))
+            self.stdout.write(
+                f"{os.path.basename(path)}: BPM {full['bpm']} -> {fast['bpm']} "
+                f"({'octave error' if octave else f'{error:.2f} off'}), "
+                f"key {full.get('key')} -> {fast.get('key')}, "
+                f"{full_time:.2f}s -> {fast_time:.2f}s"
+            )
+
+        if not rows:
+            raise CommandError('None of the reference files could be analyzed')
+
+        count = len(rows)
+        within = sum(1 for error, _, _, _, _ in rows if error <= options['tolerance'])
+        octaves = sum(1 for _, octave, _, _, _ in rows if octave)
+        keys = sum(1 for _, _, key_match, _, _ in rows if key_match)
+        full_total = sum(row[3] for row in rows)
+        fast_total = sum(row[4] for row in rows)
+
+        self.stdout.write(self.style.SUCCESS(f'Compared {count} file(s)'))
+        self.stdout.write(f"Mean BPM error: {sum(row[0] for row in rows) / count:.2f}")
+        self.stdout.write(f"BPM within ±{options['tolerance']}: {within / count:.0%}")
+        self.stdout.write(f"BPM octave errors: {octaves / count:.0%}")
+        self.stdout.write(f"Key agreement: {keys / count:.0%}")
+        self.stdout.write(f"Analysis time: {full_total:.2f}s full, {fast_total:.2f}s excerpt "
+                          f"({full_total / max(fast_total, 1e-9):.1f}x faster)")
+
+    def analyze(self, path, mode):
+        started = time.perf_counter()
+        features = analyze_audio(path, mode=mode)
+        return features, time.perf_counter() - started
+
+    def reference_files(self, paths):
+        if not paths:
+            tracks = Track.objects.exclude(audio_file='').exclude(audio_file__isnull=True).order_by('id')
+            return [track.audio_file.path for track in tracks if os.path.exists(track.audio_file.path)]
+
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in sorted(names)
+                                 if name.lower().endswith(AUDIO_EXTENSIONS))
+            elif os.path.exists(path):
+                files.append(path)
+            else:
+                raise CommandError(f'{path} does not exist')
+        return files
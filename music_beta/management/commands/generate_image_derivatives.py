@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from artist_portal.models import ArtistProfile
+from music_beta.images import PIL_AVAILABLE, generate_derivatives, is_local
+from music_beta.models import Album, Artist
+
+
+class Command(BaseCommand):
+    help = 'Generate the resized image derivatives of existing uploads (new uploads get them when saved)'
+
+    def handle(self, *args, **options):
+        if not PIL_AVAILABLE:
+            self.stdout.write(self.style.ERROR('Pillow is not installed; originals are served as they are'))
+            return
+
+        generated = 0
+        for model, field in [(Artist, 'image'), (Album, 'cover_image'), (ArtistProfile, 'profile_picture')]:
+            for instance in model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).only('pk', field):
+                field_file = getattr(instance, field)
+                if is_local(field_file) and generate_derivatives(field_file):
+                    generated += 1
+        self.stdout.write(self.style.SUCCESS(f'Image derivatives are up to date for {generated} images'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from music_beta.jobs import process_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued audio analysis and transcode jobs (use --drain to exit once the queue is empty)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drain', action='store_true', help='Exit once the queue is empty instead of polling')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after processing this many jobs')
+        parser.add_argument('--visibility-timeout', type=int, default=None,
+                            help='Seconds a claimed job stays hidden from other workers')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        def report(job, succeeded):
+            label = f'{job.get_stage_display()} of track {job.track_id}'
+            if succeeded:
+                timings = ', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in job.timings.items())
+                self.stdout.write(self.style.SUCCESS(f'{label} done ({timings})'))
+            else:
+                self.stdout.write(self.style.ERROR(f'{label} failed (attempt {job.attempts})'))
+
+        processed = process_jobs(
+            max_jobs=options['max_jobs'],
+            visibility_timeout=options['visibility_timeout'],
+            drain=options['drain'],
+            poll_interval=options['poll_interval'],
+            on_job=report,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s)'))
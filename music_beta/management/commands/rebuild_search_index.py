@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from music_beta.search import get_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the catalog search index from the Artist, Album and Track tables'
+
+    def handle(self, *args, **options):
+        index = get_search_index()
+        index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the {type(index).__name__}'))
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from music_beta.models import Genre, Artist, Album, Track
+
+# Placeholder catalog shown by the CTV Music platform demo
+GENRES = ['Rock', 'Pop', 'Hip Hop', 'Jazz', 'Electronic']
+
+ARTISTS = [
+    ('Sample Artist 1', 'Lorem ipsum dolor sit amet, consectetur adipiscing elit.'),
+    ('Sample Artist 2', 'Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.'),
+]
+
+ALBUMS = [
+    # title, artist, release date, genres
+    ('Sample Album 1', 'Sample Artist 1', '2023-01-01', ['Rock', 'Pop']),
+    ('Sample Album 2', 'Sample Artist 2', '2023-02-01', ['Hip Hop', 'Electronic']),
+]
+
+TRACKS = [
+    # title, album, audio file, duration
+    ('Sample Track 1', 'Sample Album 1', 'https://www.soundhelix.com/examples/mp3/SoundHelix-Song-1.mp3', '3:45'),
+    ('Sample Track 2', 'Sample Album 1', 'https://www.soundhelix.com/examples/mp3/SoundHelix-Song-2.mp3', '4:12'),
+    ('Sample Track 3', 'Sample Album 2', 'https://www.soundhelix.com/examples/mp3/SoundHelix-Song-3.mp3', '3:22'),
+    ('Sample Track 4', 'Sample Album 2', 'https://www.soundhelix.com/examples/mp3/SoundHelix-Song-4.mp3', '5:01'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Create the placeholder catalog used by the music platform demo (safe to run repeatedly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-empty', action='store_true',
+                            help='Only seed when the catalog has no genres yet')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options['if_empty'] and Genre.objects.exists():
+            self.stdout.write('Catalog already populated, nothing to do')
+            return
+
+        created = 0
+        genres = {}
+        for name in GENRES:
+            genres[name], was_created = Genre.objects.get_or_create(name=name)
+            created += was_created
+
+        artists = {}
+        for name, bio in ARTISTS:
+            artists[name], was_created = Artist.objects.get_or_create(name=name, defaults={'bio': bio})
+            created += was_created
+
+        albums = {}
+        for title, artist, release_date, album_genres in ALBUMS:
+            albums[title], was_created = Album.objects.get_or_create(
+                title=title,
+                artist=artists[artist],
+                defaults={'release_date': release_date},
+            )
+            if was_created:
+                albums[title].genre.add(*[genres[name] for name in album_genres])
+            created += was_created
+
+        for title, album, audio_file, duration in TRACKS:
+            _, was_created = Track.objects.get_or_create(
+                title=title,
+                album=albums[album],
+                defaults={'artist': albums[album].artist, 'audio_file': audio_file, 'duration': duration},
+            )
+            created += was_created
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded the catalog ({created} objects created)'))
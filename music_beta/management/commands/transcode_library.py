@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from music_beta.jobs import enqueue_transcode
+from music_beta.models import Track
+
+
+class Command(BaseCommand):
+    help = 'Queue HLS transcode jobs for analyzed tracks without renditions (run process_analysis_jobs to encode them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Queue every analyzed track, even transcoded ones')
+
+    def handle(self, *args, **options):
+        tracks = Track.objects.filter(analysis_status=Track.ANALYSIS_DONE).only('pk', 'audio_file')
+        if not options['force']:
+            tracks = tracks.filter(renditions=[])
+
+        queued = sum(1 for track in tracks.iterator() if enqueue_transcode(track))
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} transcode job(s)'))
@@ -0,0 +1,282 @@
+"""
+Precomputed, compressed catalog manifest for TV apps.
+
+Instead of paging through the catalog viewsets on boot, a TV app downloads
+one gzip-compressed JSON document:
+
+    {
+      "format": 1,
+      "token": 1234,                       # change feed token it is current to
+      "strings": ["Rock", "Pop", ...],     # every string, stored once
+      "schema": {"tracks": ["id", "title", ...], ...},
+      "genres":  [[id, name], ...],
+      "artists": [[id, name, image], ...],
+      "albums":  [[id, title, artist, [genre, ...], cover, release_date], ...],
+      "tracks":  [[id, title, album, artist, audio, duration], ...]
+    }
+
+Strings are indexes into "strings" (or null). References between sections
+(artist, album, genre) are indexes into the referenced section, not primary
+keys, so a client can resolve them without building lookup tables.
+
+The manifest is written to storage under a name containing the hash of its
+content, so it can be served with an immutable cache lifetime; the small
+/music/api/manifest/ pointer tells clients the current name. Regeneration
+is incremental: the rows behind the last manifest are kept in a state file,
+and only rows changed since its change feed token are read again.
+"""
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .changes import CHANGE_MODELS, ResyncRequired, latest_token, _horizon
+from .models import Album, Artist, CatalogChange, Genre, Track
+
+MANIFEST_FORMAT = 1
+STATE_NAME = 'catalog-state.json'
+POINTER_CACHE_KEY = 'catalog:manifest'
+BUILD_LOCK_KEY = 'catalog:manifest:building'
+
+SCHEMA = {
+    'genres': ['id', 'name'],
+    'artists': ['id', 'name', 'image'],
+    'albums': ['id', 'title', 'artist', 'genres', 'cover', 'release_date'],
+    'tracks': ['id', 'title', 'album', 'artist', 'audio', 'duration'],
+}
+SECTION_MODELS = {'genres': Genre, 'artists': Artist, 'albums': Album, 'tracks': Track}
+
+
+def _directory():
+    return getattr(settings, 'CATALOG_MANIFEST_DIR', 'manifests')
+
+
+def _path(name):
+    return f'{_directory()}/{name}'
+
+
+def load_rows(section, pks=None):
+    """
+    Read the manifest rows of a section, keyed by primary key.
+
+    Args:
+        section (str): Key of SECTION_MODELS
+        pks (iterable): Only read these rows, or None for all of them
+
+    Returns:
+        dict: {pk: row}, where a row holds raw strings and primary keys
+    """
+    model = SECTION_MODELS[section]
+    queryset = model.objects.all() if pks is None else model.objects.filter(pk__in=list(pks))
+
+    if section == 'genres':
+        return {pk: [name] for pk, name in queryset.values_list('pk', 'name')}
+    if section == 'artists':
+        return {artist.pk: [artist.name, artist.image_url]
+                for artist in queryset.only('pk', 'name', 'image')}
+    if section == 'albums':
+        albums = {album.pk: [album.title, album.artist_id, [], album.cover_image_url,
+                             album.release_date.isoformat() if album.release_date else None]
+                  for album in queryset.only('pk', 'title', 'artist', 'cover_image', 'release_date')}
+        links = Album.genre.through.objects.filter(album_id__in=list(albums)).order_by('genre_id')
+        for album_id, genre_id in links.values_list('album_id', 'genre_id'):
+            albums[album_id][2].append(genre_id)
+        return albums
+    return {track.pk: [track.title, track.album_id, track.artist_id, track.audio_url or None, track.duration]
+            for track in queryset.only('pk', 'title', 'album', 'artist', 'audio_file', 'duration')}
+
+
+def encode_manifest(rows, token):
+    """
+    Encode pk-keyed rows into the manifest document.
+
+    Args:
+        rows (dict): {section: {pk: row}} as returned by load_rows()
+        token (int): Change feed token the rows are current to
+
+    Returns:
+        dict: Manifest document
+    """
+    strings, string_index = [], {}
+
+    def intern(value):
+        if value is None:
+            return None
+        value = str(value)
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    order = {section: sorted(rows[section]) for section in SCHEMA}
+    position = {section: {pk: i for i, pk in enumerate(pks)} for section, pks in order.items()}
+
+    def ref(section, pk):
+        return position[section].get(pk)
+
+    manifest = {'format': MANIFEST_FORMAT, 'token': token, 'strings': strings, 'schema': SCHEMA}
+    manifest['genres'] = [[pk, intern(rows['genres'][pk][0])] for pk in order['genres']]
+    manifest['artists'] = [[pk, intern(name), intern(image)]
+                           for pk in order['artists'] for name, image in [rows['artists'][pk]]]
+    manifest['albums'] = [
+        [pk, intern(title), ref('artists', artist), [ref('genres', genre) for genre in genres if genre in position['genres']],
+         intern(cover), intern(release_date)]
+        for pk in order['albums'] for title, artist, genres, cover, release_date in [rows['albums'][pk]]
+    ]
+    manifest['tracks'] = [
+        [pk, intern(title), ref('albums', album), ref('artists', artist), intern(audio), intern(duration)]
+        for pk in order['tracks'] for title, album, artist, audio, duration in [rows['tracks'][pk]]
+    ]
+    return manifest
+
+
+def _read_state():
+    """Return the state of the last build, or None."""
+    try:
+        with default_storage.open(_path(STATE_NAME)) as f:
+            state = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if state.get('format') != MANIFEST_FORMAT:
+        return None
+    # JSON object keys are strings; rows are keyed by integer primary keys
+    state['rows'] = {section: {int(pk): row for pk, row in rows.items()} for section, rows in state['rows'].items()}
+    return state
+
+
+def _write_file(name, content):
+    path = _path(name)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(content))
+
+
+def _changed_pks(since):
+    """
+    Return {section: set of pks} changed after a change feed token.
+
+    Raises:
+        ResyncRequired: If the change log no longer reaches back to `since`
+    """
+    if since < _horizon():
+        raise ResyncRequired(f"Token {since} predates the change log horizon")
+    sections = {model: section for section, model in SECTION_MODELS.items()}
+    changed = {section: set() for section in SECTION_MODELS}
+    entries = CatalogChange.objects.filter(id__gt=since).values_list('model', 'object_id').distinct()
+    for name, object_id in entries.iterator():
+        section = sections.get(CHANGE_MODELS.get(name))
+        if section is not None:
+            changed[section].add(object_id)
+    return changed
+
+
+def build_manifest(full=False):
+    """
+    Build the manifest, incrementally from the last build unless `full`.
+
+    Returns:
+        dict: Pointer to the manifest: name, url, sha256, token, bytes
+            and whether the build was incremental
+    """
+    token = latest_token()
+    state = None if full else _read_state()
+    incremental = False
+
+    if state is not None:
+        try:
+            changed = _changed_pks(state['token'])
+            rows = state['rows']
+            for section, pks in changed.items():
+                fresh = load_rows(section, pks) if pks else {}
+                for pk in pks:
+                    if pk in fresh:
+                        rows[section][pk] = fresh[pk]
+                    else:
+                        rows[section].pop(pk, None)
+            incremental = True
+        except ResyncRequired:
+            state = None
+
+    if state is None:
+        rows = {section: load_rows(section) for section in SECTION_MODELS}
+
+    body = json.dumps(encode_manifest(rows, token), separators=(',', ':')).encode()
+    # mtime=0 keeps the compressed bytes, and therefore the name, a pure function of the content
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    digest = hashlib.sha256(compressed).hexdigest()
+    name = f'catalog-{digest[:16]}.json.gz'
+    if not default_storage.exists(_path(name)):
+        default_storage.save(_path(name), ContentFile(compressed))
+
+    previous = state.get('name') if state else None
+    pointer = {'name': name, 'sha256': digest, 'token': token, 'bytes': len(compressed)}
+    _write_file(STATE_NAME, json.dumps({
+        'format': MANIFEST_FORMAT,
+        'token': token,
+        'name': name,
+        'pointer': pointer,
+        'previous': previous,
+        'rows': rows,
+    }, separators=(',', ':')).encode())
+    _prune(keep={name, previous})
+    cache.set(POINTER_CACHE_KEY, pointer, timeout=None)
+    return dict(pointer, incremental=incremental)
+
+
+def _prune(keep):
+    """Delete old manifests, keeping the current and the previous one for clients mid-download."""
+    try:
+        _, files = default_storage.listdir(_directory())
+    except OSError:
+        return
+    for name in files:
+        if name.startswith('catalog-') and name.endswith('.json.gz') and name not in keep:
+            default_storage.delete(_path(name))
+
+
+def get_manifest():
+    """
+    Return the pointer to a manifest that is current with the catalog.
+
+    The manifest is rebuilt (incrementally) when the change log has moved
+    past it. Only one process rebuilds at a time; the others keep serving
+    the previous manifest until the new one is ready.
+
+    Returns:
+        dict: name, sha256, token and bytes of the current manifest
+    """
+    pointer = cache.get(POINTER_CACHE_KEY)
+    if pointer is None:
+        state = _read_state()
+        pointer = state['pointer'] if state else None
+
+    if pointer is None or pointer['token'] < latest_token():
+        if cache.add(BUILD_LOCK_KEY, True, timeout=300):
+            try:
+                pointer = build_manifest()
+                pointer.pop('incremental')
+            finally:
+                cache.delete(BUILD_LOCK_KEY)
+        elif pointer is None:
+            # First build is running elsewhere; build our own copy rather than fail
+            pointer = build_manifest()
+            pointer.pop('incremental')
+    return pointer
+
+
+def open_manifest(name):
+    """
+    Open a manifest file by name.
+
+    Raises:
+        FileNotFoundError: If the name is not a manifest or no longer exists
+    """
+    if not (name.startswith('catalog-') and name.endswith('.json.gz')) or '/' in name:
+        raise FileNotFoundError(name)
+    if not default_storage.exists(_path(name)):
+        raise FileNotFoundError(name)
+    return default_storage.open(_path(name))
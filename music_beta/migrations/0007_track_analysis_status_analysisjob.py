@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_beta', '0006_user_is_active_user_last_login_user_user_type_cart_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='analysis_status',
+            field=models.CharField(blank=True, choices=[('', 'Not analyzed'), ('pending', 'Analysis pending'), ('done', 'Analyzed'), ('failed', 'Analysis failed')], default='', help_text='State of the background audio analysis', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_jobs', to='music_beta.track')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at'], name='analysisjob_status_avail_idx')],
+            },
+        ),
+    ]
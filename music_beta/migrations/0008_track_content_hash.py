@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:40
+
+import music_beta.fields
+import music_beta.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_beta', '0007_track_analysis_status_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='SHA-256 of the audio file', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='track',
+            name='audio_file',
+            field=music_beta.fields.HashedFileField(blank=True, hash_field='content_hash', help_text='Audio file', null=True, upload_to=music_beta.models.track_audio_path),
+        ),
+    ]
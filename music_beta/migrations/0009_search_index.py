@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:05
+
+from django.db import DatabaseError, migrations
+
+# Frozen copies of music_beta/search.py as of this migration
+FTS_TABLE = 'music_beta_searchindex'
+SEARCH_DOCUMENTS = {
+    'artist': ('Artist', 'name', 1),
+    'album': ('Album', 'title', 2),
+    'track': ('Track', 'title', 3),
+}
+KIND_CODES = 4
+
+
+def create_search_index(apps, schema_editor):
+    """Create the FTS5 search table (SQLite only) and index the existing catalog."""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                f"USING fts5(kind UNINDEXED, text, tokenize='trigram')"
+            )
+    except DatabaseError:
+        # SQLite without FTS5 or older than 3.34 (no trigram tokenizer)
+        return
+
+    with connection.cursor() as cursor:
+        for kind, (model_name, field, code) in SEARCH_DOCUMENTS.items():
+            model = apps.get_model('music_beta', model_name)
+            for object_id, text in model.objects.values_list('id', field).iterator():
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, kind, text) VALUES (%s, %s, %s)",
+                    [object_id * KIND_CODES + code, kind, text or ''],
+                )
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_beta', '0008_track_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_beta', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingWindow',
+            fields=[
+                ('name', models.CharField(max_length=8, primary_key=True, serialize=False)),
+                ('reference', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('track', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='music_beta.track')),
+                ('score_1h', models.FloatField(default=0)),
+                ('score_24h', models.FloatField(default=0)),
+                ('score_7d', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score_1h'], name='trending_score_1h_idx'), models.Index(fields=['-score_24h'], name='trending_score_24h_idx'), models.Index(fields=['-score_7d'], name='trending_score_7d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_beta', '0012_catalogchange_catalogchangecompaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='waveform',
+            field=models.BinaryField(blank=True, help_text='Packed min/max waveform peaks', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_beta', '0013_track_waveform'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, help_text='Bitrates in kbps of the HLS renditions'),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='stage',
+            field=models.CharField(choices=[('analysis', 'Analysis'), ('transcode', 'Transcode')], default='analysis', max_length=10),
+        ),
+    ]
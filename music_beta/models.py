@@ -3,9 +3,13 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.urls import reverse
 import os
 import uuid
 
+from .fields import HashedFileField
+from .images import image_set, is_local, placeholder_set
+
 
 def artist_image_path(instance, filename):
     """
@@ -92,8 +96,10 @@ class Genre(models.Model):
 
     Fields:
         name (str): The genre name (e.g. Rock, Jazz, Hip Hop).
+        updated_at (datetime): When the genre was last changed.
     """
     name = models.CharField(max_length=200, help_text='Enter a music genre (e.g. Rock, Jazz, Hip Hop)')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     objects = None  # Placeholder - consider Django's default manager or custom managers as needed
 
     def __str__(self):
@@ -108,30 +114,39 @@ class Artist(models.Model):
         name (str): Artist's name.
         bio (str): Short biography about the artist.
         image (file): Image file representing the artist.
+        updated_at (datetime): When the artist was last changed.
     """
     name = models.CharField(max_length=200, help_text='Enter the artist name')
     bio = models.TextField(max_length=1000, help_text='Enter a brief bio of the artist', blank=True)
     image = models.FileField(upload_to=artist_image_path, help_text='Artist image', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     @property
     def image_url(self):
         """
         Returns the URL for the artist image.
-        If no image is set or accessible, returns a fallback placeholder image URL.
+        If no image is set or accessible, returns a local placeholder image URL.
 
         Returns:
-            str: URL to the artist image or a fallback image.
+            str: URL to the artist image or a placeholder image.
         """
-        if self.image and hasattr(self.image, 'url'):
+        if is_local(self.image):
             try:
-                # Access URL to ensure file exists
-                _ = self.image.url
                 return self.image.url
             except Exception:
                 # Fall back to placeholder if image access fails
                 pass
-        # Fallback placeholder URL with random image keyed by artist id
-        return f'https://picsum.photos/300?random={self.id}'
+        return placeholder_set(f'artist-{self.id}').src
+
+    @property
+    def image_set(self):
+        """
+        Returns the resized derivatives of the artist image for src/srcset.
+
+        Returns:
+            ImageSet: Derivatives of the image, or a placeholder.
+        """
+        return image_set(self.image, f'artist-{self.id}')
 
     def __str__(self):
         return self.name
@@ -147,6 +162,7 @@ class Album(models.Model):
         genre (ManyToMany): Genre(s) this album belongs to.
         release_date (date): Date of album release.
         cover_image (file): Cover image for the album.
+        updated_at (datetime): When the album was last changed.
     """
     title = models.CharField(max_length=200, help_text='Enter the album title')
     artist = models.ForeignKey(Artist, on_delete=models.CASCADE, related_name='albums')
@@ -154,6 +170,7 @@ class Album(models.Model):
     release_date = models.DateField(null=True, blank=True)
     cover_image = models.FileField(upload_to=album_cover_path, help_text='Album cover image', blank=True, null=True)
     copyright = models.ForeignKey('Copyright', on_delete=models.SET_NULL, null=True, blank=True, related_name='albums')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
 
 
@@ -161,19 +178,27 @@ class Album(models.Model):
     def cover_image_url(self):
         """
         Returns the URL for the album cover image.
-        If no image is set or accessible, returns a fallback placeholder image URL.
+        If no image is set or accessible, returns a local placeholder image URL.
 
         Returns:
-            str: URL to the album cover image or a fallback image.
+            str: URL to the album cover image or a placeholder image.
         """
-        if self.cover_image and hasattr(self.cover_image, 'url'):
+        if is_local(self.cover_image):
             try:
-                _ = self.cover_image.url
                 return self.cover_image.url
             except Exception:
-                # TODO: Upload default fallback images for album covers
                 pass
-        return f'https://picsum.photos/300?random={self.id}'
+        return placeholder_set(f'album-{self.id}').src
+
+    @property
+    def cover_image_set(self):
+        """
+        Returns the resized derivatives of the album cover for src/srcset.
+
+        Returns:
+            ImageSet: Derivatives of the cover image, or a placeholder.
+        """
+        return image_set(self.cover_image, f'album-{self.id}')
 
     def __str__(self):
         return self.title
@@ -188,6 +213,7 @@ class Track(models.Model):
         album (ForeignKey): Album that the track belongs to.
         artist (ForeignKey): Artist who performed the track.
         audio_file (file): Audio file associated with the track.
+        content_hash (str): SHA-256 of the audio file, computed while it is uploaded.
         duration (str): Length/duration of the track (e.g. "3:45").
         play_count (int): Total number of times the track was played.
         last_played (datetime): Last played timestamp.
@@ -200,11 +226,29 @@ class Track(models.Model):
         bpm (float): Beats per minute of the track.
         key (str): Musical key of the track.
         mood (str): Mood/emotion of the track from DEAM dataset.
+        analysis_status (str): State of the background audio analysis.
+        waveform (bytes): Min/max waveform peaks from the analysis (see utils.waveform_peaks).
+        renditions (list): Bitrates in kbps of the HLS renditions (see music_beta/transcode.py).
+        updated_at (datetime): When the track was last changed (play counts excluded).
     """
+    ANALYSIS_NONE = ''
+    ANALYSIS_PENDING = 'pending'
+    ANALYSIS_DONE = 'done'
+    ANALYSIS_FAILED = 'failed'
+    ANALYSIS_STATUS_CHOICES = [
+        (ANALYSIS_NONE, 'Not analyzed'),
+        (ANALYSIS_PENDING, 'Analysis pending'),
+        (ANALYSIS_DONE, 'Analyzed'),
+        (ANALYSIS_FAILED, 'Analysis failed'),
+    ]
+
     title = models.CharField(max_length=200, help_text='Enter the track title')
     album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name='tracks')
     artist = models.ForeignKey(Artist, on_delete=models.CASCADE, related_name='tracks')
-    audio_file = models.FileField(upload_to=track_audio_path, help_text='Audio file', blank=True, null=True)
+    audio_file = HashedFileField(upload_to=track_audio_path, hash_field='content_hash', help_text='Audio file',
+                                 blank=True, null=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False,
+                                    help_text='SHA-256 of the audio file')
     duration = models.CharField(max_length=10, help_text='Duration of the track (e.g. 3:45)', blank=True)
     play_count = models.IntegerField(default=0, help_text='Number of times the track has been played')
     last_played = models.DateTimeField(null=True, blank=True, help_text='When the track was last played')
@@ -224,14 +268,244 @@ class Track(models.Model):
     # DEAM dataset mood field
     # Placeholder for DEAM dataset integration
     mood = models.CharField(max_length=100, blank=True, null=True, help_text='Mood/emotion from DEAM dataset')
+    analysis_status = models.CharField(max_length=10, choices=ANALYSIS_STATUS_CHOICES, default=ANALYSIS_NONE,
+                                       blank=True, help_text='State of the background audio analysis')
+    waveform = models.BinaryField(null=True, blank=True, help_text='Packed min/max waveform peaks')
+    renditions = models.JSONField(default=list, blank=True, help_text='Bitrates in kbps of the HLS renditions')
 
     # legal
     copyright = models.ForeignKey('Copyright', on_delete=models.SET_NULL, null=True, blank=True, related_name='tracks')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    @property
+    def audio_url(self):
+        """
+        Returns the URL the player should load the track from.
+        Uploaded files go through the Range-capable streaming view.
+
+        Returns:
+            str: Streaming URL, the remote URL of a seeded track, or ''.
+        """
+        if is_local(self.audio_file):
+            return reverse('stream_track', args=[self.pk])
+        return self.audio_file.name if self.audio_file else ''
+
+    @property
+    def waveform_url(self):
+        """
+        Returns the URL of the waveform peaks, versioned by the audio content.
+        Only analyzed tracks have a waveform.
+
+        Returns:
+            str: Waveform URL or ''.
+        """
+        if self.analysis_status != self.ANALYSIS_DONE or not self.content_hash:
+            return ''
+        return f"{reverse('track_waveform', args=[self.pk])}?v={self.content_hash[:16]}"
+
+    @property
+    def hls_url(self):
+        """
+        Returns the URL of the HLS master playlist.
+        Only transcoded tracks have one; the others play the original.
+
+        Returns:
+            str: Master playlist URL or ''.
+        """
+        if not self.renditions:
+            return ''
+        return reverse('track_hls', args=[self.pk])
 
     def __str__(self):
         return self.title
 
 
+class AnalysisJob(models.Model):
+    """
+    A queued audio processing job for a track, processed outside the request cycle.
+
+    A job runs one stage: the analysis of an upload, or the HLS transcode
+    that is queued once the analysis has succeeded. Jobs are claimed by a worker (`manage.py process_analysis_jobs`) for a
+    visibility timeout. If the worker dies, the job becomes visible again once
+    `locked_until` has passed; failed jobs are retried with a backoff until
+    `max_attempts` is reached.
+
+    Fields:
+        track (ForeignKey): Track whose audio file should be processed.
+        stage (str): analysis or transcode.
+        status (str): queued, running, done or failed.
+        attempts (int): Number of times the job has been claimed.
+        max_attempts (int): Attempts allowed before the job is marked failed.
+        available_at (datetime): The job is not claimed before this time.
+        locked_until (datetime): End of the current worker's visibility timeout.
+        last_error (str): Error message from the last failed attempt.
+        created_at (datetime): When the job was enqueued.
+        updated_at (datetime): When the job last changed state.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    STAGE_ANALYSIS = 'analysis'
+    STAGE_TRANSCODE = 'transcode'
+    STAGE_CHOICES = [
+        (STAGE_ANALYSIS, 'Analysis'),
+        (STAGE_TRANSCODE, 'Transcode'),
+    ]
+
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name='analysis_jobs')
+    stage = models.CharField(max_length=10, choices=STAGE_CHOICES, default=STAGE_ANALYSIS)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='analysisjob_status_avail_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_stage_display()} of {self.track} ({self.get_status_display()})"
+
+
+class TrendingWindow(models.Model):
+    """
+    Reference time of one trending window's stored scores.
+
+    Scores are stored forward-decayed: a play at time t adds
+    exp((t - reference) / mean_life), so scores never have to be decayed in
+    place and all rows of a window stay comparable. When the factor grows too
+    large the window is rebased to a later reference (see music_beta/trending.py).
+
+    Fields:
+        name (str): Window name (1h, 24h or 7d).
+        reference (datetime): Time at which a play is worth exactly 1.0.
+    """
+    name = models.CharField(max_length=8, primary_key=True)
+    reference = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} (since {self.reference})"
+
+
+class TrendingScore(models.Model):
+    """
+    Exponentially decayed play scores of a track, one column per window.
+
+    Rows are created on a track's first play and deleted once the track has
+    not been played for long enough that even the slowest window forgot it.
+
+    Fields:
+        track (OneToOneField): Scored track.
+        score_1h (float): Forward-decayed score with a one hour mean life.
+        score_24h (float): Forward-decayed score with a one day mean life.
+        score_7d (float): Forward-decayed score with a one week mean life.
+    """
+    track = models.OneToOneField(Track, on_delete=models.CASCADE, primary_key=True,
+                                 related_name='trending_score')
+    score_1h = models.FloatField(default=0)
+    score_24h = models.FloatField(default=0)
+    score_7d = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score_1h'], name='trending_score_1h_idx'),
+            models.Index(fields=['-score_24h'], name='trending_score_24h_idx'),
+            models.Index(fields=['-score_7d'], name='trending_score_7d_idx'),
+        ]
+
+    def __str__(self):
+        return f"Trending score of {self.track}"
+
+
+class CatalogChange(models.Model):
+    """
+    Append-only log of changes to the catalog API models.
+
+    Rows are written by model signals (see music_beta/signals.py) and read by
+    the change feed (see music_beta/changes.py); the id doubles as the feed's
+    cursor token. Compaction deletes entries superseded by a later entry for
+    the same object, and delete entries past their retention.
+
+    Fields:
+        model (str): Changed model (genre, artist, album, track or copyright).
+        object_id (int): Primary key of the changed row.
+        action (str): upsert or delete.
+        created_at (datetime): When the change was recorded.
+    """
+    ACTION_UPSERT = 'upsert'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_UPSERT, 'Created or updated'),
+        (ACTION_DELETE, 'Deleted'),
+    ]
+
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'object_id'], name='catalogchange_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.action}"
+
+
+class CatalogChangeCompaction(models.Model):
+    """
+    Record of a change log compaction that dropped delete entries.
+
+    Clients holding a token older than the latest `horizon` may have missed a
+    delete and must resync from scratch.
+
+    Fields:
+        horizon (int): Highest CatalogChange id of a dropped delete entry.
+        removed (int): Number of entries removed by the compaction.
+        created_at (datetime): When the compaction ran.
+    """
+    horizon = models.BigIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Compaction up to {self.horizon} ({self.removed} removed)"
+
+
+class VersionCounter(models.Model):
+    """
+    Version counter shared by every process (see music_beta/catalog.py).
+
+    Bumps lock the row, so concurrent bumps from web processes and workers
+    each get their own number. Processes keep a copy in their cache for
+    VERSION_COUNTER_CACHE_TIMEOUT seconds.
+
+    Fields:
+        key (str): Name of the counter, e.g. 'catalog:version'.
+        value (int): Current version; seeded from the clock.
+        modified (datetime): Last change, used as Last-Modified by the API.
+    """
+    key = models.CharField(max_length=200, primary_key=True)
+    value = models.BigIntegerField()
+    modified = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
 class User(AbstractUser):
     """
     Custom User model that extends Django's AbstractUser.
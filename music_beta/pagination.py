@@ -0,0 +1,105 @@
+"""
+Keyset (seek) pagination for the catalog pages.
+
+Offset pagination makes the database skip every row before the page, so deep
+pages get slower as the catalog grows. A keyset page instead continues after
+the sort key of the last row it returned, which is an index seek whatever the
+page depth. The key is handed to the client as an opaque cursor.
+
+KeysetPaginator serves the HTML catalog pages; CatalogCursorPagination does
+the same for the DRF API viewsets.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+def encode_cursor(values):
+    """Encode sort key values as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by a unique, ascending sort key.
+
+    Args:
+        queryset (QuerySet): Rows to paginate
+        ordering (tuple): Field names of the sort key; the last one must be
+            unique (normally 'pk'). Values must be JSON serializable.
+        per_page (int): Rows per page
+    """
+
+    def __init__(self, queryset, ordering=('pk',), per_page=20):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def _after(self, values):
+        """Q object selecting rows whose sort key is greater than `values`."""
+        if len(values) != len(self.ordering):
+            raise ValueError("Cursor does not match the ordering")
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            equal = Q(**{name: value for name, value in zip(self.ordering[:i], values[:i])})
+            condition |= equal & Q(**{f'{field}__gt': values[i]})
+        return condition
+
+    def page(self, cursor=None):
+        """
+        Return one page of rows.
+
+        Args:
+            cursor (str): Cursor returned with the previous page, or None for
+                the first page
+
+        Returns:
+            tuple: (list of rows, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(decode_cursor(cursor)))
+
+        rows = list(queryset[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            return rows, None
+        rows = rows[:self.per_page]
+        last = rows[-1]
+        return rows, encode_cursor([getattr(last, field) for field in self.ordering])
+
+
+class CatalogCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the catalog API viewsets.
+
+    Pages are ordered by primary key, which is unique and never changes, so
+    clients can walk the whole catalog without rows being skipped or repeated
+    while it is being edited. Clients may ask for up to max_page_size rows
+    with ?page_size=.
+    """
+    ordering = 'pk'
+    page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
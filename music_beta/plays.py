@@ -0,0 +1,178 @@
+"""
+Buffered play counting.
+
+Plays are the highest-volume write in the app. Instead of rewriting the whole
+track row on every play, each process counts plays in memory and flushes them
+in one batched UPDATE:
+
+    play_count  = play_count + <plays since last flush>
+    last_played = MAX(last_played, <latest play since last flush>)
+
+The same flush feeds the trending leaderboard (see music_beta/trending.py).
+The increments use F() expressions, so concurrent flushes from several
+processes never lose updates, and SQLite takes its write lock once per batch
+instead of once per play.
+
+A flush happens on the play that fills the buffer to PLAY_COUNT_MAX_PENDING
+plays, on the first play after PLAY_COUNT_FLUSH_INTERVAL seconds, and at
+interpreter exit. A crash of the process (SIGKILL, power loss) therefore loses
+at most PLAY_COUNT_MAX_PENDING - 1 plays per process, plus any plays from a
+failed flush that are waiting to be retried. Setting
+PLAY_COUNT_MAX_PENDING to 1 writes every play through immediately.
+"""
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, DateTimeField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .catalog import bump_model_version
+from .models import Track
+from .trending import record_plays as record_trending
+
+# SQLite limits the number of bound parameters per statement
+FLUSH_BATCH_SIZE = 250
+
+
+def _max_pending():
+    return max(getattr(settings, 'PLAY_COUNT_MAX_PENDING', 100), 1)
+
+
+def _flush_interval():
+    return getattr(settings, 'PLAY_COUNT_FLUSH_INTERVAL', 5)
+
+
+class PlayBuffer:
+    """
+    Process-local buffer of plays waiting to be written to the database.
+
+    Attributes:
+        pending (dict): Maps track id to [plays, latest play timestamp]
+        pending_plays (int): Total number of buffered plays
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.pending_plays = 0
+        self.last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def record(self, track_id, played_at):
+        """
+        Buffer one play and flush the buffer if it is full or due.
+
+        Args:
+            track_id (int): Played track
+            played_at (datetime): Time of the play
+
+        Returns:
+            int: Plays of this track still buffered after the call
+        """
+        with self._lock:
+            entry = self.pending.setdefault(track_id, [0, played_at])
+            entry[0] += 1
+            entry[1] = max(entry[1], played_at)
+            self.pending_plays += 1
+            due = (self.pending_plays >= _max_pending()
+                   or time.monotonic() - self.last_flush >= _flush_interval())
+
+        if due:
+            self.flush()
+        return self.buffered(track_id)
+
+    def buffered(self, track_id):
+        """Return the number of plays of a track not yet written."""
+        with self._lock:
+            entry = self.pending.get(track_id)
+            return entry[0] if entry else 0
+
+    def _take(self):
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            self.pending_plays = 0
+            self.last_flush = time.monotonic()
+            return pending
+
+    def _restore(self, pending):
+        """Merge plays from a failed flush back into the buffer."""
+        with self._lock:
+            for track_id, (plays, played_at) in pending.items():
+                entry = self.pending.setdefault(track_id, [0, played_at])
+                entry[0] += plays
+                entry[1] = max(entry[1], played_at)
+                self.pending_plays += plays
+
+    def flush(self):
+        """
+        Write all buffered plays to the database.
+
+        If another thread is already flushing, this call returns immediately
+        and the plays are picked up by the next flush. If the write fails the
+        plays are put back into the buffer.
+
+        Returns:
+            int: Number of plays written
+        """
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            pending = self._take()
+            if not pending:
+                return 0
+            try:
+                write_plays(pending)
+            except Exception as e:
+                print(f"Error flushing play counts: {str(e)}")
+                self._restore(pending)
+                return 0
+            # Play counts are part of the track API; invalidate its ETags
+            bump_model_version(Track)
+            return sum(plays for plays, _ in pending.values())
+        finally:
+            self._flush_lock.release()
+
+
+def write_plays(pending):
+    """
+    Apply buffered plays with one UPDATE per batch of tracks and add them to
+    the trending scores, all in one transaction.
+
+    Args:
+        pending (dict): Maps track id to (plays, latest play timestamp)
+    """
+    track_ids = sorted(pending)
+    with transaction.atomic():
+        for start in range(0, len(track_ids), FLUSH_BATCH_SIZE):
+            batch = track_ids[start:start + FLUSH_BATCH_SIZE]
+            plays = Case(*[When(pk=track_id, then=Value(pending[track_id][0])) for track_id in batch],
+                         output_field=IntegerField())
+            played_at = Case(*[When(pk=track_id, then=Value(pending[track_id][1])) for track_id in batch],
+                             output_field=DateTimeField())
+            Track.objects.filter(pk__in=batch).update(
+                play_count=F('play_count') + plays,
+                last_played=Greatest(Coalesce('last_played', played_at), played_at),
+            )
+        record_trending(pending)
+
+
+_buffer = PlayBuffer()
+atexit.register(_buffer.flush)
+
+
+def record_play(track_id, played_at):
+    """Buffer a play of `track_id`; see PlayBuffer.record()."""
+    return _buffer.record(track_id, played_at)
+
+
+def buffered_plays(track_id):
+    """Return the number of plays of a track not yet written."""
+    return _buffer.buffered(track_id)
+
+
+def flush_plays():
+    """Write all plays buffered in this process to the database."""
+    return _buffer.flush()
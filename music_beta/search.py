@@ -0,0 +1,272 @@
+"""
+Catalog text search index for the search view.
+
+Artist names, album titles and track titles are indexed as documents. When the
+database is SQLite with FTS5 available, the index is an FTS5 virtual table with
+the trigram tokenizer (substring matching, like the old `__icontains` lookups,
+but answered from an index and ranked with bm25). Otherwise an in-process
+trigram index is used. Both are kept in sync by the model signals in
+music_beta/signals.py.
+"""
+import threading
+from collections import defaultdict
+
+from django.db import DatabaseError, connection
+
+from .catalog import VersionedIndex
+from .models import Album, Artist, Track
+
+FTS_TABLE = 'music_beta_searchindex'
+
+# Document kind -> (model, indexed field, code used to build unique FTS rowids)
+SEARCH_DOCUMENTS = {
+    'artist': (Artist, 'name', 1),
+    'album': (Album, 'title', 2),
+    'track': (Track, 'title', 3),
+}
+KIND_CODES = 4  # Number of rowid slots per object id
+
+
+def document_kind(model):
+    """Return the search document kind for a model class, or None."""
+    for kind, (document_model, _, _) in SEARCH_DOCUMENTS.items():
+        if model is document_model:
+            return kind
+    return None
+
+
+def create_fts_table(schema_connection):
+    """
+    Create and fill the FTS5 table, if the database supports it.
+
+    Args:
+        schema_connection: Database connection to create the table on
+
+    Returns:
+        bool: True if the table exists afterwards
+    """
+    if schema_connection.vendor != 'sqlite':
+        return False
+
+    try:
+        with schema_connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                f"USING fts5(kind UNINDEXED, text, tokenize='trigram')"
+            )
+    except DatabaseError:
+        # SQLite without FTS5 or older than 3.34 (no trigram tokenizer)
+        return False
+    return True
+
+
+def drop_fts_table(schema_connection):
+    """Drop the FTS5 table if it exists."""
+    if schema_connection.vendor == 'sqlite':
+        with schema_connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def _match_rank(text, query):
+    """Sort key for a match: exact, then prefix, then word start, then anywhere."""
+    if text == query:
+        return 0
+    if text.startswith(query):
+        return 1
+    if f' {query}' in text:
+        return 2
+    return 3
+
+
+class FTS5SearchIndex:
+    """Search index stored in an SQLite FTS5 table with the trigram tokenizer."""
+
+    def advance(self, version):
+        """The FTS5 table is shared by all processes, so it is never stale."""
+
+    def _rowid(self, kind, object_id):
+        return object_id * KIND_CODES + SEARCH_DOCUMENTS[kind][2]
+
+    def add(self, kind, object_id, text, version=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [self._rowid(kind, object_id)])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, kind, text) VALUES (%s, %s, %s)",
+                [self._rowid(kind, object_id), kind, text or ''],
+            )
+
+    def remove(self, kind, object_id, version=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [self._rowid(kind, object_id)])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        for kind, (model, field, _) in SEARCH_DOCUMENTS.items():
+            for object_id, text in model.objects.values_list('id', field).iterator():
+                self.add(kind, object_id, text)
+
+    def search(self, query, limit=20):
+        """
+        Return the ids of matching documents per kind, best match first.
+
+        Args:
+            query (str): Text to look for anywhere in the indexed fields
+            limit (int): Maximum results per kind
+
+        Returns:
+            dict: kind -> list of object ids
+        """
+        query = query.strip()
+        results = {kind: [] for kind in SEARCH_DOCUMENTS}
+        if not query:
+            return results
+
+        escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        if len(query) >= 3:
+            # Phrase query: every trigram of the query, in order
+            condition = f"{FTS_TABLE} MATCH %s"
+            param = '"{}"'.format(query.replace('"', '""'))
+            order = 'rank'
+        else:
+            # Too short for trigrams; LIKE still runs against the compact FTS table
+            condition = "text LIKE %s ESCAPE '\\'"
+            param = f'%{escaped}%'
+            order = 'length(text)'
+
+        with connection.cursor() as cursor:
+            for kind in results:
+                # Exact matches first, then prefix matches, then by relevance
+                cursor.execute(
+                    f"SELECT rowid FROM {FTS_TABLE} WHERE {condition} AND kind = %s "
+                    f"ORDER BY lower(text) = lower(%s) DESC, text LIKE %s ESCAPE '\\' DESC, {order} LIMIT %s",
+                    [param, kind, query, f'{escaped}%', limit],
+                )
+                results[kind] = [rowid // KIND_CODES for (rowid,) in cursor.fetchall()]
+        return results
+
+
+class TrigramSearchIndex(VersionedIndex):
+    """
+    In-process trigram index used when FTS5 is not available.
+
+    Each process keeps its own copy and rebuilds it when another process has
+    changed the catalog (see music_beta/catalog.py).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.documents = {}  # (kind, id) -> casefolded text
+        self.postings = defaultdict(set)  # trigram -> {(kind, id)}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def _add(self, key, text):
+        self._remove(key)
+        text = (text or '').casefold()
+        self.documents[key] = text
+        for trigram in self.trigrams(text):
+            self.postings[trigram].add(key)
+
+    def _remove(self, key):
+        text = self.documents.pop(key, None)
+        if text is None:
+            return
+        for trigram in self.trigrams(text):
+            keys = self.postings.get(trigram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[trigram]
+
+    def add(self, kind, object_id, text, version=None):
+        with self._lock:
+            self._add((kind, object_id), text)
+            if version is not None:
+                self.advance(version)
+
+    def remove(self, kind, object_id, version=None):
+        with self._lock:
+            self._remove((kind, object_id))
+            if version is not None:
+                self.advance(version)
+
+    def rebuild(self):
+        with self._lock:
+            self.documents = {}
+            self.postings = defaultdict(set)
+            for kind, (model, field, _) in SEARCH_DOCUMENTS.items():
+                for object_id, text in model.objects.values_list('id', field).iterator():
+                    self._add((kind, object_id), text)
+
+    def search(self, query, limit=20):
+        """
+        Return the ids of matching documents per kind, best match first.
+
+        Args:
+            query (str): Text to look for anywhere in the indexed fields
+            limit (int): Maximum results per kind
+
+        Returns:
+            dict: kind -> list of object ids
+        """
+        query = query.strip().casefold()
+        results = {kind: [] for kind in SEARCH_DOCUMENTS}
+        if not query:
+            return results
+
+        with self._lock:
+            self.ensure_current()
+
+            if len(query) >= 3:
+                postings = sorted((self.postings.get(t, set()) for t in self.trigrams(query)), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                candidates = self.documents.keys()
+
+            matches = [(key, self.documents[key]) for key in candidates if query in self.documents[key]]
+
+        matches.sort(key=lambda match: (_match_rank(match[1], query), len(match[1]), match[0][1]))
+        for (kind, object_id), _ in matches:
+            if len(results[kind]) < limit:
+                results[kind].append(object_id)
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """
+    Return the process-wide search index (FTS5 if the table exists).
+
+    Returns:
+        FTS5SearchIndex or TrigramSearchIndex
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if FTS_TABLE in connection.introspection.table_names():
+                    _index = FTS5SearchIndex()
+                else:
+                    _index = TrigramSearchIndex()
+    return _index
+
+
+def search_catalog(query, limit=20):
+    """
+    Search artists, albums and tracks by name/title.
+
+    Args:
+        query (str): Text to search for
+        limit (int): Maximum results per kind
+
+    Returns:
+        dict: kind ('artist', 'album', 'track') -> ranked list of object ids
+    """
+    return get_search_index().search(query, limit=limit)
@@ -4,28 +4,119 @@
 #  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
 #  Vestibulum commodo. Ut rhoncus gravida arcu.
 
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from .models import Genre, Artist, Album, Track, User, AdCampaign, Copyright, ServiceRequest
 
-class GenreSerializer(serializers.ModelSerializer):
+def requested_fields(request):
+    """
+    Return the field names requested with the `fields` query parameter.
+
+    Args:
+        request (Request): Current request, may be None
+
+    Returns:
+        set: Requested field names, or None if all fields should be returned
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that limits the output to the fields named in the
+    `fields` query parameter, e.g. ?fields=id,title,duration.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get('request'))
+        if requested is None:
+            return
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
+
+
+# Field classes whose to_representation() returns a model value of the right type unchanged
+PASSTHROUGH_FIELDS = (serializers.ReadOnlyField, serializers.CharField, serializers.IntegerField,
+                      serializers.BooleanField, serializers.FloatField)
+
+
+def _field_reader(field, model):
+    """
+    Return a function rendering `field` of an instance, equivalent to
+    field.to_representation(field.get_attribute(instance)).
+
+    Plain columns, foreign key ids and prefetched primary key lists are read
+    straight off the instance; other fields go through DRF.
+    """
+    try:
+        model_field = model._meta.get_field(field.source) if '.' not in field.source else None
+    except FieldDoesNotExist:
+        model_field = None
+
+    if model_field is not None:
+        if isinstance(field, serializers.ManyRelatedField) and isinstance(
+                field.child_relation, serializers.PrimaryKeyRelatedField) and model_field.many_to_many:
+            source = field.source
+            return lambda instance: [related.pk for related in getattr(instance, source).all()]
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and model_field.many_to_one:
+            return attrgetter(model_field.attname)
+        if type(field) in PASSTHROUGH_FIELDS and model_field.concrete and not model_field.is_relation:
+            return attrgetter(model_field.attname)
+
+    def read(instance):
+        attribute = field.get_attribute(instance)
+        return None if attribute is None else field.to_representation(attribute)
+    return read
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """
+    Read-only list serializer for list actions.
+
+    Renders rows to plain dicts with one precomputed reader per field instead
+    of running the full Serializer.to_representation() for every row. The
+    output is the same as the child serializer's.
+    """
+
+    def to_representation(self, data):
+        rows = data.all() if hasattr(data, 'all') else data
+        model = self.child.Meta.model
+        readers = [(field.field_name, _field_reader(field, model)) for field in self.child._readable_fields]
+        return [{name: read(row) for name, read in readers} for row in rows]
+
+
+class GenreSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = '__all__'
 
-class ArtistSerializer(serializers.ModelSerializer):
+class ArtistSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Artist
-        fields = ['id', 'name', 'bio', 'image', 'image_url']
+        fields = ['id', 'name', 'bio', 'image', 'image_url', 'updated_at']
 
-class AlbumSerializer(serializers.ModelSerializer):
+class AlbumSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     artist = serializers.PrimaryKeyRelatedField(queryset=Artist.objects.all())
     genre = serializers.PrimaryKeyRelatedField(many=True, queryset=Genre.objects.all())
 
     class Meta:
         model = Album
-        fields = ['id', 'title', 'artist', 'genre', 'release_date', 'cover_image', 'cover_image_url', 'copyright']
+        fields = ['id', 'title', 'artist', 'genre', 'release_date', 'cover_image', 'cover_image_url', 'copyright',
+                  'updated_at']
 
-class TrackSerializer(serializers.ModelSerializer):
+class TrackSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     album = serializers.PrimaryKeyRelatedField(queryset=Album.objects.all())
     artist = serializers.PrimaryKeyRelatedField(queryset=Artist.objects.all())
 
@@ -33,7 +124,32 @@ class TrackSerializer(serializers.ModelSerializer):
         model = Track
         fields = ['id', 'title', 'album', 'artist', 'audio_file', 'duration', 'play_count', 
                  'last_played', 'year', 'genre_tag', 'composer', 'track_number', 
-                 'bitrate', 'sample_rate', 'copyright']
+                 'bitrate', 'sample_rate', 'renditions', 'hls_url', 'copyright', 'updated_at']
+
+class GenreListSerializer(GenreSerializer):
+    """Read-only fast path of GenreSerializer for list actions."""
+    class Meta(GenreSerializer.Meta):
+        list_serializer_class = FastListSerializer
+
+class ArtistListSerializer(ArtistSerializer):
+    """Read-only fast path of ArtistSerializer for list actions."""
+    class Meta(ArtistSerializer.Meta):
+        list_serializer_class = FastListSerializer
+
+class AlbumListSerializer(AlbumSerializer):
+    """Read-only fast path of AlbumSerializer for list actions."""
+    class Meta(AlbumSerializer.Meta):
+        list_serializer_class = FastListSerializer
+
+class TrackListSerializer(TrackSerializer):
+    """Read-only fast path of TrackSerializer for list actions."""
+    class Meta(TrackSerializer.Meta):
+        list_serializer_class = FastListSerializer
+
+class TrendingEntrySerializer(serializers.Serializer):
+    """Read-only serializer for trending.TrendingEntry tuples."""
+    track = TrackSerializer(read_only=True)
+    score = serializers.FloatField(read_only=True)
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -52,12 +168,17 @@ class AdCampaignSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'video', 'video_url', 'genre', 
                  'mood', 'target_audience', 'user', 'created_at']
 
-class CopyrightSerializer(serializers.ModelSerializer):
+class CopyrightSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Copyright
         fields = ['id', 'holder', 'license_type', 'license_url', 'credits', 
                  'year', 'document', 'album', 'track']
 
+class CopyrightListSerializer(CopyrightSerializer):
+    """Read-only fast path of CopyrightSerializer for list actions."""
+    class Meta(CopyrightSerializer.Meta):
+        list_serializer_class = FastListSerializer
+
 class ServiceRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceRequest
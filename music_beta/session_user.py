@@ -0,0 +1,102 @@
+"""
+The user logged in to the session, resolved once per request.
+
+The login and signup views keep the user's id in request.session['user_id'].
+SessionUserMiddleware exposes the matching User as request.session_user,
+loaded on first access and at most once per request. Users are also cached
+for SESSION_USER_CACHE_TIMEOUT seconds, so consecutive page views don't
+query the user table again.
+
+Every cached user is stored with the version counter of its id, and saving
+or deleting the user bumps that counter (see music_beta/signals.py). An
+entry stored before a change never matches the new version, so changes
+show up on the next request without waiting for the TTL.
+
+The counters are database rows (see music_beta/catalog.py), so changes made
+in other processes (admin, shell, workers) are seen too: at once with a
+shared cache, otherwise once the cached copy of the counter expires after
+VERSION_COUNTER_CACHE_TIMEOUT seconds.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .catalog import COUNTER_CACHE_KEY, _bump_counter, _get_counter
+from .models import User
+
+SESSION_USER_KEY = 'session-user:{user_id}'
+SESSION_USER_VERSION_KEY = 'session-user:version:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'SESSION_USER_CACHE_TIMEOUT', 60)
+
+
+def load_user(user_id):
+    """
+    Return a user by id from the cache, or from the database on a miss.
+
+    Args:
+        user_id (int): Primary key of the user
+
+    Returns:
+        User: The user, or None if there is no such user
+    """
+    version_key = SESSION_USER_VERSION_KEY.format(user_id=user_id)
+    key = SESSION_USER_KEY.format(user_id=user_id)
+    counter_key = COUNTER_CACHE_KEY.format(key=version_key)
+    cached = cache.get_many([counter_key, key])
+    version = cached[counter_key][0] if counter_key in cached else _get_counter(version_key)
+    if key in cached and cached[key][0] == version:
+        return cached[key][1]
+
+    # Missing users are cached too, until a user with this id is saved
+    user = User.objects.filter(pk=user_id).first()
+    cache.set(key, (version, user), timeout=_timeout())
+    return user
+
+
+def invalidate_session_user(user_id):
+    """
+    Make cached copies of a user stale.
+
+    Args:
+        user_id (int): Primary key of the changed user
+    """
+    _bump_counter(SESSION_USER_VERSION_KEY.format(user_id=user_id))
+
+
+def get_session_user(request):
+    """
+    Return the user logged in to the request's session.
+
+    The result is memoized on the request.
+
+    Args:
+        request (HttpRequest): Current request
+
+    Returns:
+        User: The logged-in user, or None if nobody is logged in or the
+        user no longer exists
+    """
+    if not hasattr(request, '_cached_session_user'):
+        user_id = request.session.get('user_id') if hasattr(request, 'session') else None
+        request._cached_session_user = load_user(user_id) if user_id else None
+    return request._cached_session_user
+
+
+class SessionUserMiddleware:
+    """
+    Middleware setting request.session_user to the logged-in User.
+
+    The user is loaded lazily, so requests that don't use it pay nothing.
+    Like request.user, the lazy object is falsy when nobody is logged in.
+    Must come after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.session_user = SimpleLazyObject(lambda: get_session_user(request))
+        return self.get_response(request)
@@ -0,0 +1,125 @@
+"""
+Signal receivers that keep derived catalog data in sync with the models:
+version counters, search and autocomplete indexes, the change log and image
+derivatives. Also invalidates cached session users.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .autocomplete import get_autocomplete_index
+from .catalog import bump_catalog_version, bump_model_version
+from .changes import record_changes
+from .images import generate_derivatives
+from .models import Album, Artist, CatalogChange, Copyright, Genre, Track, User
+from .search import SEARCH_DOCUMENTS, document_kind, get_search_index
+from .session_user import invalidate_session_user
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=Track)
+def catalog_saved(sender, instance, raw=False, **kwargs):
+    """Bump the catalog version and refresh the indexes for a saved row."""
+    if raw:
+        return
+    bump_model_version(sender)
+    record_changes(sender, [instance.pk])
+    version = bump_catalog_version()
+
+    kind = document_kind(sender)
+    if kind is not None:
+        field = SEARCH_DOCUMENTS[kind][1]
+        get_search_index().add(kind, instance.pk, getattr(instance, field), version=version)
+    else:
+        get_search_index().advance(version)
+    get_autocomplete_index().update(instance, version=version)
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Artist)
+@receiver(post_delete, sender=Album)
+@receiver(post_delete, sender=Track)
+def catalog_deleted(sender, instance, **kwargs):
+    """Bump the catalog version and drop a deleted row from the indexes."""
+    bump_model_version(sender)
+    record_changes(sender, [instance.pk], CatalogChange.ACTION_DELETE)
+    if sender is Genre:
+        # Albums list their genre ids
+        bump_model_version(Album)
+    elif sender in (Album, Track):
+        # Copyrights referencing the row are set to NULL without signals
+        bump_model_version(Copyright)
+    version = bump_catalog_version()
+
+    kind = document_kind(sender)
+    if kind is not None:
+        get_search_index().remove(kind, instance.pk, version=version)
+    else:
+        get_search_index().advance(version)
+    get_autocomplete_index().delete(instance, version=version)
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Album)
+@receiver(pre_delete, sender=Track)
+@receiver(pre_delete, sender=Copyright)
+def catalog_deleting(sender, instance, **kwargs):
+    """
+    Log the rows a delete changes without sending signals: albums losing the
+    genre, and copyrights or tracks whose foreign key is set to NULL.
+    """
+    if sender is Genre:
+        record_changes(Album, instance.album_set.values_list('pk', flat=True))
+    elif sender is Copyright:
+        record_changes(Album, instance.albums.values_list('pk', flat=True))
+        record_changes(Track, instance.tracks.values_list('pk', flat=True))
+    else:
+        record_changes(Copyright, instance.copyrights.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Album.genre.through)
+def album_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Albums list their genre ids, so genre changes modify albums."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    bump_model_version(Album)
+    if not reverse:
+        record_changes(Album, [instance.pk])
+    elif pk_set:
+        record_changes(Album, pk_set)
+
+
+@receiver(m2m_changed, sender=Album.genre.through)
+def album_genres_clearing(sender, instance, action, reverse, **kwargs):
+    """genre.album_set.clear() does not report which albums it touches."""
+    if action == 'pre_clear' and reverse:
+        record_changes(Album, instance.album_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Copyright)
+@receiver(post_delete, sender=Copyright)
+def copyright_changed(sender, instance, raw=False, **kwargs):
+    """Bump the Copyright version and log the change."""
+    if raw:
+        return
+    bump_model_version(Copyright)
+    # Only post_save passes `created`
+    action = CatalogChange.ACTION_UPSERT if 'created' in kwargs else CatalogChange.ACTION_DELETE
+    record_changes(Copyright, [instance.pk], action)
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Album)
+def image_saved(sender, instance, raw=False, **kwargs):
+    """Generate the derivatives of a newly uploaded image; existing ones are kept."""
+    if raw:
+        return
+    generate_derivatives(instance.image if sender is Artist else instance.cover_image)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Make cached copies of the user stale (see music_beta/session_user.py)."""
+    invalidate_session_user(instance.pk)
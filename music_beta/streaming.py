@@ -0,0 +1,162 @@
+"""
+HTTP Range streaming of uploaded audio files.
+
+The audio player seeks by requesting byte ranges, so a track is served with
+`Accept-Ranges: bytes` and single `Range` requests get a 206 with just the
+requested bytes, read from a memory-mapped file. `If-Range` makes a resumed
+download start over when the file changed in between. Multiple ranges in one
+request are answered with the whole file, which RFC 9110 allows.
+
+When a reverse proxy sits in front, AUDIO_STREAM_OFFLOAD hands the transfer
+to it instead ('x-accel-redirect' for nginx, 'x-sendfile' for Apache or
+lighttpd); Django then only checks the request and sets the headers, and the
+proxy serves the bytes and handles ranges itself.
+"""
+import mimetypes
+import mmap
+import os
+import re
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+OFFLOAD_X_ACCEL_REDIRECT = 'x-accel-redirect'
+OFFLOAD_X_SENDFILE = 'x-sendfile'
+
+
+class RangeNotSatisfiable(Exception):
+    """The Range header selects no bytes of the file."""
+
+
+def parse_range(header, size):
+    """
+    Parse a Range header against a file size.
+
+    Args:
+        header (str): Value of the Range header
+        size (int): File size in bytes
+
+    Returns:
+        tuple: (first, last) byte positions, inclusive, or None if the header
+        is malformed or asks for several ranges and should be ignored
+
+    Raises:
+        RangeNotSatisfiable: If the range starts beyond the end of the file
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if last and first and int(first) > int(last):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    if first >= size:
+        raise RangeNotSatisfiable(header)
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+def _if_range_matches(request, etag, last_modified):
+    """Whether the If-Range validator, if any, still matches the file."""
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Weak ETags never match If-Range
+        return not if_range.startswith('W/') and if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and date == last_modified
+
+
+def _mapped_chunks(path, first, last):
+    """Yield bytes first..last of a file from a memory map."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(first, last + 1, STREAM_CHUNK_SIZE):
+                yield mapped[start:min(start + STREAM_CHUNK_SIZE, last + 1)]
+
+
+def _offload():
+    return getattr(settings, 'AUDIO_STREAM_OFFLOAD', None)
+
+
+def stream_file(request, field_file, etag=None):
+    """
+    Serve a stored file with Range support.
+
+    Args:
+        request (HttpRequest): Current request
+        field_file (FieldFile): File to serve
+        etag (str): Strong ETag of the content, e.g. its hash in quotes;
+            defaults to one derived from the size and modification time
+
+    Returns:
+        HttpResponse: 200, 206, 304, 412 or 416 response; a redirect if the
+        storage has no local path
+    """
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        # Remote storage serves its own ranges
+        return HttpResponseRedirect(field_file.url)
+
+    stat = os.stat(path)
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    if etag is None:
+        etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        first, last = 0, size - 1
+        status = 200
+
+        header = request.headers.get('Range')
+        if header and _offload() is None and _if_range_matches(request, etag, last_modified):
+            try:
+                selected = parse_range(header, size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                response['Accept-Ranges'] = 'bytes'
+                return response
+            if selected is not None:
+                (first, last), status = selected, 206
+
+        if _offload() == OFFLOAD_X_ACCEL_REDIRECT:
+            prefix = getattr(settings, 'AUDIO_STREAM_ACCEL_PREFIX', '/protected-media/')
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + field_file.name.lstrip('/')
+        elif _offload() == OFFLOAD_X_SENDFILE:
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        else:
+            body = _mapped_chunks(path, first, last) if size and request.method != 'HEAD' else []
+            response = StreamingHttpResponse(body, status=status, content_type=content_type)
+            response['Content-Length'] = str(last - first + 1 if size else 0)
+            if status == 206:
+                response['Content-Range'] = f'bytes {first}-{last}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Clients may reuse the response, but must revalidate it first
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -4,11 +4,25 @@
 #  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
 #  Vestibulum commodo. Ut rhoncus gravida arcu.
 
-from django.test import TestCase
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
+from .api import (
+    GenreViewSet, ArtistViewSet, AlbumViewSet, TrackViewSet, CopyrightViewSet, TrendingViewSet, ChangesViewSet,
+    ConditionalGetMixin
+)
+from .catalog import get_model_version
 from .models import Genre, Artist, Album, Track, User, Copyright, ServiceRequest, AdCampaign
+from .plays import flush_plays, record_play
+from .trending import record_plays as record_trending
 from .serializers import (
     GenreSerializer, ArtistSerializer, AlbumSerializer, TrackSerializer,
     UserSerializer, CopyrightSerializer, ServiceRequestSerializer, AdCampaignSerializer
@@ -131,4 +145,194 @@ class TrackAPITest(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.track.refresh_from_db()
-        self.assertEqual(self.track.play_count, initial_play_count + 1)
\ No newline at end of file
+        self.assertEqual(self.track.play_count, initial_play_count + 1)
+
+    def test_record_play(self):
+        """Test that a play is counted once the buffer is flushed"""
+        response = self.client.post(reverse('update_play_count', kwargs={'track_id': self.track.pk}))
+        self.assertEqual(response.json(), {'success': True, 'play_count': self.track.play_count + 1})
+        flush_plays()
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.play_count, 1)
+        self.assertIsNotNone(self.track.last_played)
+
+    def test_trending(self):
+        """Test listing trending tracks"""
+        record_trending({self.track.pk: (2, timezone.now())})
+        response = self.client.get(reverse('trending-list'), {'window': '1h'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['window'], '1h')
+        self.assertEqual(response.data['results'][0]['track'], TrackSerializer(self.track).data)
+        self.assertAlmostEqual(response.data['results'][0]['score'], 2, places=2)
+
+        response = self.client.get(reverse('trending-list'), {'window': '1y'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CatalogAPIPaginationTest(TestCase):
+    """Test cursor pagination and sparse fieldsets of the catalog viewsets"""
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.artist = Artist.objects.create(name='Test Artist')
+        rock = Genre.objects.create(name='Rock')
+        for i in range(5):
+            album = Album.objects.create(title=f'Album {i}', artist=self.artist)
+            album.genre.add(rock)
+            Track.objects.create(title=f'Track {i}', album=album, artist=self.artist, duration='3:00')
+
+    def get(self, viewset, **params):
+        request = self.factory.get('/', params)
+        return viewset.as_view({'get': 'list'})(request)
+
+    def test_cursor_pages(self):
+        """Test walking the tracks with cursors"""
+        response = self.get(TrackViewSet, page_size=2)
+        self.assertEqual([track['title'] for track in response.data['results']], ['Track 0', 'Track 1'])
+        self.assertIsNone(response.data['previous'])
+
+        titles = []
+        next_url = response.data['next']
+        while next_url:
+            cursor = parse_qs(urlparse(next_url).query)['cursor'][0]
+            response = self.get(TrackViewSet, page_size=2, cursor=cursor)
+            titles += [track['title'] for track in response.data['results']]
+            next_url = response.data['next']
+        self.assertEqual(titles, ['Track 2', 'Track 3', 'Track 4'])
+
+    def test_sparse_fieldset(self):
+        """Test that fields= limits the columns rendered and fetched"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(TrackViewSet, fields='id,title')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+        self.assertNotIn('audio_file', queries[0]['sql'])
+
+    def test_unknown_field(self):
+        """Test that unknown fields are rejected"""
+        response = self.get(TrackViewSet, fields='id,password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_many_to_many_is_prefetched(self):
+        """Test that album genres are prefetched instead of queried per album"""
+        with self.assertNumQueries(2):
+            response = self.get(AlbumViewSet, fields='id,title,genre')
+        self.assertEqual(len(response.data['results']), 5)
+
+
+class CatalogAPIQueryCountTest(TestCase):
+    """Test that each read endpoint runs a fixed number of queries whatever the page size"""
+    # Endpoint -> (view, expected queries)
+    ENDPOINTS = {
+        'genres': (GenreViewSet.as_view({'get': 'list'}), 1),
+        'artists': (ArtistViewSet.as_view({'get': 'list'}), 1),
+        # Albums, then their genre ids
+        'albums': (AlbumViewSet.as_view({'get': 'list'}), 2),
+        'tracks': (TrackViewSet.as_view({'get': 'list'}), 1),
+        'copyrights': (CopyrightViewSet.as_view({'get': 'list'}), 1),
+        # Window reference, then the scores joined with their tracks
+        'trending': (TrendingViewSet.as_view({'get': 'list'}), 2),
+        # Horizon, log entries, then one read per changed model (plus album genre ids)
+        'changes': (ChangesViewSet.as_view({'get': 'list'}), 8),
+    }
+    PAGE_SIZES = (1, 5, 20)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        genres = [Genre.objects.create(name=f'Genre {i}') for i in range(3)]
+        for i in range(20):
+            artist = Artist.objects.create(name=f'Artist {i}')
+            album = Album.objects.create(title=f'Album {i}', artist=artist)
+            album.genre.add(*genres)
+            track = Track.objects.create(title=f'Track {i}', album=album, artist=artist, duration='3:00')
+            Copyright.objects.create(license_type='CC BY', album=album, track=track)
+        record_trending({track.pk: (1, timezone.now()) for track in Track.objects.all()})
+
+    def count_queries(self, view, page_size):
+        params = {'page_size': page_size, 'limit': page_size}
+        if view.cls is ChangesViewSet:
+            # Enough log entries to include changes to every model
+            params['limit'] = page_size * 10
+        with CaptureQueriesContext(connection) as queries, override_settings(CATALOG_CHANGES_SETTLE_SECONDS=0):
+            response = view(self.factory.get('/', params))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_fixed_query_count(self):
+        """Test the query count of every endpoint at several page sizes"""
+        for endpoint, (view, expected) in self.ENDPOINTS.items():
+            for page_size in self.PAGE_SIZES:
+                with self.subTest(endpoint=endpoint, page_size=page_size):
+                    cache.clear()
+                    if issubclass(view.cls, ConditionalGetMixin):
+                        # The version counter is read from the database once per VERSION_COUNTER_CACHE_TIMEOUT
+                        get_model_version(view.cls.queryset.model)
+                    self.assertEqual(self.count_queries(view, page_size), expected)
+
+    def test_fast_list_matches_full_serializer(self):
+        """Test that the list fast path renders the same rows as the full serializers"""
+        request = self.factory.get('/', {'page_size': 5})
+        for view, serializer_class in [(GenreViewSet, GenreSerializer), (ArtistViewSet, ArtistSerializer),
+                                       (AlbumViewSet, AlbumSerializer), (TrackViewSet, TrackSerializer),
+                                       (CopyrightViewSet, CopyrightSerializer)]:
+            with self.subTest(view=view.__name__):
+                response = view.as_view({'get': 'list'})(request)
+                queryset = serializer_class.Meta.model.objects.order_by('pk')[:5]
+                expected = serializer_class(queryset, many=True, context={'request': response.renderer_context['request']}).data
+                self.assertEqual(response.data['results'], [dict(row) for row in expected])
+
+
+class CatalogAPIConditionalGetTest(TestCase):
+    """Test ETag/Last-Modified handling of the catalog viewsets"""
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.artist = Artist.objects.create(name='Test Artist')
+        self.album = Album.objects.create(title='Test Album', artist=self.artist)
+        self.track = Track.objects.create(title='Test Track', album=self.album, artist=self.artist)
+
+    def get(self, viewset, action='list', headers=None, **kwargs):
+        request = self.factory.get('/', headers=headers or {})
+        return viewset.as_view({'get': action})(request, **kwargs)
+
+    def test_not_modified_without_queries(self):
+        """Test that a matching If-None-Match gets a 304 without touching the database"""
+        response = self.get(TrackViewSet)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0), mock.patch.object(TrackSerializer, 'to_representation') as serialize:
+            response = self.get(TrackViewSet, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        serialize.assert_not_called()
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is answered from the model's last change"""
+        response = self.get(TrackViewSet, 'retrieve', pk=self.track.pk)
+        last_modified = response['Last-Modified']
+        response = self.get(TrackViewSet, 'retrieve', headers={'If-Modified-Since': last_modified}, pk=self.track.pk)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.track.save()
+        response = self.get(TrackViewSet, 'retrieve', headers={'If-Modified-Since': last_modified}, pk=self.track.pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_changes_invalidate_etag(self):
+        """Test that saves, genre changes and play counts change the ETag"""
+        etag = self.get(AlbumViewSet)['ETag']
+        self.album.genre.add(Genre.objects.create(name='Rock'))
+        self.assertEqual(self.get(AlbumViewSet, headers={'If-None-Match': etag}).status_code, status.HTTP_200_OK)
+
+        etag = self.get(TrackViewSet)['ETag']
+        with override_settings(PLAY_COUNT_MAX_PENDING=1):
+            record_play(self.track.pk, timezone.now())
+        response = self.get(TrackViewSet, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['play_count'], 1)
+
+    def test_etag_depends_on_query(self):
+        """Test that different query strings get different ETags"""
+        first = self.factory.get('/', {'fields': 'id'})
+        second = self.factory.get('/', {'fields': 'id,title'})
+        view = TrackViewSet.as_view({'get': 'list'})
+        self.assertNotEqual(view(first)['ETag'], view(second)['ETag'])
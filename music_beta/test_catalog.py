@@ -0,0 +1,86 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from . import catalog
+from .models import Album, Genre, Track, VersionCounter
+
+
+class CatalogPopulatedTest(TestCase):
+    """Test case for the cached "catalog is populated" check."""
+
+    def setUp(self):
+        """Start from an empty cache; rolled back tests leave their versions behind."""
+        cache.clear()
+        catalog._populated = (None, None)
+
+    def test_answered_from_catalog_version(self):
+        """Test that the check only queries after the catalog changed."""
+        self.assertFalse(catalog.catalog_is_populated())
+        with self.assertNumQueries(0):
+            self.assertFalse(catalog.catalog_is_populated())
+
+        Genre.objects.create(name="Rock")
+        self.assertTrue(catalog.catalog_is_populated())
+        with self.assertNumQueries(0):
+            self.assertTrue(catalog.catalog_is_populated())
+
+
+class VersionCounterTest(TestCase):
+    """Test case for the version counters kept in the database."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bumps_are_stored_in_the_database(self):
+        """Test that a bump is seen by a process that doesn't share the cache."""
+        version = catalog.get_catalog_version()
+        self.assertEqual(catalog.bump_catalog_version(), version + 1)
+        self.assertEqual(catalog.bump_catalog_version(), version + 2)
+
+        cache.clear()
+        self.assertEqual(catalog.get_catalog_version(), version + 2)
+        self.assertEqual(VersionCounter.objects.get(key=catalog.CATALOG_VERSION_KEY).value, version + 2)
+
+    def test_reads_are_served_from_the_cache(self):
+        """Test that a counter is read from the database once per timeout."""
+        catalog.get_model_version(Track)
+        with self.assertNumQueries(0):
+            catalog.get_model_version(Track)
+
+    def test_modified_moves_forward(self):
+        """Test that every bump moves the last-modified time forward by at least a second."""
+        catalog.bump_model_version(Track)
+        first = catalog.get_model_version(Track)
+        catalog.bump_model_version(Track)
+        second = catalog.get_model_version(Track)
+        self.assertEqual(second[0], first[0] + 1)
+        self.assertGreaterEqual((second[1] - first[1]).total_seconds(), 1)
+
+
+class SeedCatalogCommandTest(TestCase):
+    """Test case for the seed_catalog management command."""
+
+    def test_seeding_is_idempotent(self):
+        """Test that seeding twice creates the catalog once."""
+        call_command('seed_catalog', stdout=StringIO())
+        call_command('seed_catalog', stdout=StringIO())
+
+        self.assertEqual(Genre.objects.count(), 5)
+        self.assertEqual(Album.objects.count(), 2)
+        self.assertEqual(Track.objects.count(), 4)
+        self.assertEqual(Album.objects.get(title="Sample Album 1").genre.count(), 2)
+
+    def test_if_empty(self):
+        """Test that --if-empty leaves an existing catalog alone."""
+        Genre.objects.create(name="Ambient")
+        call_command('seed_catalog', '--if-empty', stdout=StringIO())
+        self.assertEqual(Genre.objects.count(), 1)
@@ -0,0 +1,98 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from .api import ChangesViewSet
+from .changes import compact_changes
+from .models import Album, Artist, CatalogChange, Copyright, Genre, Track
+
+
+@override_settings(CATALOG_CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedTest(TestCase):
+    """Test case for the catalog change feed."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.factory = APIRequestFactory()
+        self.artist = Artist.objects.create(name="Test Artist")
+        self.album = Album.objects.create(title="Test Album", artist=self.artist)
+        self.track = Track.objects.create(title="Test Track", album=self.album, artist=self.artist)
+
+    def get(self, **params):
+        return ChangesViewSet.as_view({'get': 'list'})(self.factory.get('/', params))
+
+    def summary(self, response):
+        return [(change['model'], change['id'], change['action']) for change in response.data['changes']]
+
+    def test_full_feed(self):
+        """Test that the feed starts with every logged row in its current state."""
+        response = self.get()
+        self.assertEqual(self.summary(response), [
+            ('artist', self.artist.pk, 'upsert'),
+            ('album', self.album.pk, 'upsert'),
+            ('track', self.track.pk, 'upsert'),
+        ])
+        self.assertEqual(response.data['changes'][2]['data']['title'], "Test Track")
+        self.assertFalse(response.data['more'])
+
+    def test_deltas_since_token(self):
+        """Test that only changes after the token are returned, latest state once per row."""
+        token = self.get().data['next']
+        self.track.title = "Renamed"
+        self.track.save()
+        self.track.save()
+        self.album.genre.add(Genre.objects.create(name="Rock"))
+
+        response = self.get(since=token)
+        self.assertEqual(self.summary(response), [
+            ('track', self.track.pk, 'upsert'),
+            ('genre', Genre.objects.get().pk, 'upsert'),
+            ('album', self.album.pk, 'upsert'),
+        ])
+        self.assertEqual(response.data['changes'][0]['data']['title'], "Renamed")
+        self.assertEqual(self.summary(self.get(since=response.data['next'])), [])
+
+    def test_deletes_and_cascades(self):
+        """Test that deletes, cascades and SET_NULL updates are logged."""
+        copyright = Copyright.objects.create(license_type="CC-BY", album=self.album)
+        token = self.get().data['next']
+        album_pk, track_pk = self.album.pk, self.track.pk
+        self.album.delete()
+
+        self.assertEqual(sorted(self.summary(self.get(since=token))), sorted([
+            ('copyright', copyright.pk, 'upsert'),
+            ('track', track_pk, 'delete'),
+            ('album', album_pk, 'delete'),
+        ]))
+        self.assertIsNone(self.get(since=token).data['changes'][0]['data']['album'])
+
+    def test_pages(self):
+        """Test that a limited page reports more entries."""
+        response = self.get(limit=2)
+        self.assertEqual(len(response.data['changes']), 2)
+        self.assertTrue(response.data['more'])
+        response = self.get(since=response.data['next'], limit=2)
+        self.assertEqual(self.summary(response), [('track', self.track.pk, 'upsert')])
+        self.assertFalse(response.data['more'])
+
+    def test_compaction(self):
+        """Test that compaction keeps the latest entry per row and expires deletes."""
+        self.track.save()
+        self.assertEqual(compact_changes(), 1)
+        self.assertEqual(CatalogChange.objects.count(), 3)
+
+        token = self.get().data['next']
+        self.track.delete()
+        compact_changes(retention=timedelta(0))
+        self.assertEqual(self.get(since=token).status_code, 410)
+        response = self.get(since=0)
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.data['resync'])
+        self.assertEqual(self.get(since=response.data['next']).status_code, 200)
@@ -0,0 +1,101 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+
+from . import images
+from .models import Album, Artist
+
+
+def png_upload(size, mode='RGBA'):
+    buffer = BytesIO()
+    images.Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile('cover.png', buffer.getvalue(), content_type='image/png')
+
+
+@unittest.skipUnless(images.PIL_AVAILABLE, 'Pillow is not installed')
+class ImageDerivativeTest(TestCase):
+    """Test case for image derivatives and placeholders."""
+
+    def setUp(self):
+        """Use a temporary media root."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+
+    def open_derivative(self, url):
+        name = url.removeprefix(default_storage.base_url)
+        return images.Image.open(default_storage.open(name))
+
+    def test_derivatives_generated_on_upload(self):
+        """Test that saving an image writes square WebP and JPEG derivatives, without upscaling"""
+        artist = Artist.objects.create(name="Test Artist", image=png_upload((400, 320)))
+        image_set = artist.image_set
+
+        self.assertEqual(set(image_set.urls['jpg']), {'list', 'card'})
+        self.assertEqual(self.open_derivative(image_set.url('list')).size, (96, 96))
+        card = self.open_derivative(image_set.url('card', 'webp'))
+        self.assertEqual((card.format, card.size), ('WEBP', (300, 300)))
+        self.assertEqual(self.open_derivative(image_set.src).format, 'JPEG')
+        # The largest derivative stands in for sizes that were skipped
+        self.assertEqual(image_set.url('hero'), image_set.url('card'))
+        self.assertRegex(image_set.srcset, r'^\S+/list\.jpg 96w, \S+/card\.jpg 300w$')
+        self.assertIn('card.webp 300w', image_set.webp_srcset)
+
+    def test_derivatives_generated_once(self):
+        """Test that existing derivatives are reused"""
+        album = Album.objects.create(title="Test Album", artist=Artist.objects.create(name="Test Artist"),
+                                     cover_image=png_upload((300, 300), 'RGB'))
+        cache.clear()
+        with mock.patch.object(images, '_write_derivatives') as write:
+            self.assertEqual(set(album.cover_image_set.urls['jpg']), {'list', 'card'})
+        write.assert_not_called()
+
+    def test_placeholder(self):
+        """Test that rows without an uploaded image get a local placeholder"""
+        artist = Artist.objects.create(name="Test Artist")
+        album = Album.objects.create(title="Test Album", artist=artist, cover_image='https://picsum.photos/300')
+
+        for image_set in (artist.image_set, album.cover_image_set):
+            self.assertTrue(image_set.src.startswith(default_storage.base_url))
+            self.assertEqual(set(image_set.urls['webp']), set(images.DERIVATIVE_SIZES))
+        self.assertEqual(artist.image_url, artist.image_set.src)
+        self.assertNotIn('picsum', album.cover_image_url)
+        self.assertEqual(self.open_derivative(artist.image_set.url('hero')).size, (1200, 1200))
+
+    def test_unreadable_upload(self):
+        """Test that an upload Pillow cannot read is served as the original"""
+        artist = Artist.objects.create(name="Test Artist",
+                                       image=SimpleUploadedFile('photo.jpg', b'not an image', content_type='image/jpeg'))
+        self.assertEqual(artist.image_set.src, artist.image.url)
+        self.assertEqual(artist.image_set.srcset, '')
+
+    def test_without_pillow(self):
+        """Test that placeholders fall back to the static SVG without Pillow"""
+        artist = Artist.objects.create(name="Test Artist")
+        with mock.patch.object(images, 'PIL_AVAILABLE', False):
+            self.assertTrue(artist.image_url.endswith(images.PLACEHOLDER_STATIC))
+
+    def test_picture_partial(self):
+        """Test that the picture include renders the WebP source and the JPEG srcset"""
+        artist = Artist.objects.create(name="Test Artist", image=png_upload((320, 320)))
+        html = render_to_string('music_beta/partials/picture.html',
+                                {'image': artist.image_set, 'alt': artist.name, 'sizes': '40px'})
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn(f'src="{artist.image_set.src}" srcset="{artist.image_set.srcset}" sizes="40px"', html)
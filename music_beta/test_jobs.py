@@ -0,0 +1,121 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import jobs
+from .transcode import TranscodeError
+from .models import Album, AnalysisJob, Artist, Track
+
+
+@override_settings(ANALYSIS_JOB_MAX_ATTEMPTS=2, ANALYSIS_JOB_RETRY_DELAY=0, AUDIO_HLS_LADDER=[])
+class AnalysisJobQueueTest(TestCase):
+    """Test case for the database-backed analysis queue."""
+
+    def setUp(self):
+        """Set up test data."""
+        artist = Artist.objects.create(name="Test Artist")
+        album = Album.objects.create(title="Test Album", artist=artist)
+        self.track = Track.objects.create(title="Test Track", album=album, artist=artist,
+                                          audio_file='tracks/test.mp3')
+
+    def test_enqueue_marks_track_pending(self):
+        """Test that enqueueing marks the track pending and reuses queued jobs."""
+        job = jobs.enqueue_analysis(self.track)
+        self.assertEqual(jobs.enqueue_analysis(self.track), job)
+
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.analysis_status, Track.ANALYSIS_PENDING)
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+
+    def test_claim_hides_job_until_visibility_timeout(self):
+        """Test that a claimed job is invisible until its lock expires."""
+        jobs.enqueue_analysis(self.track)
+
+        job = jobs.claim_next_job(visibility_timeout=60)
+        self.assertEqual(job.status, AnalysisJob.STATUS_RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(jobs.claim_next_job())
+
+        AnalysisJob.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = jobs.claim_next_job()
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
+
+    @mock.patch.object(jobs, 'extract_audio_metadata', return_value={'bpm': 128.0, 'key': 'A minor', 'bitrate': 320})
+    def test_successful_job_updates_track(self, extract):
+        """Test that a processed job writes the metadata back to the track."""
+        jobs.enqueue_analysis(self.track)
+
+        self.assertEqual(jobs.process_jobs(), 1)
+
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.bpm, 128.0)
+        self.assertEqual(self.track.key, 'A minor')
+        self.assertEqual(self.track.bitrate, 320)
+        self.assertEqual(self.track.analysis_status, Track.ANALYSIS_DONE)
+        self.assertEqual(AnalysisJob.objects.get().status, AnalysisJob.STATUS_DONE)
+
+    @mock.patch.object(jobs, 'extract_audio_metadata', side_effect=RuntimeError('decoder crashed'))
+    def test_failed_job_is_retried_then_failed(self, extract):
+        """Test that failures are retried until max_attempts is reached."""
+        jobs.enqueue_analysis(self.track)
+
+        self.assertEqual(jobs.process_jobs(), 2)
+
+        job = AnalysisJob.objects.get()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('decoder crashed', job.last_error)
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.analysis_status, Track.ANALYSIS_FAILED)
+
+    @override_settings(AUDIO_HLS_LADDER=[64, 128])
+    @mock.patch.object(jobs, 'transcode_track', return_value=[64, 128])
+    @mock.patch.object(jobs, 'extract_audio_metadata', return_value={'bitrate': 320})
+    def test_analysis_queues_transcode(self, extract, transcode_track):
+        """Test that a successful analysis queues the transcode stage, which stores the renditions."""
+        jobs.enqueue_analysis(self.track)
+
+        self.assertEqual(jobs.process_jobs(), 2)
+
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.renditions, [64, 128])
+        self.assertEqual(transcode_track.call_args.args[0].bitrate, 320)
+        self.assertEqual(
+            sorted(AnalysisJob.objects.values_list('stage', 'status')),
+            [(AnalysisJob.STAGE_ANALYSIS, AnalysisJob.STATUS_DONE),
+             (AnalysisJob.STAGE_TRANSCODE, AnalysisJob.STATUS_DONE)],
+        )
+
+    @override_settings(AUDIO_HLS_LADDER=[64, 128])
+    @mock.patch.object(jobs, 'transcode_track', side_effect=TranscodeError('ffmpeg not found'))
+    @mock.patch.object(jobs, 'extract_audio_metadata', return_value={'bpm': 128.0})
+    def test_failed_transcode_keeps_analysis(self, extract, transcode_track):
+        """Test that a failed transcode does not mark the analysis failed."""
+        jobs.enqueue_analysis(self.track)
+
+        jobs.process_jobs()
+
+        transcode_job = AnalysisJob.objects.get(stage=AnalysisJob.STAGE_TRANSCODE)
+        self.assertEqual(transcode_job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIn('ffmpeg not found', transcode_job.last_error)
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.analysis_status, Track.ANALYSIS_DONE)
+        self.assertEqual(self.track.renditions, [])
+
+    def test_reupload_clears_renditions(self):
+        """Test that enqueueing a new analysis drops the renditions of the previous file."""
+        Track.objects.filter(pk=self.track.pk).update(renditions=[64, 128])
+
+        jobs.enqueue_analysis(self.track)
+
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.renditions, [])
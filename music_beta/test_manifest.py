@@ -0,0 +1,125 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .manifest import build_manifest, get_manifest, open_manifest
+from .models import Album, Artist, Genre, Track
+
+
+class CatalogManifestTest(TestCase):
+    """Test case for the compressed catalog manifest."""
+
+    def setUp(self):
+        """Set up test data."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+
+        self.rock = Genre.objects.create(name="Rock")
+        self.pop = Genre.objects.create(name="Pop")
+        self.artist = Artist.objects.create(name="Test Artist")
+        self.album = Album.objects.create(title="Test Album", artist=self.artist, release_date=date(2024, 1, 2))
+        self.album.genre.add(self.rock, self.pop)
+        self.track = Track.objects.create(title="Test Track", album=self.album, artist=self.artist, duration="3:45")
+        Track.objects.create(title="Other Track", album=self.album, artist=self.artist, duration="3:45")
+
+    def load(self, name):
+        with open_manifest(name) as f:
+            return json.loads(gzip.decompress(f.read()))
+
+    def decode_track(self, manifest, index):
+        strings = manifest['strings']
+        _, title, album, artist, _, duration = manifest['tracks'][index]
+        album_row = manifest['albums'][album]
+        return {
+            'title': strings[title],
+            'album': strings[album_row[1]],
+            'artist': strings[manifest['artists'][artist][1]],
+            'genres': [strings[manifest['genres'][genre][1]] for genre in album_row[3]],
+            'duration': strings[duration],
+        }
+
+    def test_build(self):
+        """Test that the manifest interns strings and links rows by index"""
+        pointer = build_manifest(full=True)
+        self.assertFalse(pointer['incremental'])
+        self.assertRegex(pointer['name'], r'^catalog-[0-9a-f]{16}\.json\.gz$')
+        self.assertTrue(pointer['sha256'].startswith(pointer['name'][8:24]))
+
+        manifest = self.load(pointer['name'])
+        self.assertEqual(manifest['token'], pointer['token'])
+        self.assertEqual(len(manifest['strings']), len(set(manifest['strings'])))
+        self.assertEqual(self.decode_track(manifest, 0), {
+            'title': "Test Track", 'album': "Test Album", 'artist': "Test Artist",
+            'genres': ["Rock", "Pop"], 'duration': "3:45",
+        })
+        self.assertEqual(manifest['strings'][manifest['albums'][0][5]], "2024-01-02")
+
+    def test_same_content_same_name(self):
+        """Test that rebuilding an unchanged catalog produces the same file"""
+        first = build_manifest(full=True)
+        second = build_manifest()
+        self.assertTrue(second['incremental'])
+        self.assertEqual(first['name'], second['name'])
+
+    def test_incremental_build(self):
+        """Test that changes since the last build are applied incrementally"""
+        first = build_manifest(full=True)
+        self.track.title = "Renamed Track"
+        self.track.save()
+        Genre.objects.create(name="Jazz")
+        self.pop.delete()
+
+        with self.assertNumQueries(8):
+            # Token, horizon check, change log, then only the changed rows: genres, albums and their genres, tracks
+            second = build_manifest()
+        self.assertTrue(second['incremental'])
+        self.assertNotEqual(first['name'], second['name'])
+        self.assertEqual(self.load(second['name']), self.load(build_manifest(full=True)['name']))
+
+        manifest = self.load(second['name'])
+        self.assertEqual(self.decode_track(manifest, 0)['title'], "Renamed Track")
+        self.assertEqual(self.decode_track(manifest, 0)['genres'], ["Rock"])
+        self.assertEqual([manifest['strings'][name] for _, name in manifest['genres']], ["Rock", "Jazz"])
+
+    def test_old_manifests_pruned(self):
+        """Test that only the current and previous manifests are kept"""
+        names = []
+        for title in ("One", "Two", "Three"):
+            self.track.title = title
+            self.track.save()
+            names.append(build_manifest()['name'])
+        with self.assertRaises(FileNotFoundError):
+            open_manifest(names[0])
+        open_manifest(names[1]).close()
+        open_manifest(names[2]).close()
+
+    def test_get_manifest_rebuilds_when_stale(self):
+        """Test that the pointer is rebuilt only after the catalog changes"""
+        first = get_manifest()
+        self.assertEqual(get_manifest(), first)
+        Artist.objects.create(name="New Artist")
+        second = get_manifest()
+        self.assertGreater(second['token'], first['token'])
+        self.assertIn("New Artist", self.load(second['name'])['strings'])
+
+    def test_open_manifest_rejects_other_names(self):
+        """Test that only manifest files can be opened"""
+        build_manifest()
+        for name in ("catalog-state.json", "../settings.py", "x/catalog-0.json.gz"):
+            with self.assertRaises(FileNotFoundError):
+                open_manifest(name)
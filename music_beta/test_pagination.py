@@ -0,0 +1,94 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Album, Artist, Genre, Track
+from .pagination import KeysetPaginator, encode_cursor
+
+
+class KeysetPaginatorTest(TestCase):
+    """Test case for keyset pagination."""
+
+    def setUp(self):
+        """Set up test data."""
+        for name in ["Delta", "Alpha", "Charlie", "Alpha", "Bravo"]:
+            Artist.objects.create(name=name)
+
+    def test_pages_cover_every_row_once(self):
+        """Test that following the cursors returns every row exactly once, in order."""
+        paginator = KeysetPaginator(Artist.objects.all(), ordering=('name', 'pk'), per_page=2)
+        seen, cursor = [], None
+        while True:
+            rows, cursor = paginator.page(cursor)
+            seen.extend(rows)
+            if cursor is None:
+                break
+
+        self.assertEqual([artist.name for artist in seen], ["Alpha", "Alpha", "Bravo", "Charlie", "Delta"])
+        self.assertEqual(len({artist.pk for artist in seen}), 5)
+
+    def test_last_page_has_no_cursor(self):
+        """Test that a page that reaches the end returns no cursor."""
+        rows, cursor = KeysetPaginator(Artist.objects.all(), per_page=5).page()
+        self.assertEqual(len(rows), 5)
+        self.assertIsNone(cursor)
+
+    def test_page_is_one_query(self):
+        """Test that a page is fetched with a single query."""
+        paginator = KeysetPaginator(Artist.objects.all(), per_page=2)
+        _, cursor = paginator.page()
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    def test_invalid_cursor(self):
+        """Test that malformed cursors are rejected."""
+        paginator = KeysetPaginator(Artist.objects.all(), ordering=('name', 'pk'))
+        for cursor in ["not base64!", encode_cursor({'pk': 1}), encode_cursor([1])]:
+            with self.assertRaises(ValueError):
+                paginator.page(cursor)
+
+
+class MusicPlatformPaginationTest(TestCase):
+    """Test case for the paginated music platform page."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.genre = Genre.objects.create(name="Rock")
+        self.artist = Artist.objects.create(name="Test Artist")
+        self.album = Album.objects.create(title="Test Album", artist=self.artist)
+        self.album.genre.add(self.genre)
+        for i in range(30):
+            Track.objects.create(title=f"Track {i}", album=self.album, artist=self.artist)
+
+    def test_first_render_is_one_page(self):
+        """Test that the page renders only the first page of tracks."""
+        response = self.client.get(reverse('music_platform'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tracks']), 25)
+        self.assertIsNotNone(response.context['tracks_next'])
+        self.assertContains(response, 'class="btn btn-outline-primary btn-sm load-more"', count=1)
+
+    def test_load_more(self):
+        """Test that the load more endpoint renders the next page."""
+        cursor = self.client.get(reverse('music_platform')).context['tracks_next']
+        response = self.client.get(reverse('music_platform_more', args=['tracks']),
+                                   {'after': cursor, 'offset': 25})
+        data = response.json()
+
+        self.assertTrue(data['success'])
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['html'].count('class="track-row"'), 5)
+        self.assertIn('<th scope="row">26</th>', data['html'])
+
+    def test_load_more_rejects_bad_input(self):
+        """Test that unknown sections and malformed cursors are rejected."""
+        response = self.client.get(reverse('music_platform_more', args=['users']))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'success': False, 'message': 'Unknown section: users'})
+        response = self.client.get(reverse('music_platform_more', args=['tracks']), {'after': '%%%'})
+        self.assertEqual(response.status_code, 400)
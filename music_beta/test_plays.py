@@ -0,0 +1,89 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import plays
+from .models import Album, Artist, Track
+
+
+@override_settings(PLAY_COUNT_MAX_PENDING=5, PLAY_COUNT_FLUSH_INTERVAL=3600)
+class PlayBufferTest(TestCase):
+    """Test case for buffered play counting."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.buffer = plays.PlayBuffer()
+        patcher = mock.patch.object(plays, '_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.artist = Artist.objects.create(name="Test Artist")
+        self.album = Album.objects.create(title="Test Album", artist=self.artist)
+        self.track = Track.objects.create(title="Test Track", album=self.album, artist=self.artist)
+        self.other = Track.objects.create(title="Other Track", album=self.album, artist=self.artist,
+                                          play_count=10)
+        self.now = timezone.now()
+
+    def test_plays_are_buffered_until_the_batch_is_full(self):
+        """Test that nothing is written before the buffer fills up."""
+        for i in range(4):
+            plays.record_play(self.track.pk, self.now)
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.play_count, 0)
+        self.assertEqual(plays.buffered_plays(self.track.pk), 4)
+
+        self.assertEqual(plays.record_play(self.other.pk, self.now), 0)
+        self.track.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.track.play_count, 4)
+        self.assertEqual(self.other.play_count, 11)
+
+    @override_settings(PLAY_COUNT_FLUSH_INTERVAL=0)
+    def test_flush_interval(self):
+        """Test that a play after the flush interval writes through."""
+        plays.record_play(self.track.pk, self.now)
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.play_count, 1)
+
+    def test_flush_is_batched_and_keeps_latest_timestamp(self):
+        """Test that a flush does not query per track and keeps the latest play time."""
+        plays.record_play(self.track.pk, self.now)
+        plays.flush_plays()
+        plays.record_play(self.track.pk, self.now)
+        with CaptureQueriesContext(connection) as single:
+            plays.flush_plays()
+
+        earlier = self.now - timedelta(minutes=5)
+        Track.objects.filter(pk=self.other.pk).update(last_played=self.now + timedelta(days=1))
+        plays.record_play(self.track.pk, self.now)
+        plays.record_play(self.track.pk, earlier)
+        plays.record_play(self.other.pk, earlier)
+        with self.assertNumQueries(len(single)):
+            self.assertEqual(plays.flush_plays(), 3)
+
+        self.track.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.track.play_count, 4)
+        self.assertEqual(self.track.last_played, self.now)
+        self.assertEqual(self.other.last_played, self.now + timedelta(days=1))
+
+    def test_failed_flush_keeps_plays(self):
+        """Test that plays survive a failed write and are retried."""
+        plays.record_play(self.track.pk, self.now)
+        with mock.patch.object(plays, 'write_plays', side_effect=RuntimeError("database is locked")):
+            self.assertEqual(plays.flush_plays(), 0)
+        self.assertEqual(plays.buffered_plays(self.track.pk), 1)
+
+        plays.flush_plays()
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.play_count, 1)
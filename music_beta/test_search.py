@@ -0,0 +1,159 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from . import autocomplete, catalog, changes, search
+from .models import Album, Artist, CatalogChange, CatalogChangeCompaction, Track
+
+
+class SearchIndexTestMixin:
+    """Shared tests for both search index backends."""
+
+    def make_index(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        """Set up test data."""
+        self.index = self.make_index()
+        patcher = mock.patch.object(search, '_index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.beatles = Artist.objects.create(name="The Beatles")
+        self.beat = Artist.objects.create(name="Beat Happening")
+        self.album = Album.objects.create(title="Abbey Road", artist=self.beatles)
+        self.track = Track.objects.create(title="Come Together", album=self.album, artist=self.beatles)
+
+    def test_substring_match(self):
+        """Test that any substring of a name matches, like icontains."""
+        results = search.search_catalog('eatle')
+        self.assertEqual(results['artist'], [self.beatles.id])
+        self.assertEqual(results['album'], [])
+
+    def test_ranking_prefers_prefix_matches(self):
+        """Test that names starting with the query rank first."""
+        self.assertEqual(search.search_catalog('beat')['artist'][0], self.beat.id)
+
+    def test_case_insensitive_and_short_queries(self):
+        """Test that matching ignores case and works for short queries."""
+        self.assertEqual(search.search_catalog('ROAD')['album'], [self.album.id])
+        self.assertEqual(search.search_catalog('to')['track'], [self.track.id])
+
+    def test_index_follows_model_changes(self):
+        """Test that saves and deletes update the index through signals."""
+        self.track.title = "Something"
+        self.track.save()
+        self.assertEqual(search.search_catalog('together')['track'], [])
+        self.assertEqual(search.search_catalog('somethin')['track'], [self.track.id])
+
+        self.beat.delete()
+        self.assertEqual(search.search_catalog('beat')['artist'], [self.beatles.id])
+
+
+class TrigramSearchIndexTest(SearchIndexTestMixin, TestCase):
+    """Test case for the in-process trigram index."""
+
+    def make_index(self):
+        return search.TrigramSearchIndex()
+
+
+class FTS5SearchIndexTest(SearchIndexTestMixin, TestCase):
+    """Test case for the SQLite FTS5 index."""
+
+    def make_index(self):
+        if not search.create_fts_table(connection):
+            self.skipTest('SQLite FTS5 trigram tokenizer is not available')
+        return search.FTS5SearchIndex()
+
+
+class AutocompleteIndexTest(TestCase):
+    """Test case for the in-memory autocomplete prefix index."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.index = autocomplete.PrefixIndex()
+        patcher = mock.patch.object(autocomplete, '_index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.artist = Artist.objects.create(name="Pink Floyd")
+        self.album = Album.objects.create(title="The Dark Side of the Moon", artist=self.artist)
+        self.track = Track.objects.create(title="Money", album=self.album, artist=self.artist,
+                                          composer="Roger Waters")
+
+    def labels(self, prefix):
+        return [suggestion['label'] for suggestion in self.index.suggest(prefix)]
+
+    def test_prefix_and_word_prefix_matches(self):
+        """Test that names match on their start and on the start of any word."""
+        self.assertEqual(self.labels('pink'), ["Pink Floyd"])
+        self.assertEqual(self.labels('DARK s'), ["The Dark Side of the Moon"])
+        self.assertEqual(self.labels('mo'), ["Money", "The Dark Side of the Moon"])
+        self.assertEqual(self.index.suggest('waters'), [{'kind': 'composer', 'id': 'roger waters', 'label': "Roger Waters"}])
+
+    def test_incremental_updates_without_rebuild(self):
+        """Test that local saves and deletes are applied without a rebuild."""
+        self.index.suggest('pink')
+        with mock.patch.object(self.index, 'rebuild') as rebuild:
+            self.track.composer = "David Gilmour"
+            self.track.save()
+            Artist.objects.create(name="Pink Martini")
+
+            self.assertEqual(self.labels('pink'), ["Pink Floyd", "Pink Martini"])
+            self.assertEqual(self.labels('roger'), [])
+            self.assertEqual(self.labels('gilm'), ["David Gilmour"])
+
+            self.album.delete()
+            self.assertEqual(self.labels('dark'), [])
+            self.assertEqual(self.labels('gilm'), [])
+            rebuild.assert_not_called()
+
+    @override_settings(CATALOG_CHANGES_SETTLE_SECONDS=0)
+    def test_catches_up_with_another_process(self):
+        """Test that changes logged by another process are applied without a rebuild."""
+        self.index.suggest('pink')
+        # As another process would: the rows change, the log records it and the version moves on
+        Artist.objects.filter(pk=self.artist.pk).update(name="Floyd")
+        Track.objects.filter(pk=self.track.pk).delete()
+        changes.record_changes(Artist, [self.artist.pk])
+        changes.record_changes(Track, [self.track.pk], CatalogChange.ACTION_DELETE)
+        catalog.bump_catalog_version()
+
+        with mock.patch.object(self.index, 'rebuild') as rebuild:
+            self.assertEqual(self.labels('pink'), [])
+            self.assertEqual(self.labels('floyd'), ["Floyd"])
+            self.assertEqual(self.labels('money'), [])
+            self.assertEqual(self.labels('roger'), [])
+            rebuild.assert_not_called()
+
+    @override_settings(CATALOG_CHANGES_SETTLE_SECONDS=0)
+    def test_rebuilds_after_compaction(self):
+        """Test that a token older than the compaction horizon triggers a rebuild."""
+        self.index.suggest('pink')
+        Artist.objects.filter(pk=self.artist.pk).update(name="Floyd")
+        CatalogChangeCompaction.objects.create(horizon=self.index.token + 1000)
+        catalog.bump_catalog_version()
+
+        self.assertEqual(self.labels('pink'), [])
+        self.assertEqual(self.labels('floyd'), ["Floyd"])
+        self.assertEqual(self.index.token, changes.latest_token())
+
+    def test_lookup_is_fast(self):
+        """Test that a lookup over a large catalog takes well under a millisecond."""
+        for i in range(20000):
+            self.index._add('track', 100000 + i, f"Track number {i} of the catalog")
+        self.index.entries.sort()
+        self.index.suggest('track')
+
+        started = time.perf_counter()
+        for _ in range(100):
+            self.index.suggest('track number 1999')
+        self.assertLess((time.perf_counter() - started) / 100, 0.001)
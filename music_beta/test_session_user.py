@@ -0,0 +1,76 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from .models import User
+from .session_user import SessionUserMiddleware, get_session_user, load_user
+
+
+class SessionUserTest(TestCase):
+    """Test case for the cached session user."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = User.objects.create(username='client', email='client@example.com', user_type='client')
+
+    def request(self, user_id=None):
+        request = self.factory.get('/')
+        request.session = SessionStore()
+        if user_id is not None:
+            request.session['user_id'] = user_id
+        return request
+
+    def test_cache_hit_skips_the_query(self):
+        """Test that only the first load of a user queries the database"""
+        with self.assertNumQueries(1):
+            self.assertEqual(load_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(load_user(self.user.pk).username, 'client')
+
+    def test_memoized_per_request(self):
+        """Test that the user is resolved once per request"""
+        request = self.request(self.user.pk)
+        self.assertIs(get_session_user(request), get_session_user(request))
+
+    def test_save_invalidates(self):
+        """Test that saving or deleting a user makes the cached copy stale"""
+        load_user(self.user.pk)
+        self.user.user_type = 'artist'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(load_user(self.user.pk).user_type, 'artist')
+
+        user_id = self.user.pk
+        self.user.delete()
+        self.assertIsNone(load_user(user_id))
+
+    def test_missing_user(self):
+        """Test that unknown ids and anonymous sessions give None"""
+        self.assertIsNone(get_session_user(self.request(self.user.pk + 100)))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_session_user(self.request()))
+
+    def test_middleware(self):
+        """Test that the middleware loads the user lazily"""
+        seen = {}
+
+        def view(request):
+            seen['user'] = request.session_user
+            return HttpResponse()
+
+        middleware = SessionUserMiddleware(view)
+        with self.assertNumQueries(0):
+            middleware(self.request())
+        self.assertFalse(seen['user'])
+
+        middleware(self.request(self.user.pk))
+        self.assertEqual(seen['user'].username, 'client')
@@ -0,0 +1,131 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .models import Album, Artist, Track
+from .streaming import RangeNotSatisfiable, parse_range, stream_file
+
+AUDIO = bytes(range(256)) * 1024
+
+
+class ParseRangeTest(TestCase):
+    """Test case for Range header parsing."""
+
+    def test_ranges(self):
+        """Test closed, open and suffix ranges"""
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=100-', 1000), (100, 999))
+        self.assertEqual(parse_range('bytes=-50', 1000), (950, 999))
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_ignored(self):
+        """Test that malformed and multiple ranges are ignored"""
+        for header in ('bytes=5-2', 'bytes=0-1,5-6', 'items=0-1', 'bytes=-'):
+            self.assertIsNone(parse_range(header, 1000))
+
+    def test_not_satisfiable(self):
+        """Test ranges that select no bytes"""
+        for header, size in (('bytes=1000-', 1000), ('bytes=-0', 1000), ('bytes=0-', 0)):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, size)
+
+
+class StreamFileTest(TestCase):
+    """Test case for Range streaming of track audio."""
+
+    def setUp(self):
+        """Upload a track to a temporary media root."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.factory = RequestFactory()
+        artist = Artist.objects.create(name="Test Artist")
+        album = Album.objects.create(title="Test Album", artist=artist)
+        self.track = Track.objects.create(title="Test Track", album=album, artist=artist,
+                                          audio_file=SimpleUploadedFile('song.mp3', AUDIO))
+        self.etag = f'"{self.track.content_hash}"'
+
+    def get(self, method='get', **headers):
+        request = getattr(self.factory, method)('/', headers=headers)
+        return stream_file(request, self.track.audio_file, etag=self.etag)
+
+    def test_full(self):
+        """Test that a request without Range gets the whole file"""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), AUDIO)
+        self.assertEqual(response['Content-Length'], str(len(AUDIO)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'audio/mpeg')
+        self.assertEqual(response['ETag'], self.etag)
+
+    def test_range(self):
+        """Test that a Range request gets 206 with only the requested bytes"""
+        response = self.get(Range='bytes=70000-200000')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), AUDIO[70000:200001])
+        self.assertEqual(response['Content-Range'], f'bytes 70000-200000/{len(AUDIO)}')
+        self.assertEqual(response['Content-Length'], '130001')
+
+        response = self.get(Range='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), AUDIO[-10:])
+
+    def test_not_satisfiable(self):
+        """Test that a range past the end gets 416"""
+        response = self.get(Range=f'bytes={len(AUDIO)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(AUDIO)}')
+
+    def test_if_range(self):
+        """Test that a stale If-Range gets the whole file instead of the range"""
+        response = self.get(Range='bytes=0-9', **{'If-Range': self.etag})
+        self.assertEqual(response.status_code, 206)
+
+        response = self.get(Range='bytes=0-9', **{'If-Range': '"changed"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(AUDIO)))
+
+        last_modified = self.get()['Last-Modified']
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': last_modified}).status_code, 206)
+
+    def test_not_modified(self):
+        """Test that a current If-None-Match gets 304"""
+        self.assertEqual(self.get(**{'If-None-Match': self.etag}).status_code, 304)
+
+    def test_head(self):
+        """Test that HEAD gets the headers without a body"""
+        response = self.get('head', Range='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    @override_settings(AUDIO_STREAM_OFFLOAD='x-accel-redirect', AUDIO_STREAM_ACCEL_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        """Test that nginx offload hands the file and the Range handling to the proxy"""
+        response = self.get(Range='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.track.audio_file.name}')
+        self.assertEqual(response.content, b'')
+
+    @override_settings(AUDIO_STREAM_OFFLOAD='x-sendfile')
+    def test_x_sendfile(self):
+        """Test that sendfile offload passes the file path"""
+        self.assertEqual(self.get()['X-Sendfile'], self.track.audio_file.path)
+
+    def test_audio_url(self):
+        """Test that uploaded tracks are played through the streaming view"""
+        self.assertEqual(self.track.audio_url, reverse('stream_track', args=[self.track.pk]))
+        self.assertEqual(Track(audio_file='https://example.com/song.mp3').audio_url, 'https://example.com/song.mp3')
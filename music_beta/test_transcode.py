@@ -0,0 +1,119 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import transcode
+from .models import Album, Artist, Track
+
+
+def fake_encoder(command, **kwargs):
+    """Write what ffmpeg would for every output of an encoder_command."""
+    for index, arg in enumerate(command):
+        if arg == '-hls_segment_filename':
+            directory = os.path.dirname(command[index + 1])
+            for segment in range(2):
+                with open(os.path.join(directory, f'segment{segment:05d}.ts'), 'wb') as f:
+                    f.write(b'\x47' * 188)
+            with open(command[index + 2], 'w') as f:
+                f.write('#EXTM3U\n#EXTINF:6.0,\nsegment00000.ts\n#EXTINF:2.5,\nsegment00001.ts\n#EXT-X-ENDLIST\n')
+    return subprocess.CompletedProcess(command, 0, b'', b'')
+
+
+@override_settings(AUDIO_HLS_LADDER=[256, 64, 128], AUDIO_TRANSCODER='ffmpeg')
+class TranscodeTest(TestCase):
+    """Test case for the HLS transcoding ladder."""
+
+    def setUp(self):
+        """Upload a track to a temporary media root."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        artist = Artist.objects.create(name="Test Artist")
+        album = Album.objects.create(title="Test Album", artist=artist)
+        self.track = Track.objects.create(title="Test Track", album=album, artist=artist, bitrate=192,
+                                          audio_file=SimpleUploadedFile('song.mp3', b'ID3' + b'\x00' * 1024))
+
+    def test_ladder_for(self):
+        """Test that rungs above the source bitrate are skipped, keeping at least one"""
+        self.assertEqual(transcode.ladder_for(None), [64, 128, 256])
+        self.assertEqual(transcode.ladder_for(192), [64, 128])
+        self.assertEqual(transcode.ladder_for(32), [64])
+
+    def test_encoder_command(self):
+        """Test that every rung is an output of a single decode"""
+        command = transcode.encoder_command('in.mp3', '/out', [64, 128])
+        self.assertEqual(command.count('-i'), 1)
+        self.assertEqual(command[-1], os.path.join('/out', '128k', 'index.m3u8'))
+        self.assertIn('64k', command)
+        self.assertIn(os.path.join('/out', '64k', 'index.m3u8'), command)
+
+    @mock.patch.object(transcode.shutil, 'which', return_value='/usr/bin/ffmpeg')
+    @mock.patch.object(transcode.subprocess, 'run', side_effect=fake_encoder)
+    def test_transcode_stores_ladder_once(self, run, which):
+        """Test that the renditions are stored by content hash and not encoded again"""
+        self.assertEqual(transcode.transcode_track(self.track), [64, 128])
+        for kbps in (64, 128):
+            self.assertTrue(default_storage.exists(transcode.rendition_name(self.track.content_hash, kbps)))
+            self.assertTrue(default_storage.exists(
+                transcode.rendition_name(self.track.content_hash, kbps, 'segment00001.ts')))
+        self.assertEqual(run.call_count, 1)
+
+        self.assertEqual(transcode.transcode_track(self.track), [64, 128])
+        self.assertEqual(run.call_count, 1)
+
+    @mock.patch.object(transcode.shutil, 'which', return_value='/usr/bin/ffmpeg')
+    @mock.patch.object(transcode.subprocess, 'run')
+    def test_encoder_failure(self, run, which):
+        """Test that a failing encoder raises TranscodeError and stores nothing"""
+        run.return_value = subprocess.CompletedProcess([], 1, b'', b'Invalid data found when processing input')
+        with self.assertRaisesRegex(transcode.TranscodeError, 'Invalid data'):
+            transcode.transcode_track(self.track)
+        self.assertFalse(default_storage.exists(transcode.rendition_name(self.track.content_hash, 64)))
+
+        run.side_effect = subprocess.TimeoutExpired('ffmpeg', 5)
+        with self.assertRaisesRegex(transcode.TranscodeError, 'timed out'):
+            transcode.transcode_track(self.track, timeout=5)
+
+    @override_settings(AUDIO_TRANSCODER='no-such-encoder')
+    def test_missing_encoder(self):
+        """Test that a missing encoder raises TranscodeError"""
+        with self.assertRaisesRegex(transcode.TranscodeError, 'no-such-encoder'):
+            transcode.transcode_track(self.track)
+
+    def test_remote_audio_is_skipped(self):
+        """Test that seeded tracks with remote audio have nothing to transcode"""
+        self.assertEqual(transcode.transcode_track(Track(audio_file='https://example.com/song.mp3')), [])
+
+    def test_master_playlist(self):
+        """Test the master playlist of all renditions and of a single one"""
+        self.assertIsNone(transcode.master_playlist(self.track))
+        self.assertEqual(self.track.hls_url, '')
+
+        self.track.renditions = [64, 128]
+        playlist = transcode.master_playlist(self.track)
+        self.assertTrue(playlist.startswith('#EXTM3U\n'))
+        self.assertIn('BANDWIDTH=76800,AVERAGE-BANDWIDTH=64000,CODECS="mp4a.40.2"', playlist)
+        self.assertIn(default_storage.url(transcode.rendition_name(self.track.content_hash, 128)), playlist)
+        self.assertEqual(playlist.count('#EXT-X-STREAM-INF'), 2)
+
+        single = transcode.master_playlist(self.track, kbps=64)
+        self.assertEqual(single.count('#EXT-X-STREAM-INF'), 1)
+        self.assertNotIn('/128k/', single)
+        self.assertIsNone(transcode.master_playlist(self.track, kbps=256))
+        self.assertEqual(self.track.hls_url, reverse('track_hls', args=[self.track.pk]))
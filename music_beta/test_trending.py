@@ -0,0 +1,79 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from . import trending
+from .models import Album, Artist, Track, TrendingScore, TrendingWindow
+
+
+class TrendingTest(TestCase):
+    """Test case for the time-decayed trending leaderboard."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.now = timezone.now()
+        self.artist = Artist.objects.create(name="Test Artist")
+        self.album = Album.objects.create(title="Test Album", artist=self.artist)
+        self.fresh = Track.objects.create(title="Fresh", album=self.album, artist=self.artist)
+        self.classic = Track.objects.create(title="Classic", album=self.album, artist=self.artist)
+
+    def top(self, window, at=None):
+        with mock.patch.object(trending.timezone, 'now', return_value=at or self.now):
+            return trending.top_trending(window, limit=5)
+
+    def test_windows_rank_recent_and_sustained_plays(self):
+        """Test that short windows favour recent plays and long windows sustained ones."""
+        trending.record_plays({self.classic.pk: (20, self.now - timedelta(days=2))})
+        trending.record_plays({self.fresh.pk: (3, self.now)})
+
+        self.assertEqual([entry.track for entry in self.top('1h')], [self.fresh, self.classic])
+        self.assertEqual([entry.track for entry in self.top('24h')], [self.fresh, self.classic])
+        self.assertEqual([entry.track for entry in self.top('7d')], [self.classic, self.fresh])
+
+    def test_scores_decay(self):
+        """Test that a score is the number of plays decayed by their age."""
+        trending.record_plays({self.fresh.pk: (4, self.now)})
+
+        self.assertAlmostEqual(self.top('24h')[0].score, 4)
+        self.assertAlmostEqual(self.top('24h', self.now + timedelta(hours=24))[0].score, 4 / 2.718281828, places=5)
+
+    def test_incremental_updates_accumulate(self):
+        """Test that each flush adds to the existing scores."""
+        trending.record_plays({self.fresh.pk: (1, self.now)})
+        trending.record_plays({self.fresh.pk: (2, self.now), 999999: (5, self.now)})
+
+        self.assertAlmostEqual(self.top('1h')[0].score, 3)
+        self.assertEqual(TrendingScore.objects.count(), 1)
+
+    def test_rebase_keeps_scores_and_prunes_stale_tracks(self):
+        """Test that rebasing a window preserves decayed scores and drops forgotten tracks."""
+        long_ago = self.now - timedelta(days=400)
+        trending.record_plays({self.classic.pk: (1, long_ago)})
+        trending.record_plays({self.fresh.pk: (1, self.now - timedelta(hours=40))})
+        before = self.top('24h')[0].score
+
+        trending.record_plays({self.fresh.pk: (1, self.now)})
+
+        self.assertEqual(TrendingWindow.objects.get(name='1h').reference, self.now)
+        self.assertFalse(TrendingScore.objects.filter(track=self.classic).exists())
+        self.assertAlmostEqual(self.top('24h')[0].score, before + 1)
+
+    def test_read_is_constant_queries(self):
+        """Test that reading the leaderboard does not query per track."""
+        trending.record_plays({track.pk: (1, self.now) for track in [self.fresh, self.classic]})
+        with self.assertNumQueries(2):
+            entries = self.top('24h')
+            [entry.track.artist.name for entry in entries]
+
+    def test_unknown_window(self):
+        """Test that an unknown window is rejected."""
+        with self.assertRaises(ValueError):
+            trending.top_trending('1y')
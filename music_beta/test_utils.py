@@ -0,0 +1,332 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import utils
+from .analysis_cache import AnalysisCache
+from .fields import file_sha256
+from .models import Album, Artist, Track
+
+
+def write_click_track(path, seconds=8, sr=22050, bpm=120):
+    """Write a mono WAV file with a click on every beat."""
+    import soundfile
+
+    y = np.zeros(int(seconds * sr), dtype=np.float32)
+    step = int(sr * 60 / bpm)
+    for start in range(0, len(y), step):
+        y[start:start + 200] = np.hanning(400)[200:] * 0.8
+    soundfile.write(path, y, sr)
+
+
+@unittest.skipUnless(utils.LIBROSA_AVAILABLE, 'librosa is not installed')
+@override_settings(AUDIO_ANALYSIS_CACHE_DIR=None)
+class AudioAnalysisPipelineTest(SimpleTestCase):
+    """Test case for the single-decode analysis pipeline."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'click.wav')
+        write_click_track(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_file_is_decoded_once(self):
+        """Test that every feature is computed from a single decode."""
+        with mock.patch.object(utils.librosa, 'load', wraps=utils.librosa.load) as load:
+            metadata = utils.extract_audio_metadata(self.path)
+
+        self.assertEqual(load.call_count, 1)
+        self.assertIn('bpm', metadata)
+        self.assertIn('key', metadata)
+        self.assertIn('waveform', metadata)
+        self.assertEqual(metadata['duration'], '00:08')
+
+    def test_waveform(self):
+        """Test that waveform peaks are computed from the shared decode."""
+        with self.settings(WAVEFORM_PEAKS=200, WAVEFORM_BITS=16):
+            metadata = utils.extract_audio_metadata(self.path)
+
+        track = utils.apply_audio_metadata(Track(), metadata)
+        peaks = utils.unpack_waveform(track.waveform)
+        self.assertEqual(track.waveform[0], 16)
+        self.assertEqual(peaks.shape, (200, 2))
+        self.assertAlmostEqual(peaks[:, 1].max(), 0.8, delta=0.05)
+        self.assertTrue((peaks[:, 0] <= peaks[:, 1]).all())
+
+    def test_stage_timings(self):
+        """Test that the per-stage timings are reported."""
+        timings = {}
+        utils.extract_audio_metadata(self.path, timings=timings)
+
+        for stage in ('decode', 'tempo', 'key', 'duration'):
+            self.assertIn(stage, timings)
+            self.assertGreaterEqual(timings[stage], 0)
+
+    def test_missing_file(self):
+        """Test that a missing file yields no metadata."""
+        self.assertEqual(utils.extract_audio_metadata(os.path.join(self.tmpdir, 'missing.wav')), {})
+        self.assertIsNone(utils.extract_bpm(os.path.join(self.tmpdir, 'missing.wav')))
+
+    def test_excerpt_mode_decodes_windows_only(self):
+        """Test that excerpt mode decodes a few low sample rate windows."""
+        long_path = os.path.join(self.tmpdir, 'long.wav')
+        write_click_track(long_path, seconds=120)
+
+        with self.settings(AUDIO_ANALYSIS_MODE='excerpt', AUDIO_EXCERPT_WINDOWS=3,
+                           AUDIO_EXCERPT_SECONDS=10, AUDIO_EXCERPT_SAMPLE_RATE=11025):
+            with mock.patch.object(utils.librosa, 'load', wraps=utils.librosa.load) as load:
+                features = utils.analyze_audio(long_path)
+
+        self.assertEqual(load.call_count, 3)
+        for call in load.call_args_list:
+            self.assertEqual(call.kwargs['sr'], 11025)
+            self.assertEqual(call.kwargs['duration'], 10)
+        self.assertEqual(features['duration'], '02:00')
+        self.assertAlmostEqual(features['bpm'], 120, delta=3)
+        # Windows don't cover the whole track
+        self.assertNotIn('waveform', features)
+
+    def test_excerpt_offsets(self):
+        """Test that excerpt windows are spread over the track."""
+        self.assertEqual(utils.excerpt_offsets(400, 3, 20), [90.0, 190.0, 290.0])
+        self.assertEqual(utils.excerpt_offsets(60, 3, 20), [])
+
+    def test_format_duration(self):
+        """Test that durations are formatted as MM:SS."""
+        self.assertEqual(utils.format_duration(225.7), '03:45')
+        self.assertEqual(utils.format_duration(3725), '62:05')
+
+
+class WaveformPeaksTest(SimpleTestCase):
+    """Test case for packing waveform peaks."""
+
+    def test_int8(self):
+        """Test that each bucket keeps its minimum and maximum."""
+        y = np.array([0.0, 0.5, -0.25, 1.0, -1.0, 0.1], dtype=np.float32)
+        blob = utils.waveform_peaks(y, 3)
+        self.assertEqual(len(blob), 1 + 3 * 2)
+        self.assertEqual(blob[0], 8)
+        np.testing.assert_allclose(utils.unpack_waveform(blob), [[0, 0.5], [-0.25, 1], [-1, 0.1]], atol=1 / 127)
+
+    def test_int16(self):
+        """Test that 16-bit peaks are twice the size and more precise."""
+        y = np.sin(np.linspace(0, 20, 10000)).astype(np.float32) * 0.3
+        blob = utils.waveform_peaks(y, 100, bits=16)
+        self.assertEqual(len(blob), 1 + 100 * 2 * 2)
+        self.assertAlmostEqual(utils.unpack_waveform(blob).max(), 0.3, places=3)
+
+    def test_short_and_empty(self):
+        """Test audio with fewer samples than buckets, and no samples."""
+        self.assertEqual(utils.unpack_waveform(utils.waveform_peaks(np.array([0.5, -0.5]), 1000)).shape, (2, 2))
+        self.assertIsNone(utils.waveform_peaks(np.array([]), 1000))
+
+
+@unittest.skipUnless(utils.LIBROSA_AVAILABLE, 'librosa is not installed')
+class AnalyzeLibraryCommandTest(TestCase):
+    """Test case for the analyze_library management command."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_root, 'tracks'))
+        write_click_track(os.path.join(self.media_root, 'tracks', 'click.wav'))
+        self.checkpoint = os.path.join(self.media_root, 'checkpoint.json')
+
+        artist = Artist.objects.create(name="Test Artist")
+        album = Album.objects.create(title="Test Album", artist=artist)
+        self.tracks = [
+            Track.objects.create(title=f"Track {i}", album=album, artist=artist, audio_file='tracks/click.wav')
+            for i in range(3)
+        ]
+        self.done = Track.objects.create(title="Analyzed", album=album, artist=artist,
+                                         audio_file='tracks/click.wav', bpm=90.0,
+                                         analysis_status=Track.ANALYSIS_DONE)
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+
+    def analyze(self, *args):
+        with override_settings(MEDIA_ROOT=self.media_root, AUDIO_ANALYSIS_CACHE_DIR=None):
+            call_command('analyze_library', '--workers', '2', '--batch-size', '2',
+                         '--checkpoint', self.checkpoint, *args, stdout=io.StringIO())
+
+    def test_backfills_tracks_and_skips_analyzed(self):
+        """Test that pending tracks are backfilled and analyzed tracks are skipped."""
+        self.analyze()
+
+        for track in self.tracks:
+            track.refresh_from_db()
+            self.assertEqual(track.analysis_status, Track.ANALYSIS_DONE)
+            self.assertIsNotNone(track.bpm)
+            self.assertEqual(track.duration, '00:08')
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.bpm, 90.0)
+
+    def test_resumes_from_checkpoint(self):
+        """Test that tracks before the checkpoint are not analyzed again."""
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'last_track_id': self.tracks[1].id}, f)
+
+        self.analyze()
+
+        statuses = [Track.objects.get(pk=track.pk).analysis_status for track in self.tracks]
+        self.assertEqual(statuses, [Track.ANALYSIS_NONE, Track.ANALYSIS_NONE, Track.ANALYSIS_DONE])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_second_run_starts_over(self):
+        """Test that a complete run removes its checkpoint, so the next run sees every track."""
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'last_track_id': self.tracks[2].id}, f)
+        self.analyze()
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        # A track that failed (or was re-uploaded) before the old checkpoint is picked up again
+        Track.objects.filter(pk=self.tracks[0].pk).update(analysis_status=Track.ANALYSIS_FAILED)
+        self.analyze()
+        self.assertEqual(Track.objects.get(pk=self.tracks[0].pk).analysis_status, Track.ANALYSIS_DONE)
+
+    def test_force_ignores_checkpoint_of_other_runs(self):
+        """Test that a checkpoint written without --force does not limit a --force run."""
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'last_track_id': self.done.id}, f)
+
+        self.analyze('--force')
+
+        # Hand-set values are kept, but the waveform is computed from the file
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.bpm, 90.0)
+        self.assertTrue(self.done.waveform)
+
+
+@unittest.skipUnless(utils.LIBROSA_AVAILABLE, 'librosa is not installed')
+@override_settings(AUDIO_ANALYSIS_CACHE_DIR=None, AUDIO_EXCERPT_WINDOWS=2, AUDIO_EXCERPT_SECONDS=4)
+class CompareAnalysisModesCommandTest(SimpleTestCase):
+    """Test case for the compare_analysis_modes management command."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        write_click_track(os.path.join(self.tmpdir, 'click.wav'), seconds=16)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_report(self):
+        """Test that the report lists BPM error, key agreement and speedup."""
+        out = io.StringIO()
+        call_command('compare_analysis_modes', self.tmpdir, stdout=out)
+        report = out.getvalue()
+
+        self.assertIn('click.wav: BPM ', report)
+        self.assertIn('Compared 1 file(s)', report)
+        # A steady click track gives the same tempo and key in every window
+        self.assertIn('Mean BPM error: 0.00', report)
+        self.assertIn('BPM within ±2.0: 100%', report)
+        self.assertIn('Key agreement: 100%', report)
+        self.assertRegex(report, r'Analysis time: [\d.]+s full, [\d.]+s excerpt \([\d.]+x faster\)')
+
+    def test_missing_path(self):
+        """Test that a missing reference path is reported."""
+        with self.assertRaisesMessage(CommandError, 'does not exist'):
+            call_command('compare_analysis_modes', os.path.join(self.tmpdir, 'missing'), stdout=io.StringIO())
+
+
+class AnalysisCacheTest(SimpleTestCase):
+    """Test case for the content-hash keyed analysis cache."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        """Test that stored entries are returned on lookup."""
+        cache = AnalysisCache(self.tmpdir, max_bytes=1024 * 1024)
+        cache.set('ab' * 32, {'bpm': 120.0})
+
+        self.assertEqual(cache.get('ab' * 32), {'bpm': 120.0})
+        self.assertIsNone(cache.get('cd' * 32))
+
+    def test_evicts_least_recently_used(self):
+        """Test that the size bound evicts the least recently used entries first."""
+        cache = AnalysisCache(self.tmpdir, max_bytes=250)
+        keys = [f'{i:02d}' * 32 for i in range(3)]
+        for age, key in enumerate(keys):
+            cache.set(key, {'padding': 'x' * 60})
+            # Make the insertion order visible to the mtime-based LRU
+            os.utime(cache._path(key), (age, age))
+        cache.get(keys[0])
+
+        cache.set('ff' * 32, {'padding': 'x' * 60})
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get('ff' * 32))
+
+
+@unittest.skipUnless(utils.LIBROSA_AVAILABLE, 'librosa is not installed')
+class CachedAudioMetadataTest(SimpleTestCase):
+    """Test case for cached extract_audio_metadata lookups."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'click.wav')
+        write_click_track(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_duplicate_content_is_not_decoded_again(self):
+        """Test that a file with known content is answered from the cache."""
+        duplicate = os.path.join(self.tmpdir, 'copy.wav')
+        shutil.copy(self.path, duplicate)
+
+        with override_settings(AUDIO_ANALYSIS_CACHE_DIR=os.path.join(self.tmpdir, 'cache')):
+            first = utils.extract_audio_metadata(self.path)
+            with mock.patch.object(utils.librosa, 'load') as load:
+                second = utils.extract_audio_metadata(duplicate, content_hash=file_sha256(self.path))
+
+        load.assert_not_called()
+        self.assertEqual(first, second)
+
+
+class HashedFileFieldTest(TestCase):
+    """Test case for hashing track uploads while they are written."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+
+    def test_upload_records_content_hash(self):
+        """Test that saving an upload stores the SHA-256 of its bytes."""
+        artist = Artist.objects.create(name="Test Artist")
+        album = Album.objects.create(title="Test Album", artist=artist)
+        content = b'ID3' + b'\x00' * 2048
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            track = Track.objects.create(title="Test Track", album=album, artist=artist,
+                                         audio_file=SimpleUploadedFile('song.mp3', content))
+
+            track.refresh_from_db()
+            self.assertEqual(track.content_hash, hashlib.sha256(content).hexdigest())
+            self.assertEqual(file_sha256(track.audio_file.path), track.content_hash)
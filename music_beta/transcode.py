@@ -0,0 +1,170 @@
+"""
+HLS transcoding ladder for uploaded tracks.
+
+After a track is analyzed, a transcode job (see music_beta/jobs.py) encodes
+the upload into AAC renditions at the AUDIO_HLS_LADDER bitrates with a local
+ffmpeg. The file is decoded once for all renditions. Each rendition is an HLS
+media playlist with AUDIO_HLS_SEGMENT_SECONDS segments, kept under
+AUDIO_HLS_DIR/<content hash>/ in the default storage, so duplicate uploads
+share one ladder. Rungs above the source bitrate are skipped.
+
+The player loads the master playlist from views.track_hls, either whole to
+let the player adapt or narrowed to one rendition with ?kbps=. The original
+file is only streamed when the listener picks it.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .images import is_local
+
+PLAYLIST_NAME = 'index.m3u8'
+# RFC 6381 codec string of AAC-LC
+AAC_CODECS = 'mp4a.40.2'
+# MPEG-TS packaging adds roughly 10-20% to the audio bitrate; BANDWIDTH must be the peak
+TS_OVERHEAD = 1.2
+
+
+class TranscodeError(Exception):
+    """The encoder is missing or failed."""
+
+
+def _ladder():
+    return sorted(getattr(settings, 'AUDIO_HLS_LADDER', [64, 128, 256]))
+
+
+def _segment_seconds():
+    return getattr(settings, 'AUDIO_HLS_SEGMENT_SECONDS', 6)
+
+
+def _directory():
+    return getattr(settings, 'AUDIO_HLS_DIR', 'hls')
+
+
+def _encoder():
+    return getattr(settings, 'AUDIO_TRANSCODER', 'ffmpeg')
+
+
+def rendition_name(content_hash, kbps, filename=PLAYLIST_NAME):
+    """Storage name of a file of one rendition."""
+    return f'{_directory()}/{content_hash[:16]}/{kbps}k/{filename}'
+
+
+def ladder_for(source_kbps):
+    """
+    Return the rungs of the ladder worth encoding for a source.
+
+    Args:
+        source_kbps (int): Bitrate of the upload, None if unknown
+
+    Returns:
+        list: Bitrates in kbps, ascending; rungs above the source are dropped
+        except the lowest
+    """
+    ladder = _ladder()
+    if not source_kbps:
+        return ladder
+    return [kbps for kbps in ladder if kbps <= source_kbps] or ladder[:1]
+
+
+def encoder_command(source, output_dir, rungs):
+    """
+    Build the ffmpeg command encoding every rung from a single decode.
+
+    Args:
+        source (str): Path of the upload
+        output_dir (str): Directory receiving one <kbps>k/ directory per rung
+        rungs (list): Bitrates in kbps
+
+    Returns:
+        list: Command arguments
+    """
+    command = [_encoder(), '-hide_banner', '-loglevel', 'error', '-nostdin', '-y', '-i', source]
+    for kbps in rungs:
+        target = os.path.join(output_dir, f'{kbps}k')
+        command += [
+            '-map', '0:a:0', '-vn', '-c:a', 'aac', '-b:a', f'{kbps}k', '-ac', '2',
+            '-f', 'hls', '-hls_time', str(_segment_seconds()), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(target, 'segment%05d.ts'),
+            os.path.join(target, PLAYLIST_NAME),
+        ]
+    return command
+
+
+def _store(directory, content_hash, kbps):
+    # The playlist goes last, so a stored playlist means its segments are there
+    names = sorted(os.listdir(directory), key=lambda name: (name == PLAYLIST_NAME, name))
+    for filename in names:
+        name = rendition_name(content_hash, kbps, filename)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        with open(os.path.join(directory, filename), 'rb') as f:
+            default_storage.save(name, File(f))
+
+
+def transcode_track(track, timeout=None):
+    """
+    Encode the HLS ladder of a track unless it is already stored.
+
+    Args:
+        track (Track): Track with an uploaded audio file and content hash
+        timeout (float): Seconds the encoder may run
+
+    Returns:
+        list: Bitrates in kbps of the renditions available, empty if the
+        track has no uploaded audio
+
+    Raises:
+        TranscodeError: If the encoder is not installed, fails or times out
+    """
+    if not is_local(track.audio_file) or not track.content_hash:
+        return []
+    rungs = ladder_for(track.bitrate)
+    if all(default_storage.exists(rendition_name(track.content_hash, kbps)) for kbps in rungs):
+        return rungs
+
+    if shutil.which(_encoder()) is None:
+        raise TranscodeError(f"Encoder {_encoder()!r} not found")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for kbps in rungs:
+            os.mkdir(os.path.join(output_dir, f'{kbps}k'))
+        try:
+            result = subprocess.run(encoder_command(track.audio_file.path, output_dir, rungs),
+                                    capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise TranscodeError(f"Encoder timed out after {timeout:.0f}s")
+        if result.returncode != 0:
+            raise TranscodeError(result.stderr.decode(errors='replace').strip()[-2000:])
+
+        for kbps in rungs:
+            _store(os.path.join(output_dir, f'{kbps}k'), track.content_hash, kbps)
+    return rungs
+
+
+def master_playlist(track, kbps=None):
+    """
+    Return the HLS master playlist of a track.
+
+    Args:
+        track (Track): Transcoded track
+        kbps (int): Only list this rendition, so the player can't switch
+
+    Returns:
+        str: Playlist text, or None if the track has no such rendition
+    """
+    renditions = [rung for rung in track.renditions if kbps is None or rung == kbps]
+    if not renditions or not track.content_hash:
+        return None
+
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for rung in renditions:
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={int(rung * 1000 * TS_OVERHEAD)},'
+                     f'AVERAGE-BANDWIDTH={rung * 1000},CODECS="{AAC_CODECS}"')
+        lines.append(default_storage.url(rendition_name(track.content_hash, rung)))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,138 @@
+"""
+Time-decayed trending leaderboard.
+
+Every track has one score per window (1h, 24h, 7d). A play contributes
+exp(-age / mean_life) to each, so a score is roughly "plays in the last
+window", with older plays fading out smoothly instead of dropping off a cliff.
+
+Scores are stored forward-decayed: instead of decaying every row as time
+passes, a play at time t adds exp((t - reference) / mean_life), which grows
+with t. All rows of a window share the same reference, so ordering by the
+stored value is ordering by the decayed score, and a leaderboard read is an
+index scan of k rows. Updates are incremental: each play flush (see
+music_beta/plays.py) adds to the scores of the played tracks only.
+
+When the growth factor of a window gets large, the window is rebased to the
+current time, which rescales its column in one UPDATE. Tracks whose 7d score
+has decayed to nothing are deleted at the same time.
+"""
+import math
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from .models import Track, TrendingScore, TrendingWindow
+
+# Window name -> mean life of a play's contribution
+WINDOWS = {
+    '1h': timedelta(hours=1),
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+}
+DEFAULT_WINDOW = '24h'
+
+# Rebase a window once its growth factor exceeds exp(REBASE_EXPONENT)
+REBASE_EXPONENT = 30
+# Rows whose decayed 7d score falls below this are deleted on rebase
+PRUNE_SCORE = 0.01
+# SQLite limits the number of bound parameters per statement
+UPDATE_BATCH_SIZE = 200
+
+TrendingEntry = namedtuple('TrendingEntry', ['track', 'score'])
+
+
+def score_field(window):
+    return f'score_{window}'
+
+
+def _exponent(when, reference, window):
+    return (when - reference) / WINDOWS[window]
+
+
+def _lock_windows(now):
+    """
+    Return {name: reference} for all windows, rebasing windows that are due.
+
+    Must be called inside a transaction; the window rows are locked so that a
+    concurrent rebase cannot change a reference while scores are added.
+    """
+    references = dict(TrendingWindow.objects.select_for_update().values_list('name', 'reference'))
+    for window in WINDOWS:
+        if window not in references:
+            TrendingWindow.objects.get_or_create(name=window, defaults={'reference': now})
+            references[window] = TrendingWindow.objects.get(name=window).reference
+
+    rebased = False
+    for window, reference in references.items():
+        if window in WINDOWS and _exponent(now, reference, window) > REBASE_EXPONENT:
+            factor = math.exp(-_exponent(now, reference, window))
+            field = score_field(window)
+            TrendingScore.objects.update(**{field: F(field) * factor})
+            TrendingWindow.objects.filter(name=window).update(reference=now)
+            references[window] = now
+            rebased = True
+
+    if rebased:
+        threshold = PRUNE_SCORE * math.exp(_exponent(now, references['7d'], '7d'))
+        TrendingScore.objects.filter(score_7d__lt=threshold).delete()
+    return references
+
+
+def record_plays(pending):
+    """
+    Add buffered plays to the trending scores.
+
+    Args:
+        pending (dict): Maps track id to (plays, latest play timestamp)
+    """
+    if not pending:
+        return
+    now = max(played_at for _, played_at in pending.values())
+    with transaction.atomic():
+        references = _lock_windows(now)
+        track_ids = sorted(Track.objects.filter(pk__in=list(pending)).values_list('pk', flat=True))
+        for start in range(0, len(track_ids), UPDATE_BATCH_SIZE):
+            batch = track_ids[start:start + UPDATE_BATCH_SIZE]
+            TrendingScore.objects.bulk_create([TrendingScore(track_id=track_id) for track_id in batch],
+                                              ignore_conflicts=True)
+            increments = {}
+            for window, reference in references.items():
+                if window not in WINDOWS:
+                    continue
+                field = score_field(window)
+                weights = [
+                    When(pk=track_id, then=Value(
+                        pending[track_id][0] * math.exp(_exponent(pending[track_id][1], reference, window))))
+                    for track_id in batch
+                ]
+                increments[field] = F(field) + Case(*weights, default=Value(0.0), output_field=FloatField())
+            TrendingScore.objects.filter(pk__in=batch).update(**increments)
+
+
+def top_trending(window=DEFAULT_WINDOW, limit=5):
+    """
+    Return the top tracks of a trending window.
+
+    Args:
+        window (str): One of WINDOWS
+        limit (int): Number of tracks to return
+
+    Returns:
+        list: TrendingEntry(track, score) tuples, best first. `score` is the
+        decayed score at the current time, roughly the number of recent plays.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown trending window: {window}")
+    reference = TrendingWindow.objects.filter(name=window).values_list('reference', flat=True).first()
+    if reference is None:
+        return []
+
+    field = score_field(window)
+    scores = (TrendingScore.objects.filter(**{f'{field}__gt': 0})
+              .select_related('track__artist', 'track__album').defer('track__waveform')
+              .order_by(f'-{field}', 'pk')[:limit])
+    decay = math.exp(-_exponent(timezone.now(), reference, window))
+    return [TrendingEntry(score.track, getattr(score, field) * decay) for score in scores]
@@ -4,7 +4,8 @@ from .views import copyright_request_view
 from rest_framework.routers import DefaultRouter
 from .api import (
     GenreViewSet, ArtistViewSet, AlbumViewSet, TrackViewSet,
-    UserViewSet, AdCampaignViewSet, CopyrightViewSet, ServiceRequestViewSet
+    UserViewSet, AdCampaignViewSet, CopyrightViewSet, ServiceRequestViewSet,
+    TrendingViewSet, ChangesViewSet, ManifestViewSet
 )
 
 # Create a router and register our viewsets with it
@@ -13,6 +14,9 @@ router.register(r'genres', GenreViewSet)
 router.register(r'artists', ArtistViewSet)
 router.register(r'albums', AlbumViewSet)
 router.register(r'tracks', TrackViewSet)
+router.register(r'trending', TrendingViewSet, basename='trending')
+router.register(r'changes', ChangesViewSet, basename='changes')
+router.register(r'manifest', ManifestViewSet, basename='manifest')
 router.register(r'users', UserViewSet)
 router.register(r'ad-campaigns', AdCampaignViewSet)
 router.register(r'copyrights', CopyrightViewSet)
@@ -22,13 +26,19 @@ router.register(r'service-requests', ServiceRequestViewSet)
 urlpatterns = [
     path('', views.home, name='home'),
     path('music/', views.music_platform, name='music_platform'),
+    path('music/more/<str:section>/', views.music_platform_more, name='music_platform_more'),
+    path('music/manifest/<str:name>', views.catalog_manifest_file, name='catalog_manifest_file'),
     path('signup/', views.signup, name='signup'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('upload-ad-campaign/', views.upload_ad_campaign, name='upload_ad_campaign'),
     path('search/', views.search, name='search'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
     path('pexels-images/', views.get_pexels_images, name='pexels_images'),
     path('service-request/', views.service_request, name='service_request'),
+    path('music/stream/<int:track_id>/', views.stream_track, name='stream_track'),
+    path('music/waveform/<int:track_id>/', views.track_waveform, name='track_waveform'),
+    path('music/hls/<int:track_id>/master.m3u8', views.track_hls, name='track_hls'),
     path('update-play-count/<int:track_id>/', views.update_play_count, name='update_play_count'),
     path('legal/generate_copyright_pdf/', views.generate_copyright_pdf, name='generate_copyright_pdf'),
     path('legal/download_copyright_boilerplate/', views.download_copyright_boilerplate, name='download_copyright_boilerplate'),
@@ -1,10 +1,17 @@
 """
 Utility functions for the music_beta app.
 """
+import base64
 import os
+import time
 import numpy as np
 from datetime import timedelta
 
+from django.conf import settings
+
+from .analysis_cache import get_analysis_cache
+from .fields import file_sha256
+
 # Try to import mutagen, but provide a fallback if it's not available
 try:
     from mutagen import File
@@ -17,7 +24,6 @@ except ImportError:
 # Try to import librosa for audio analysis, but provide a fallback if it's not available
 try:
     import librosa
-    import librosa.display
     LIBROSA_AVAILABLE = True
 
     # Define key mapping for librosa key detection
@@ -50,28 +56,265 @@ try:
 except ImportError:
     LIBROSA_AVAILABLE = False
 
-def extract_bpm(file_path):
+ANALYSIS_MODE_FULL = 'full'
+ANALYSIS_MODE_EXCERPT = 'excerpt'
+
+
+class DecodedAudio:
     """
-    Extract beats per minute (BPM) from an audio file using librosa.
+    Audio samples decoded once and shared by every feature extractor.
+
+    In "full" mode there is a single segment holding the whole track. In
+    "excerpt" mode each segment is a short window taken from the track.
+
+    Attributes:
+        segments (list): Mono audio time series (numpy.ndarray), one per window.
+        sr (int): Sample rate of the segments in Hz.
+        duration (float): Length of the whole track in seconds.
+        complete (bool): Whether the segments cover the whole track.
+    """
+
+    def __init__(self, segments, sr, duration=None, complete=True):
+        self.segments = segments
+        self.sr = sr
+        if duration is None:
+            duration = sum(len(y) for y in segments) / float(sr)
+        self.duration = duration
+        self.complete = complete
+
+    @property
+    def y(self):
+        """numpy.ndarray: The decoded audio of a full decode."""
+        return self.segments[0]
+
+
+def format_duration(seconds):
+    """
+    Format a length in seconds as MM:SS (the format Track.duration uses).
+
+    Args:
+        seconds (float): Length in seconds
+
+    Returns:
+        str: Duration such as "3:45" or "03:45"
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def analysis_settings(mode=None):
+    """
+    Return the configured analysis mode and excerpt parameters.
+
+    Args:
+        mode (str): Override AUDIO_ANALYSIS_MODE ('full' or 'excerpt')
+
+    Returns:
+        dict: mode, windows, window_seconds and sample_rate
+    """
+    return {
+        'mode': mode or getattr(settings, 'AUDIO_ANALYSIS_MODE', ANALYSIS_MODE_FULL),
+        'windows': getattr(settings, 'AUDIO_EXCERPT_WINDOWS', 3),
+        'window_seconds': getattr(settings, 'AUDIO_EXCERPT_SECONDS', 30),
+        'sample_rate': getattr(settings, 'AUDIO_EXCERPT_SAMPLE_RATE', 11025),
+    }
+
+
+def excerpt_offsets(duration, windows, window_seconds):
+    """
+    Pick evenly spaced window start times, skipping the intro and outro.
+
+    Args:
+        duration (float): Track length in seconds
+        windows (int): Number of windows
+        window_seconds (float): Length of each window
+
+    Returns:
+        list: Window start times in seconds (empty if the track is too short
+            for excerpts to save any work)
+    """
+    if duration <= windows * window_seconds * 1.5:
+        return []
+    return [max(duration * (i + 1) / (windows + 1) - window_seconds / 2, 0) for i in range(windows)]
+
+
+def decode_audio(file_path, mode=None):
+    """
+    Decode an audio file once so that every extractor can share the buffer.
+
+    In excerpt mode only a few windows are decoded, at a lower sample rate.
 
     Args:
         file_path (str): Path to the audio file
+        mode (str): Override AUDIO_ANALYSIS_MODE ('full' or 'excerpt')
 
     Returns:
-        float: BPM value or None if extraction fails
+        DecodedAudio: The decoded audio or None if decoding fails
     """
     if not LIBROSA_AVAILABLE or not os.path.exists(file_path):
         return None
 
+    config = analysis_settings(mode)
     try:
-        # Load audio file with librosa
-        y, sr = librosa.load(file_path)
+        if config['mode'] != ANALYSIS_MODE_EXCERPT:
+            y, sr = librosa.load(file_path)
+            return DecodedAudio([y], sr)
+
+        sr = config['sample_rate']
+        duration = librosa.get_duration(path=file_path)
+        offsets = excerpt_offsets(duration, config['windows'], config['window_seconds'])
+        if not offsets:
+            y, sr = librosa.load(file_path, sr=sr)
+            return DecodedAudio([y], sr)
+
+        segments = [
+            librosa.load(file_path, sr=sr, offset=offset, duration=config['window_seconds'])[0]
+            for offset in offsets
+        ]
+        return DecodedAudio(segments, sr, duration=duration, complete=False)
+    except Exception as e:
+        print(f"Error decoding audio: {e}")
+        return None
+
+
+def _extract_tempo(audio):
+    """Estimate the tempo (BPM) as the median over the decoded segments."""
+    tempos = []
+    for y in audio.segments:
+        onset_env = librosa.onset.onset_strength(y=y, sr=audio.sr)
+        tempos.append(librosa.beat.tempo(onset_envelope=onset_env, sr=audio.sr)[0])
+    return {'bpm': round(float(np.median(tempos)), 2)}  # Round to 2 decimal places
+
+
+def _extract_key(audio):
+    """Estimate the musical key from the chroma energy summed over all segments."""
+    chroma_sum = sum(np.sum(librosa.feature.chroma_cqt(y=y, sr=audio.sr), axis=1) for y in audio.segments)
+    key_index = int(np.argmax(chroma_sum))
+
+    # Use the KEY_MAPPING dictionary to get the key name, defaulting to C major
+    return {'key': KEY_MAPPING.get(key_index, KEY_MAPPING[0])}
+
+
+def _extract_duration(audio):
+    """Report the duration of the track."""
+    return {'duration': format_duration(audio.duration)}
+
+
+def waveform_peaks(y, peaks, bits=8):
+    """
+    Downsample audio to min/max peak pairs and pack them as a binary blob.
+
+    The blob starts with one byte holding `bits` (8 or 16), followed by a
+    (min, max) pair of signed integers per bucket: int8, or little-endian
+    int16. Samples are in [-1, 1] and scaled to the full integer range.
+
+    Args:
+        y (numpy.ndarray): Mono audio time series
+        peaks (int): Number of buckets (fewer if there are fewer samples)
+        bits (int): 8 or 16
+
+    Returns:
+        bytes: The packed peaks, or None if there are no samples
+    """
+    if len(y) == 0:
+        return None
+    edges = np.linspace(0, len(y), min(peaks, len(y)) + 1).astype(int)[:-1]
+    pairs = np.empty(len(edges) * 2, dtype=np.float64)
+    pairs[0::2] = np.minimum.reduceat(y, edges)
+    pairs[1::2] = np.maximum.reduceat(y, edges)
+    dtype, scale = ('<i2', 32767) if bits == 16 else ('i1', 127)
+    return bytes([bits]) + np.round(np.clip(pairs, -1, 1) * scale).astype(dtype).tobytes()
+
+
+def unpack_waveform(blob):
+    """
+    Unpack a blob written by waveform_peaks().
+
+    Returns:
+        numpy.ndarray: (buckets, 2) array of (min, max) peaks in [-1, 1]
+    """
+    bits = blob[0]
+    dtype, scale = ('<i2', 32767) if bits == 16 else ('i1', 127)
+    return (np.frombuffer(blob[1:], dtype=dtype) / scale).reshape(-1, 2)
+
+
+def _extract_waveform(audio):
+    """
+    Compute the waveform peaks of the track for the player.
+
+    Needs the whole track; in excerpt mode only tracks short enough to be
+    decoded in full get a waveform.
+    """
+    if not audio.complete:
+        return {}
+    blob = waveform_peaks(audio.y, getattr(settings, 'WAVEFORM_PEAKS', 1000), getattr(settings, 'WAVEFORM_BITS', 8))
+    # Base64 keeps the analysis result JSON-serializable for the analysis cache
+    return {'waveform': base64.b64encode(blob).decode()} if blob else {}
+
+
+# Feature extractors run against the shared decode buffer, in order. Each one
+# takes a DecodedAudio and returns a dict of metadata. A mood extractor
+# (DEAM dataset) would be registered here once a model is available.
+AUDIO_FEATURE_EXTRACTORS = [
+    ('tempo', _extract_tempo),
+    ('key', _extract_key),
+    ('duration', _extract_duration),
+    ('waveform', _extract_waveform),
+]
+
+
+def analyze_audio(file_path, timings=None, mode=None):
+    """
+    Decode an audio file once and run every feature extractor on the buffer.
+
+    Args:
+        file_path (str): Path to the audio file
+        timings (dict): Optional dict that receives the seconds spent in each
+            stage ('decode' plus one entry per extractor)
+        mode (str): Override AUDIO_ANALYSIS_MODE ('full' or 'excerpt')
+
+    Returns:
+        dict: Dictionary containing the extracted features
+    """
+    timings = timings if timings is not None else {}
+
+    started = time.perf_counter()
+    audio = decode_audio(file_path, mode=mode)
+    timings['decode'] = time.perf_counter() - started
+    if audio is None:
+        return {}
 
-        # Extract tempo (BPM)
-        onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-        tempo = librosa.beat.tempo(onset_envelope=onset_env, sr=sr)[0]
+    features = {}
+    for name, extractor in AUDIO_FEATURE_EXTRACTORS:
+        started = time.perf_counter()
+        try:
+            features.update(extractor(audio))
+        except Exception as e:
+            print(f"Error extracting {name}: {e}")
+        timings[name] = time.perf_counter() - started
+
+    return features
+
+
+def extract_bpm(file_path):
+    """
+    Extract beats per minute (BPM) from an audio file using librosa.
+
+    Prefer analyze_audio() when more than one feature is needed, so the file
+    is only decoded once.
+
+    Args:
+        file_path (str): Path to the audio file
+
+    Returns:
+        float: BPM value or None if extraction fails
+    """
+    audio = decode_audio(file_path)
+    if audio is None:
+        return None
 
-        return round(tempo, 2)  # Round to 2 decimal places
+    try:
+        return _extract_tempo(audio)['bpm']
     except Exception as e:
         print(f"Error extracting BPM: {e}")
         return None
@@ -81,45 +324,64 @@ def extract_key(file_path):
     """
     Extract musical key from an audio file using librosa.
 
+    Prefer analyze_audio() when more than one feature is needed, so the file
+    is only decoded once.
+
     Args:
         file_path (str): Path to the audio file
 
     Returns:
         str: Musical key or None if extraction fails
     """
-    if not LIBROSA_AVAILABLE or not os.path.exists(file_path):
+    audio = decode_audio(file_path)
+    if audio is None:
         return None
 
     try:
-        # Load audio file with librosa
-        y, sr = librosa.load(file_path)
-
-        # Extract chroma features
-        chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-
-        # Compute key using Krumhansl-Schmuckler key-finding algorithm
-        key = librosa.feature.tonnetz(y=y, sr=sr)
-        chroma_sum = np.sum(chroma, axis=1)
-        key_index = np.argmax(chroma_sum)
-
-        # Convert to major/minor key
-        if key_index < 12:
-            # Use the KEY_MAPPING dictionary to get the key name
-            return KEY_MAPPING.get(key_index)
-        else:
-            # If key_index is out of range, default to C major
-            return KEY_MAPPING.get(0)
+        return _extract_key(audio)['key']
     except Exception as e:
         print(f"Error extracting key: {e}")
         return None
 
 
-def extract_audio_metadata(file_path):
+# Bump when the extractors change so cached results are recomputed
+ANALYSIS_VERSION = 2
+
+
+def analysis_cache_key(content_hash):
+    """
+    Build the analysis cache key for a file's content hash.
+
+    The key includes the analysis mode (and excerpt parameters), so full and
+    excerpt results for the same file are cached separately.
+
+    Args:
+        content_hash (str): SHA-256 of the audio bytes
+
+    Returns:
+        str: Cache key
+    """
+    config = analysis_settings()
+    profile = config['mode']
+    if profile == ANALYSIS_MODE_EXCERPT:
+        profile = f"{profile}-{config['windows']}x{config['window_seconds']}s-{config['sample_rate']}hz"
+    return f"{content_hash}-v{ANALYSIS_VERSION}-{profile}"
+
+
+def extract_audio_metadata(file_path, timings=None, content_hash=None):
     """
     Extract metadata from an audio file using mutagen and librosa.
 
+    The file is decoded at most once; all librosa features are computed from
+    that single buffer (see analyze_audio). Results are cached by the SHA-256
+    of the file contents, so analyzing the same bytes again is a lookup.
+
     Args:
         file_path (str): Path to the audio file
+        timings (dict): Optional dict that receives the seconds spent in each
+            stage ('hash', 'cache', 'mutagen', 'decode', 'tempo', 'key', 'duration')
+        content_hash (str): SHA-256 of the file if already known (e.g.
+            Track.content_hash, computed while the upload was written)
 
     Returns:
         dict: Dictionary containing metadata
@@ -127,10 +389,36 @@ def extract_audio_metadata(file_path):
     if not os.path.exists(file_path):
         return {}
 
+    timings = timings if timings is not None else {}
+
+    cache = get_analysis_cache()
+    if cache is not None:
+        if not content_hash:
+            started = time.perf_counter()
+            content_hash = file_sha256(file_path)
+            timings['hash'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cached = cache.get(analysis_cache_key(content_hash))
+        timings['cache'] = time.perf_counter() - started
+        if cached is not None:
+            return cached
+
+    metadata = _extract_audio_metadata(file_path, timings)
+
+    if cache is not None and metadata:
+        cache.set(analysis_cache_key(content_hash), metadata)
+
+    return metadata
+
+
+def _extract_audio_metadata(file_path, timings):
+    """Run mutagen and the librosa pipeline on a file (no caching)."""
     metadata = {}
 
     # Extract metadata using mutagen if available
     if MUTAGEN_AVAILABLE:
+        started = time.perf_counter()
         try:
             # Try to open the file with mutagen
             audio = File(file_path)
@@ -179,26 +467,57 @@ def extract_audio_metadata(file_path):
         except Exception as e:
             # If there's an error with mutagen, log it but continue
             print(f"Error extracting metadata with mutagen: {e}")
+        timings['mutagen'] = time.perf_counter() - started
 
-    # Extract BPM and key using librosa if available
+    # Extract BPM, key and duration using librosa if available
     if LIBROSA_AVAILABLE:
         try:
-            # Extract BPM
-            bpm = extract_bpm(file_path)
-            if bpm:
-                metadata['bpm'] = bpm
+            features = analyze_audio(file_path, timings=timings)
 
-            # Extract key
-            key = extract_key(file_path)
-            if key:
-                metadata['key'] = key
+            # Container metadata from mutagen wins over the decoded estimate
+            if 'duration' in features:
+                metadata.setdefault('duration', features.pop('duration'))
+            metadata.update({name: value for name, value in features.items() if value})
 
             # TODO: Extract mood from DEAM dataset
             # This would require implementing a model trained on the DEAM dataset
-            # For now, we'll leave this as a placeholder
+            # and registering it in AUDIO_FEATURE_EXTRACTORS
 
         except Exception as e:
             # If there's an error with librosa, log it
             print(f"Error extracting audio features with librosa: {e}")
 
     return metadata
+
+
+# Track fields that apply_audio_metadata may change
+AUDIO_METADATA_FIELDS = [
+    'title', 'duration', 'year', 'genre_tag', 'composer', 'track_number',
+    'bitrate', 'sample_rate', 'bpm', 'key', 'mood', 'waveform',
+]
+
+
+def apply_audio_metadata(track, metadata, fields=None):
+    """
+    Copy extracted metadata onto a track without overwriting values set by hand.
+
+    Technical properties (bitrate, sample rate, waveform) always come from the file.
+
+    Args:
+        track (Track): Track instance to update (not saved)
+        metadata (dict): Metadata returned by extract_audio_metadata
+        fields (list): Restrict the update to these fields
+            (defaults to AUDIO_METADATA_FIELDS)
+
+    Returns:
+        Track: The updated track
+    """
+    for field in fields or AUDIO_METADATA_FIELDS:
+        if field not in metadata:
+            continue
+        if field == 'waveform':
+            track.waveform = base64.b64decode(metadata[field])
+        elif field in ('bitrate', 'sample_rate') or not getattr(track, field):
+            setattr(track, field, metadata[field])
+
+    return track
@@ -1,14 +1,17 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.http import JsonResponse, HttpResponse, FileResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
 from django.core.mail import send_mail, EmailMessage
 from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.contrib import messages
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from .forms import CopyrightForm, LoginForm
 from io import BytesIO
+import gzip
 import hashlib
 import json
 import os
@@ -35,6 +38,16 @@ except ImportError:
 
 from .models import Genre, Artist, Album, Track, User, AdCampaign, ServiceRequest
 from .forms import UserSignupForm, AdCampaignForm, ServiceRequestForm, LoginForm
+from .autocomplete import get_autocomplete_index
+from .catalog import catalog_is_populated
+from .manifest import open_manifest
+from .streaming import stream_file
+from .pagination import KeysetPaginator
+from .plays import buffered_plays, record_play
+from .search import search_catalog
+from .session_user import get_session_user
+from .transcode import master_playlist
+from .trending import DEFAULT_WINDOW, top_trending
 
 # Create your views here.
 def home(request):
@@ -167,15 +180,20 @@ def search(request):
         if not query:
             return JsonResponse({'success': False, 'message': 'No search query provided'})
 
-        # Search for artists, albums, tracks, and ad campaigns
-        artists_queryset = Artist.objects.filter(name__icontains=query)
-        albums_queryset = Album.objects.filter(title__icontains=query)
-        tracks = Track.objects.filter(title__icontains=query).values('id', 'title', 'artist__name', 'album__title')
-        ad_campaigns = AdCampaign.objects.filter(title__icontains=query).values('id', 'title', 'description', 'video_url', 'mood')
+        # Look the query up in the catalog search index (ranked ids per kind)
+        matches = search_catalog(query)
+
+        # Load the matching rows, keeping the ranking order of the index
+        artists_by_id = Artist.objects.in_bulk(matches['artist'])
+        albums_by_id = Album.objects.select_related('artist').in_bulk(matches['album'])
+        tracks_by_id = {
+            track['id']: track
+            for track in Track.objects.filter(id__in=matches['track']).values('id', 'title', 'artist__name', 'album__title')
+        }
 
         # Convert querysets to lists with custom properties
         artists = []
-        for artist in artists_queryset:
+        for artist in (artists_by_id[pk] for pk in matches['artist'] if pk in artists_by_id):
             artists.append({
                 'id': artist.id,
                 'name': artist.name,
@@ -184,7 +202,7 @@ def search(request):
             })
 
         albums = []
-        for album in albums_queryset:
+        for album in (albums_by_id[pk] for pk in matches['album'] if pk in albums_by_id):
             albums.append({
                 'id': album.id,
                 'title': album.title,
@@ -193,17 +211,36 @@ def search(request):
                 'cover_image_url': album.cover_image_url,
             })
 
+        tracks = [tracks_by_id[pk] for pk in matches['track'] if pk in tracks_by_id]
+
         results = {
             'artists': artists,
             'albums': albums,
-            'tracks': list(tracks),
-            'ad_campaigns': list(ad_campaigns),
+            'tracks': tracks,
+            # Ad campaigns were removed from the catalog; kept for API compatibility
+            'ad_campaigns': [],
         }
 
         return JsonResponse({'success': True, 'results': results})
 
     return JsonResponse({'success': False, 'message': 'Invalid request method'})
 
+def autocomplete(request):
+    """
+    View function for typeahead suggestions.
+
+    Answered from the in-memory prefix index over artist, album, track and
+    composer names, without querying the database.
+    """
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 20)
+    except ValueError:
+        limit = 10
+
+    suggestions = get_autocomplete_index().suggest(query, limit=limit)
+    return JsonResponse({'success': True, 'suggestions': suggestions})
+
 @csrf_exempt
 def get_pexels_images(request):
     """
@@ -296,113 +333,181 @@ def service_request(request):
 
     return render(request, 'music_beta/service_request.html', {'form': form})
 
+# Sections of the music platform page: queryset, rows per page and the
+# template rendering a page of rows. Each section is keyset-paginated so the
+# first render costs the same however large the catalog is.
+MUSIC_PLATFORM_SECTIONS = {
+    'genres': (lambda: Genre.objects.all(), 50, 'music_beta/partials/genre_items.html'),
+    'artists': (lambda: Artist.objects.all(), 20, 'music_beta/partials/artist_items.html'),
+    'albums': (lambda: Album.objects.select_related('artist').prefetch_related('genre'), 12,
+               'music_beta/partials/album_items.html'),
+    'tracks': (lambda: Track.objects.defer('waveform').select_related('artist', 'album').prefetch_related('album__genre'), 25,
+               'music_beta/partials/track_rows.html'),
+}
+
+
+def music_platform_page(section, cursor=None):
+    """
+    Return one page of a music platform section.
+
+    Args:
+        section (str): Key of MUSIC_PLATFORM_SECTIONS
+        cursor (str): Cursor of the page, or None for the first page
+
+    Returns:
+        tuple: (list of rows, cursor of the next page or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    queryset, per_page, _ = MUSIC_PLATFORM_SECTIONS[section]
+    return KeysetPaginator(queryset(), per_page=per_page).page(cursor)
+
+
 def music_platform(request):
     """
     View function for the CTV Music platform demo.
+
+    Only the first page of each section is rendered; the page fetches the
+    rest from music_platform_more as the user scrolls.
     """
-    # Get all genres, artists, albums, and tracks
-    genres = Genre.objects.all()
-    artists = Artist.objects.all()
-    albums = Album.objects.all().prefetch_related('genre', 'tracks')
-    tracks = Track.objects.all().select_related('artist', 'album')
-
-    # If no data exists, create placeholder data
-    if not genres.exists():
-        # Create genres
-        rock = Genre.objects.create(name='Rock')
-        pop = Genre.objects.create(name='Pop')
-        hiphop = Genre.objects.create(name='Hip Hop')
-        jazz = Genre.objects.create(name='Jazz')
-        electronic = Genre.objects.create(name='Electronic')
-
-        # Create artists
-        artist1 = Artist.objects.create(
-            name='Sample Artist 1',
-            bio='Lorem ipsum dolor sit amet, consectetur adipiscing elit.'
-        )
-        artist2 = Artist.objects.create(
-            name='Sample Artist 2',
-            bio='Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.'
-        )
-
-        # Create albums
-        album1 = Album.objects.create(
-            title='Sample Album 1',
-            artist=artist1,
-            release_date='2023-01-01',
-            cover_image='https://picsum.photos/300'
-        )
-        album1.genre.add(rock, pop)
-
-        album2 = Album.objects.create(
-            title='Sample Album 2',
-            artist=artist2,
-            release_date='2023-02-01',
-            cover_image='https://picsum.photos/300'
-        )
-        album2.genre.add(hiphop, electronic)
-
-        # Create tracks
-        Track.objects.create(
-            title='Sample Track 1',
-            album=album1,
-            artist=artist1,
-            audio_file='https://www.soundhelix.com/examples/mp3/SoundHelix-Song-1.mp3',
-            duration='3:45'
-        )
-        Track.objects.create(
-            title='Sample Track 2',
-            album=album1,
-            artist=artist1,
-            audio_file='https://www.soundhelix.com/examples/mp3/SoundHelix-Song-2.mp3',
-            duration='4:12'
-        )
-        Track.objects.create(
-            title='Sample Track 3',
-            album=album2,
-            artist=artist2,
-            audio_file='https://www.soundhelix.com/examples/mp3/SoundHelix-Song-3.mp3',
-            duration='3:22'
-        )
-        Track.objects.create(
-            title='Sample Track 4',
-            album=album2,
-            artist=artist2,
-            audio_file='https://www.soundhelix.com/examples/mp3/SoundHelix-Song-4.mp3',
-            duration='5:01'
-        )
-
-        # Refresh querysets
-        genres = Genre.objects.all()
-        artists = Artist.objects.all()
-        albums = Album.objects.all().prefetch_related('genre', 'tracks')
-        tracks = Track.objects.all().select_related('artist', 'album')
-
-    # Get trending tracks (top 5 by play count)
-    trending_tracks = Track.objects.all().order_by('-play_count')[:5]
+    # An empty catalog is seeded with `manage.py seed_catalog`, not here; the
+    # check is answered from the cached catalog version without a query
+    catalog_populated = catalog_is_populated()
+
+    # Get trending tracks (top 5 of the last day, see trending.py)
+    trending_tracks = [entry.track for entry in top_trending(DEFAULT_WINDOW, limit=5)] if catalog_populated else []
 
     context = {
-        'genres': genres,
-        'artists': artists,
-        'albums': albums,
-        'tracks': tracks,
         'trending_tracks': trending_tracks,
+        'catalog_populated': catalog_populated,
     }
+    for section in MUSIC_PLATFORM_SECTIONS:
+        context[section], context[f'{section}_next'] = music_platform_page(section) if catalog_populated else ([], None)
 
     return render(request, 'music_beta/music_platform.html', context)
 
+
+def music_platform_more(request, section):
+    """
+    Return the next page of a music platform section as rendered HTML.
+
+    Query parameters:
+        after: Cursor from the previous page
+        offset: Number of rows already shown, used to number track rows
+    """
+    if section not in MUSIC_PLATFORM_SECTIONS:
+        # A JSON 404, like the 400 below: Http404 would fall through to the CMS pages and redirect
+        return JsonResponse({'success': False, 'message': f'Unknown section: {section}'}, status=404)
+
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        rows, next_cursor = music_platform_page(section, request.GET.get('after'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    html = render_to_string(MUSIC_PLATFORM_SECTIONS[section][2], {section: rows, 'offset': offset}, request=request)
+    return JsonResponse({'success': True, 'html': html, 'next': next_cursor})
+
+
+def catalog_manifest_file(request, name):
+    """
+    Serve a compressed catalog manifest (see music_beta/manifest.py).
+
+    The name contains a hash of the content, so the response never changes
+    and may be cached for good. Clients that do not accept gzip get the
+    manifest decompressed.
+    """
+    try:
+        manifest = open_manifest(name)
+    except FileNotFoundError:
+        raise Http404(f"Unknown manifest: {name}")
+
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = FileResponse(manifest, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = FileResponse(gzip.GzipFile(fileobj=manifest), content_type='application/json')
+    response['Vary'] = 'Accept-Encoding'
+    response['ETag'] = f'"{name.removesuffix(".json.gz")}"'
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+def stream_track(request, track_id):
+    """
+    Stream the audio file of a track with HTTP Range support (see music_beta/streaming.py).
+    """
+    track = get_object_or_404(Track.objects.only('audio_file', 'content_hash'), pk=track_id)
+    if not track.audio_file or track.audio_file.name.startswith(('http://', 'https://')):
+        raise Http404("Track has no uploaded audio file")
+    etag = f'"{track.content_hash}"' if track.content_hash else None
+    try:
+        return stream_file(request, track.audio_file, etag=etag)
+    except FileNotFoundError:
+        raise Http404("Audio file is missing")
+
+def track_waveform(request, track_id):
+    """
+    Serve the packed waveform peaks of a track (see utils.waveform_peaks).
+
+    Peaks only change with the audio, so requests versioned with the content
+    hash (Track.waveform_url) may be cached for good.
+    """
+    track = get_object_or_404(Track.objects.only('waveform', 'content_hash'), pk=track_id)
+    if not track.waveform:
+        raise Http404("Track has no waveform yet")
+
+    blob = bytes(track.waveform)
+    etag = f'"{hashlib.md5(blob).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(blob, content_type='application/octet-stream')
+    response['ETag'] = etag
+    if track.content_hash and request.GET.get('v') == track.content_hash[:16]:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+def track_hls(request, track_id):
+    """
+    Serve the HLS master playlist of a transcoded track (see music_beta/transcode.py).
+
+    ?kbps= narrows the playlist to one rendition for listeners who pick a
+    bitrate; without it the player adapts between all of them.
+    """
+    track = get_object_or_404(Track.objects.only('renditions', 'content_hash'), pk=track_id)
+    kbps = request.GET.get('kbps', '')
+    playlist = master_playlist(track, int(kbps) if kbps.isdigit() else None)
+    if playlist is None or (kbps and not kbps.isdigit()):
+        raise Http404("Track has no such rendition")
+
+    etag = f'"{hashlib.md5(playlist.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(playlist, content_type='application/vnd.apple.mpegurl')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
 @csrf_exempt
 def update_play_count(request, track_id):
     """
     View function to update the play count for a track.
+
+    The play is buffered and written in a batch with other plays (see
+    music_beta/plays.py); the returned count includes buffered plays.
     """
     if request.method == 'POST':
         try:
-            track = get_object_or_404(Track, id=track_id)
-            track.play_count += 1
-            track.last_played = timezone.now()
-            track.save()
-            return JsonResponse({'success': True, 'play_count': track.play_count})
+            tracks = Track.objects.filter(id=track_id).values_list('play_count', flat=True)
+            play_count = get_object_or_404(tracks)
+            buffered_before = buffered_plays(track_id)
+            buffered = record_play(track_id, timezone.now())
+            if buffered <= buffered_before:
+                # This play triggered a flush, so the stored count is stale
+                play_count = tracks.first() or 0
+            return JsonResponse({'success': True, 'play_count': play_count + buffered})
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
@@ -541,7 +646,7 @@ def login_view(request):
 
                     # Update last login time
                     user.last_login = timezone.now()
-                    user.save()
+                    user.save(update_fields=['last_login'])
 
                     # Set session expiry if remember_me is checked
                     if remember_me:
@@ -594,15 +699,13 @@ def client_dashboard(request):
         messages.error(request, 'You must be logged in to view your dashboard.')
         return redirect('login')
 
-    user_id = request.session['user_id']
-    try:
-        user = User.objects.get(id=user_id)
-        if user.user_type != 'client':
-            messages.error(request, 'You must be a client to access this page.')
-            return redirect('home')
-    except User.DoesNotExist:
+    user = get_session_user(request)
+    if user is None:
         messages.error(request, 'User not found.')
         return redirect('login')
+    if user.user_type != 'client':
+        messages.error(request, 'You must be a client to access this page.')
+        return redirect('home')
 
     # Get user's campaigns
     campaigns = ClientCampaign.objects.filter(user=user).order_by('-created_at')
@@ -628,10 +731,8 @@ def campaign_detail(request, campaign_id):
         messages.error(request, 'You must be logged in to view campaign details.')
         return redirect('login')
 
-    user_id = request.session['user_id']
-    try:
-        user = User.objects.get(id=user_id)
-    except User.DoesNotExist:
+    user = get_session_user(request)
+    if user is None:
         messages.error(request, 'User not found.')
         return redirect('login')
 
@@ -658,15 +759,13 @@ def create_campaign(request):
         messages.error(request, 'You must be logged in to create a campaign.')
         return redirect('login')
 
-    user_id = request.session['user_id']
-    try:
-        user = User.objects.get(id=user_id)
-        if user.user_type != 'client':
-            messages.error(request, 'You must be a client to create a campaign.')
-            return redirect('home')
-    except User.DoesNotExist:
+    user = get_session_user(request)
+    if user is None:
         messages.error(request, 'User not found.')
         return redirect('login')
+    if user.user_type != 'client':
+        messages.error(request, 'You must be a client to create a campaign.')
+        return redirect('home')
 
     # Handle form submission
     if request.method == 'POST':
@@ -697,10 +796,8 @@ def edit_campaign(request, campaign_id):
         messages.error(request, 'You must be logged in to edit a campaign.')
         return redirect('login')
 
-    user_id = request.session['user_id']
-    try:
-        user = User.objects.get(id=user_id)
-    except User.DoesNotExist:
+    user = get_session_user(request)
+    if user is None:
         messages.error(request, 'User not found.')
         return redirect('login')
 
@@ -738,15 +835,13 @@ def add_to_cart(request, track_id):
         messages.error(request, 'You must be logged in to add tracks to your cart.')
         return redirect('login')
 
-    user_id = request.session['user_id']
-    try:
-        user = User.objects.get(id=user_id)
-        if user.user_type != 'client':
-            messages.error(request, 'You must be a client to add tracks to your cart.')
-            return redirect('home')
-    except User.DoesNotExist:
+    user = get_session_user(request)
+    if user is None:
         messages.error(request, 'User not found.')
         return redirect('login')
+    if user.user_type != 'client':
+        messages.error(request, 'You must be a client to add tracks to your cart.')
+        return redirect('home')
 
     # Get or create user's cart
     cart, created = Cart.objects.get_or_create(user=user)
@@ -775,10 +870,8 @@ def remove_from_cart(request, track_id):
         messages.error(request, 'You must be logged in to remove tracks from your cart.')
         return redirect('login')
 
-    user_id = request.session['user_id']
-    try:
-        user = User.objects.get(id=user_id)
-    except User.DoesNotExist:
+    user = get_session_user(request)
+    if user is None:
         messages.error(request, 'User not found.')
         return redirect('login')
 
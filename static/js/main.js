@@ -514,12 +514,83 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // Typeahead suggestions for the search box; the template renders the endpoint URL
+    const searchInput = document.getElementById('search-input');
+
+    if (searchForm && searchInput && searchInput.dataset.autocompleteUrl) {
+        const suggestionList = document.createElement('div');
+        suggestionList.id = 'autocomplete-results';
+        suggestionList.className = 'list-group position-absolute w-100 shadow-sm';
+        suggestionList.style.zIndex = 1000;
+        searchInput.parentNode.style.position = 'relative';
+        searchInput.parentNode.appendChild(suggestionList);
+
+        let autocompleteTimer = null;
+        let autocompleteRequest = 0;
+
+        searchInput.addEventListener('input', function() {
+            clearTimeout(autocompleteTimer);
+            const query = this.value.trim();
+            if (!query) {
+                suggestionList.innerHTML = '';
+                return;
+            }
+
+            // Wait for a short pause in typing and ignore out-of-order responses
+            autocompleteTimer = setTimeout(function() {
+                const requestId = ++autocompleteRequest;
+                fetch(`${searchInput.dataset.autocompleteUrl}?q=${encodeURIComponent(query)}`)
+                    .then(response => response.json())
+                    .then(data => {
+                        if (requestId !== autocompleteRequest || !data.success) return;
+
+                        suggestionList.innerHTML = '';
+                        data.suggestions.forEach(function(suggestion) {
+                            const item = document.createElement('button');
+                            item.type = 'button';
+                            item.className = 'list-group-item list-group-item-action';
+                            item.textContent = suggestion.label;
+
+                            const badge = document.createElement('span');
+                            badge.className = 'badge bg-secondary ms-2';
+                            badge.textContent = suggestion.kind;
+                            item.appendChild(badge);
+
+                            item.addEventListener('click', function() {
+                                searchInput.value = suggestion.label;
+                                suggestionList.innerHTML = '';
+                                searchForm.requestSubmit();
+                            });
+                            suggestionList.appendChild(item);
+                        });
+                    })
+                    .catch(error => {
+                        console.error('Error loading suggestions:', error);
+                    });
+            }, 80);
+        });
+
+        searchInput.addEventListener('blur', function() {
+            // Let a click on a suggestion land before hiding the list
+            setTimeout(function() { suggestionList.innerHTML = ''; }, 150);
+        });
+    }
+
+    // Audio source of the player: HLS rendition picked in the quality menu, or the original
+    initAudioQuality();
+
     // Music player functionality
     initMusicPlayer();
 
     // Filtering functionality
     initFiltering();
 
+    // Catalog sections load their next page as the user scrolls to the "Load more" button
+    initLoadMore();
+
+    // Waveform of the playing track, drawn from precomputed peaks
+    initWaveform();
+
     // Helper function to get CSRF token
     function getCsrfToken() {
         const cookieValue = document.cookie
@@ -539,10 +610,9 @@ document.addEventListener('DOMContentLoaded', function() {
         const currentTrackAlbum = document.getElementById('current-track-album');
 
         // Function to play a track and update play count
-        function playTrack(audioSrc, title, artist, album, trackId) {
+        function playTrack(track, title, artist, album, trackId) {
             // Update the audio player
-            audioPlayer.src = audioSrc;
-            audioPlayer.load();
+            loadTrackAudio(track);
             audioPlayer.play();
 
             // Update the now playing information
@@ -574,31 +644,29 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         }
 
-        // Add click event to all play buttons
-        document.querySelectorAll('.play-btn').forEach(button => {
-            button.addEventListener('click', function() {
-                const trackRow = this.closest('.track-row');
-                const audioSrc = trackRow.dataset.audio;
-                const title = trackRow.dataset.title;
-                const artist = trackRow.dataset.artist;
-                const album = trackRow.dataset.album;
-                const trackId = trackRow.dataset.id;
-
-                playTrack(audioSrc, title, artist, album, trackId);
-            });
+        // Add click event to all play buttons (delegated, rows are loaded as the user scrolls)
+        document.addEventListener('click', function(e) {
+            const button = e.target.closest('.play-btn');
+            if (!button) return;
+            const trackRow = button.closest('.track-row');
+            const title = trackRow.dataset.title;
+            const artist = trackRow.dataset.artist;
+            const album = trackRow.dataset.album;
+            const trackId = trackRow.dataset.id;
+
+            playTrack(trackRow, title, artist, album, trackId);
         });
 
         // Add click event to trending tracks
         document.querySelectorAll('.trending-track').forEach(track => {
             track.addEventListener('click', function(e) {
                 e.preventDefault();
-                const audioSrc = this.dataset.audio;
                 const title = this.dataset.title;
                 const artist = this.dataset.artist;
                 const album = this.dataset.album;
                 const trackId = this.dataset.id;
 
-                playTrack(audioSrc, title, artist, album, trackId);
+                playTrack(this, title, artist, album, trackId);
             });
         });
 
@@ -639,6 +707,219 @@ document.addEventListener('DOMContentLoaded', function() {
     // Load Pexels images when page loads
     loadPexelsImages();
 
+    // Initialize "load more" buttons of the keyset-paginated catalog sections
+    function initLoadMore() {
+        const buttons = document.querySelectorAll('.load-more');
+        if (!buttons.length) return;
+
+        function loadMore(button) {
+            if (button.disabled) return;
+            button.disabled = true;
+            const target = document.querySelector(button.dataset.target);
+            const params = new URLSearchParams({
+                after: button.dataset.next,
+                offset: target.children.length
+            });
+
+            fetch(`${button.dataset.url}?${params}`)
+                .then(response => response.json())
+                .then(data => {
+                    if (!data.success) {
+                        throw new Error(data.message);
+                    }
+                    target.insertAdjacentHTML('beforeend', data.html);
+                    document.dispatchEvent(new CustomEvent('catalog:loaded'));
+                    if (data.next) {
+                        button.dataset.next = data.next;
+                        button.disabled = false;
+                    } else {
+                        observer && observer.unobserve(button);
+                        button.parentNode.remove();
+                    }
+                })
+                .catch(error => {
+                    console.error('Error loading more items:', error);
+                    button.disabled = false;
+                });
+        }
+
+        const observer = 'IntersectionObserver' in window
+            ? new IntersectionObserver(entries => {
+                entries.forEach(entry => {
+                    if (entry.isIntersecting) loadMore(entry.target);
+                });
+            }, { rootMargin: '200px' })
+            : null;
+
+        buttons.forEach(button => {
+            button.addEventListener('click', () => loadMore(button));
+            if (observer) observer.observe(button);
+        });
+    }
+
+    // Draw the waveform of the playing track and seek by clicking it
+    // Tracks with an HLS ladder (see music_beta/transcode.py) play the master
+    // playlist, so the player adapts to the connection, or the single rendition
+    // picked in #audio-quality. The original file is only loaded when
+    // "Original" is picked, or when there is no ladder or no way to play HLS.
+    function initAudioQuality() {
+        const audioPlayer = document.getElementById('audio-player');
+        const select = document.getElementById('audio-quality');
+        let hls = null;
+        let current = null;
+
+        function nativeHls() {
+            return audioPlayer.canPlayType('application/vnd.apple.mpegurl') !== '';
+        }
+
+        function sourceUrl(track) {
+            const quality = select ? select.value : 'auto';
+            const playable = nativeHls() || (window.Hls && Hls.isSupported());
+            if (!track.hls || quality === 'original' || !playable) return track.audio;
+            return quality === 'auto' ? track.hls : `${track.hls}?kbps=${quality}`;
+        }
+
+        function updateOptions(track) {
+            if (!select) return;
+            const previous = select.value;
+            const renditions = track.renditions ? track.renditions.split(',') : [];
+            select.querySelectorAll('option[data-rendition]').forEach(option => option.remove());
+            renditions.forEach(kbps => {
+                const option = new Option(`${kbps} kbps`, kbps);
+                option.dataset.rendition = kbps;
+                select.insertBefore(option, select.querySelector('option[value="original"]'));
+            });
+            // Keep the listener's choice when the next track has it too
+            select.value = Array.from(select.options).some(option => option.value === previous) ? previous : 'auto';
+            select.disabled = renditions.length === 0;
+        }
+
+        function load(track, startAt) {
+            const url = sourceUrl(track);
+            if (hls) {
+                hls.destroy();
+                hls = null;
+            }
+            if (url !== track.audio && !nativeHls()) {
+                hls = new Hls();
+                hls.loadSource(url);
+                hls.attachMedia(audioPlayer);
+            } else {
+                audioPlayer.src = url;
+                audioPlayer.load();
+            }
+            if (startAt) {
+                audioPlayer.addEventListener('loadedmetadata', function() {
+                    audioPlayer.currentTime = startAt;
+                }, { once: true });
+            }
+        }
+
+        // Used by the play handlers here and in the music platform template
+        window.loadTrackAudio = function(element) {
+            if (!audioPlayer) return;
+            current = element.dataset;
+            updateOptions(current);
+            load(current, 0);
+        };
+
+        if (!audioPlayer || !select) return;
+        select.addEventListener('change', function() {
+            if (!current) return;
+            const playing = !audioPlayer.paused;
+            load(current, audioPlayer.currentTime);
+            if (playing) audioPlayer.play();
+        });
+    }
+
+    function initWaveform() {
+        const canvas = document.getElementById('waveform');
+        const audioPlayer = document.getElementById('audio-player');
+        if (!canvas || !audioPlayer) return;
+
+        const context = canvas.getContext('2d');
+        let peaks = null;
+        let hoverX = null;
+
+        // Blob format (see music_beta/utils.py waveform_peaks): one byte with the
+        // sample size in bits, then a (min, max) pair per bucket as int8 or int16
+        function unpack(buffer) {
+            const bits = new DataView(buffer).getUint8(0);
+            const values = bits === 16
+                ? new Int16Array(buffer.slice(1))
+                : new Int8Array(buffer, 1);
+            const scale = bits === 16 ? 32767 : 127;
+            return Array.from(values, value => value / scale);
+        }
+
+        function draw() {
+            const width = canvas.width = canvas.clientWidth * window.devicePixelRatio;
+            const height = canvas.height;
+            context.clearRect(0, 0, width, height);
+            if (!peaks) return;
+
+            const buckets = peaks.length / 2;
+            const played = audioPlayer.duration ? audioPlayer.currentTime / audioPlayer.duration : 0;
+            const middle = height / 2;
+            for (let x = 0; x < width; x++) {
+                const bucket = Math.floor(x / width * buckets);
+                const low = peaks[bucket * 2];
+                const high = peaks[bucket * 2 + 1];
+                if (hoverX !== null && x <= hoverX) {
+                    context.fillStyle = x / width < played ? '#0a58ca' : '#9ec5fe';
+                } else {
+                    context.fillStyle = x / width < played ? '#0d6efd' : '#adb5bd';
+                }
+                context.fillRect(x, middle - high * middle, 1, Math.max((high - low) * middle, 1));
+            }
+        }
+
+        function load(url) {
+            peaks = null;
+            canvas.classList.add('d-none');
+            if (!url) return;
+            fetch(url)
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    return response.arrayBuffer();
+                })
+                .then(buffer => {
+                    peaks = unpack(buffer);
+                    canvas.classList.remove('d-none');
+                    draw();
+                })
+                .catch(error => console.error('Error loading waveform:', error));
+        }
+
+        // Pick up the waveform of whatever started playing (delegated, rows are loaded as the user scrolls)
+        document.addEventListener('click', function(e) {
+            const source = e.target.closest('.play-btn') ? e.target.closest('.track-row') : e.target.closest('.trending-track');
+            if (source) load(source.dataset.waveform);
+        });
+
+        canvas.addEventListener('mousemove', function(e) {
+            const rect = canvas.getBoundingClientRect();
+            hoverX = (e.clientX - rect.left) * window.devicePixelRatio;
+            if (audioPlayer.duration) {
+                const seconds = Math.floor((e.clientX - rect.left) / rect.width * audioPlayer.duration);
+                canvas.title = `${Math.floor(seconds / 60)}:${String(seconds % 60).padStart(2, '0')}`;
+            }
+            draw();
+        });
+        canvas.addEventListener('mouseleave', function() {
+            hoverX = null;
+            draw();
+        });
+        canvas.addEventListener('click', function(e) {
+            const rect = canvas.getBoundingClientRect();
+            if (audioPlayer.duration) {
+                audioPlayer.currentTime = (e.clientX - rect.left) / rect.width * audioPlayer.duration;
+            }
+        });
+        audioPlayer.addEventListener('timeupdate', draw);
+        window.addEventListener('resize', draw);
+    }
+
     // Initialize filtering functionality
     function initFiltering() {
         // Current filter state
@@ -647,11 +928,15 @@ document.addEventListener('DOMContentLoaded', function() {
             artist: 'all'
         };
 
-        // Genre filtering
-        document.querySelectorAll('.genre-filter').forEach(link => {
-            link.addEventListener('click', function(e) {
+        // Filter links and genre badges are delegated, more of them are loaded as the user scrolls
+        document.addEventListener('click', function(e) {
+            const genreLink = e.target.closest('.genre-filter');
+            const artistLink = e.target.closest('.artist-filter');
+            const badge = e.target.closest('.genre-badge');
+
+            if (genreLink) {
                 e.preventDefault();
-                const genre = this.getAttribute('data-genre');
+                const genre = genreLink.getAttribute('data-genre');
                 currentFilters.genre = genre;
                 applyFilters();
                 showToast(`Filtered by genre: ${genre}`, 'info');
@@ -660,15 +945,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 document.querySelectorAll('.genre-filter').forEach(el => {
                     el.classList.remove('fw-bold', 'text-primary');
                 });
-                this.classList.add('fw-bold', 'text-primary');
-            });
-        });
-
-        // Artist filtering
-        document.querySelectorAll('.artist-filter').forEach(link => {
-            link.addEventListener('click', function(e) {
+                genreLink.classList.add('fw-bold', 'text-primary');
+            } else if (artistLink) {
                 e.preventDefault();
-                const artist = this.getAttribute('data-artist');
+                const artist = artistLink.getAttribute('data-artist');
                 currentFilters.artist = artist;
                 applyFilters();
                 showToast(`Filtered by artist: ${artist}`, 'info');
@@ -677,16 +957,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 document.querySelectorAll('.artist-filter').forEach(el => {
                     el.classList.remove('fw-bold', 'text-primary');
                 });
-                this.classList.add('fw-bold', 'text-primary');
-            });
-        });
-
-        // Genre badge filtering
-        document.querySelectorAll('.genre-badge').forEach(badge => {
-            badge.style.cursor = 'pointer';
-            badge.addEventListener('click', function(e) {
+                artistLink.classList.add('fw-bold', 'text-primary');
+            } else if (badge) {
                 e.preventDefault();
-                const genre = this.getAttribute('data-genre');
+                const genre = badge.getAttribute('data-genre');
                 currentFilters.genre = genre;
                 applyFilters();
                 showToast(`Filtered by genre: ${genre}`, 'info');
@@ -698,9 +972,12 @@ document.addEventListener('DOMContentLoaded', function() {
                         el.classList.add('fw-bold', 'text-primary');
                     }
                 });
-            });
+            }
         });
 
+        // Apply the current filters to items appended by "load more"
+        document.addEventListener('catalog:loaded', applyFilters);
+
         // Apply filters to albums and tracks
         function applyFilters() {
             // Filter albums
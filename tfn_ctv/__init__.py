@@ -0,0 +1,3 @@
+# Apply SQLITE_PRAGMAS to every new database connection (see tfn_ctv/sqlite.py). Imported with the settings, so the
+# hook is connected before any connection opens, whichever apps are installed.
+from . import sqlite  # noqa: F401
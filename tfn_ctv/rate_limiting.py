@@ -4,79 +4,145 @@
 #  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
 #  Vestibulum commodo. Ut rhoncus gravida arcu.
 
-from django.core.cache import cache
-from django.http import HttpResponseForbidden
+from collections import namedtuple
+import math
 import time
 
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+
+# One limit: requests with one of `methods` to a path starting with `prefix`
+# are allowed `requests` times per `period` seconds per client
+RateLimit = namedtuple('RateLimit', ['prefix', 'methods', 'requests', 'period'])
+
+# Used when settings.RATE_LIMITS is not set
+DEFAULT_RATE_LIMITS = [
+    ('/music/signup/', ['POST'], 5, 60),
+    ('/music/upload-ad-campaign/', ['POST'], 5, 60),
+]
+
+# Cache backends whose add() and incr() are atomic. Others (the file and
+# database caches) read, change and write the value back, so concurrent
+# requests lose increments.
+ATOMIC_CACHE_BACKENDS = (LocMemCache, BaseMemcachedCache, RedisCache)
+
+
+def sliding_window_hit(key, limit, period, now=None):
+    """
+    Count a request against a sliding-window limit.
+
+    The window is approximated with two fixed-window counters: the current
+    window's count plus the previous window's count weighted by how much of
+    it the sliding window still covers. The current counter is created with
+    cache.add() and incremented with cache.incr(), so concurrent requests
+    can't lose updates as long as the default cache is one of
+    ATOMIC_CACHE_BACKENDS. Rejected requests count too.
+
+    Args:
+        key (str): Cache key prefix of the client and route
+        limit (int): Requests allowed per period
+        period (int): Window length in seconds
+        now (float): Current time, defaults to time.time()
+
+    Returns:
+        tuple: (allowed, retry_after), retry_after being the seconds until
+        the request would be allowed, 0 if it is
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    current = f'{key}:{int(window)}'
+
+    # The counter must outlive its window; the next window weights it
+    cache.add(current, 0, timeout=period * 2)
+    try:
+        count = cache.incr(current)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.add(current, 1, timeout=period * 2)
+        count = 1
+    previous = cache.get(f'{key}:{int(window) - 1}', 0)
+
+    overlap = 1 - elapsed / period
+    if previous * overlap + count <= limit:
+        return True, 0
+
+    if count > limit:
+        # Not before the next window, where this window's count starts to decay
+        retry_after = period - elapsed
+    else:
+        # When enough of the previous window has slid out
+        retry_after = (overlap - (limit - count) / previous) * period
+    return False, max(math.ceil(retry_after), 1)
+
+
 class RateLimitMiddleware:
     """
-    Middleware to implement rate limiting for form submissions.
-    
-    This middleware checks if a user (identified by IP address) has exceeded
-    the allowed number of requests within a specified time window.
+    Middleware to implement rate limiting for form submissions and API calls.
+
+    Each request is matched against settings.RATE_LIMITS, a list of
+    (path prefix, methods, requests, period) tuples; the first match applies.
+    A client (identified by IP address) that exceeds the allowed number of
+    requests for the route within the sliding window gets a 429 response.
+
+    Counters live in the default cache, which must be one of
+    ATOMIC_CACHE_BACKENDS. With the per-process LocMemCache each process
+    enforces the limits on its own; Memcached or Redis share them.
+
+    Raises:
+        ImproperlyConfigured: If limits are set and the default cache can't
+            count atomically
     """
-    
+
     def __init__(self, get_response):
         self.get_response = get_response
-        
+        self.limits = [RateLimit(prefix, frozenset(methods), requests, period)
+                       for prefix, methods, requests, period
+                       in getattr(settings, 'RATE_LIMITS', DEFAULT_RATE_LIMITS)]
+        backend = caches['default']
+        if self.limits and not isinstance(backend, ATOMIC_CACHE_BACKENDS):
+            raise ImproperlyConfigured(
+                'RATE_LIMITS needs a default cache that counts atomically (locmem, Memcached or Redis), '
+                f'not {type(backend).__name__}; set RATE_LIMITS = [] to disable rate limiting')
+
     def __call__(self, request):
-        # Only apply rate limiting to POST requests to specific paths
-        if request.method == 'POST' and self._should_rate_limit(request.path):
-            client_ip = self._get_client_ip(request)
-            
-            # Create a cache key based on the IP and path
-            cache_key = f"ratelimit:{client_ip}:{request.path}"
-            
-            # Get the current timestamp
-            now = time.time()
-            
-            # Get the list of timestamps for this IP and path
-            request_times = cache.get(cache_key, [])
-            
-            # Remove timestamps older than the time window (1 minute)
-            time_window = 60  # 1 minute in seconds
-            request_times = [t for t in request_times if now - t < time_window]
-            
-            # Check if the number of requests exceeds the limit
-            max_requests = 5  # Maximum 5 requests per minute
-            if len(request_times) >= max_requests:
-                return HttpResponseForbidden("Too many requests. Please try again later.")
-            
-            # Add the current timestamp to the list
-            request_times.append(now)
-            
-            # Store the updated list in the cache
-            cache.set(cache_key, request_times, timeout=time_window)
-        
+        index, limit = self._match(request)
+        if limit is not None:
+            # One counter per client and rule
+            key = f"ratelimit:{index}:{self._get_client_ip(request)}"
+            allowed, retry_after = sliding_window_hit(key, limit.requests, limit.period)
+            if not allowed:
+                response = HttpResponse("Too many requests. Please try again later.", status=429,
+                                        content_type='text/plain')
+                response['Retry-After'] = str(retry_after)
+                return response
+
         # Process the request normally
         return self.get_response(request)
-    
-    def _should_rate_limit(self, path):
+
+    def _match(self, request):
         """
-        Determine if the given path should be rate limited.
-        
-        Currently, we rate limit:
-        - Contact form submissions
-        - Signup form submissions
-        - Any other form submissions
+        Return the index and the first rate limit that applies to the request,
+        or (None, None).
         """
-        rate_limited_paths = [
-            '/contact/',
-            '/signup/',
-            '/upload-ad-campaign/',
-        ]
-        
-        return any(path.startswith(p) for p in rate_limited_paths)
-    
+        for index, limit in enumerate(self.limits):
+            if request.method in limit.methods and request.path.startswith(limit.prefix):
+                return index, limit
+        return None, None
+
     def _get_client_ip(self, request):
         """
         Get the client's IP address from the request.
-        
+
         This handles cases where the request is behind a proxy.
         """
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
+            ip = x_forwarded_for.split(',')[0].strip()
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
@@ -0,0 +1,90 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler
+from django.utils.module_loading import import_string
+
+
+class MiddlewareChain(BaseHandler):
+    """
+    A request handler running its own list of middleware instead of
+    settings.MIDDLEWARE.
+
+    The chain is built once, the way Django builds MIDDLEWARE, so the
+    process_view, process_exception and process_template_response hooks of
+    the listed middleware run as usual. Only synchronous handling (WSGI) is
+    supported.
+
+    Args:
+        middleware (list): Dotted paths of the middleware, outermost first
+    """
+
+    def __init__(self, middleware):
+        self.middleware = list(middleware)
+        self.load_middleware()
+
+    def load_middleware(self, is_async=False):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = convert_exception_to_response(self._get_response)
+        for middleware_path in reversed(self.middleware):
+            middleware = import_string(middleware_path)
+            if not getattr(middleware, 'sync_capable', True):
+                raise ImproperlyConfigured(f"Middleware {middleware_path} can't run synchronously")
+            try:
+                mw_instance = middleware(handler)
+            except MiddlewareNotUsed:
+                continue
+
+            if hasattr(mw_instance, 'process_view'):
+                self._view_middleware.insert(0, self.adapt_method_mode(False, mw_instance.process_view))
+            if hasattr(mw_instance, 'process_template_response'):
+                self._template_response_middleware.append(
+                    self.adapt_method_mode(False, mw_instance.process_template_response))
+            if hasattr(mw_instance, 'process_exception'):
+                self._exception_middleware.append(self.adapt_method_mode(False, mw_instance.process_exception))
+
+            handler = convert_exception_to_response(mw_instance)
+        self._middleware_chain = handler
+
+
+class RoutedWSGIHandler(WSGIHandler):
+    """
+    WSGI handler that sends some paths through a lean middleware chain.
+
+    settings.MIDDLEWARE_ROUTES lists (path prefixes, middleware) pairs. A
+    request whose path starts with one of a route's prefixes only runs that
+    route's middleware, so e.g. API calls and audio streams skip the CMS
+    page, toolbar and language middleware and the message storage. Other
+    requests run the full MIDDLEWARE as usual.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.routes = [(tuple(prefixes), MiddlewareChain(middleware))
+                       for prefixes, middleware in getattr(settings, 'MIDDLEWARE_ROUTES', [])]
+
+    def chain_for(self, path):
+        """
+        Return the handler of the first route matching a path, or None for
+        the full MIDDLEWARE.
+        """
+        for prefixes, chain in self.routes:
+            if path.startswith(prefixes):
+                return chain
+        return None
+
+    def get_response(self, request):
+        chain = self.chain_for(request.path_info)
+        if chain is None:
+            return super().get_response(request)
+        return chain.get_response(request)
@@ -0,0 +1,84 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+"""
+Session engines that only write sessions whose data changed.
+
+Django saves a session whenever it was assigned to, even if the value is the
+one it already held: logging in again as the same user, or the CMS toolbar
+re-setting 'cms_toolbar_disabled' on every edit-mode page, each cost an
+UPDATE of the session row. These engines keep the serialized data as it was
+loaded and skip the save when the data about to be written is identical.
+New sessions, new keys (cycle_key) and flushed sessions are saved as usual.
+
+- tfn_ctv.sessions.db: database sessions, like Django's db engine.
+- tfn_ctv.sessions.cached_db: reads go through the cache first, like
+  Django's cached_db engine, so an authenticated page view normally touches
+  neither the session table nor, unless the data changes, the cache. Only
+  use it with a default cache shared by every process: with a per-process
+  cache, a session logged out or flushed in one process stays valid in the
+  others until its cache entry expires.
+
+settings.SESSION_ENGINE is picked by default_engine(), which only chooses
+cached_db for Redis and Memcached. Those are shared and answer a read faster
+than the session table; the file and database caches are shared too, but
+reading through them costs more than the query they save.
+"""
+
+# Cache backends that are shared by every process and cheap to read
+SHARED_CACHE_BACKENDS = [
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+]
+
+
+def default_engine(cache_backend):
+    """
+    Return the session engine to use with a default cache backend.
+
+    Args:
+        cache_backend (str): Dotted path of the default cache's BACKEND
+
+    Returns:
+        str: 'tfn_ctv.sessions.cached_db' for a shared, cheap cache,
+        'tfn_ctv.sessions.db' otherwise
+    """
+    if cache_backend in SHARED_CACHE_BACKENDS:
+        return 'tfn_ctv.sessions.cached_db'
+    return 'tfn_ctv.sessions.db'
+
+
+class UnchangedSkippingMixin:
+    """
+    Session store mixin skipping saves that would write the loaded data back.
+    """
+
+    _loaded_data = None
+
+    def _snapshot(self, data):
+        # Compare serialized data, so in-place changes to nested values are seen
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._loaded_data = self._snapshot(data)
+        return data
+
+    def is_unchanged(self):
+        """
+        Return True if the session exists and holds the data it was loaded with.
+        """
+        if self.session_key is None or self._loaded_data is None:
+            return False
+        return self._snapshot(self._get_session()) == self._loaded_data
+
+    def save(self, must_create=False):
+        if not must_create and self.is_unchanged():
+            return
+        super().save(must_create=must_create)
+        self._loaded_data = self._snapshot(self._get_session(no_load=True))
+
@@ -0,0 +1,17 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from django.contrib.sessions.backends import cached_db
+
+from . import UnchangedSkippingMixin
+
+
+class SessionStore(UnchangedSkippingMixin, cached_db.SessionStore):
+    """
+    Cache-backed database sessions, written only when their data changes.
+
+    Needs a default cache shared by every process (see tfn_ctv/sessions/__init__.py).
+    """
@@ -16,6 +16,8 @@ import os
 import dotenv
 from dotenv import load_dotenv
 
+from tfn_ctv.sessions import default_engine
+
 # Load environment variables from .env file
 try:
     load_dotenv()
@@ -103,6 +105,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'music_beta.session_user.SessionUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -116,6 +119,47 @@ MIDDLEWARE = [
     'cms.middleware.language.LanguageCookieMiddleware',
 ]
 
+# Lean middleware chains (see tfn_ctv/routing.py): requests whose path starts with one of the prefixes run only the
+# listed middleware instead of MIDDLEWARE. Applied by tfn_ctv.wsgi; compare with `python manage.py benchmark_middleware`.
+MIDDLEWARE_ROUTES = [
+    # JSON API: DRF's SessionAuthentication needs the session and user, and checks CSRF itself
+    (['/music/api/'], [
+        'django.middleware.security.SecurityMiddleware',
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'music_beta.session_user.SessionUserMiddleware',
+        'tfn_ctv.rate_limiting.RateLimitMiddleware',
+    ]),
+    # Audio, waveforms, playlists, the catalog manifest, static and media files
+    (['/music/music/stream/', '/music/music/waveform/', '/music/music/hls/', '/music/music/manifest/',
+      '/static/', '/media/'], [
+        'django.middleware.security.SecurityMiddleware',
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'tfn_ctv.rate_limiting.RateLimitMiddleware',
+    ]),
+    (['/health/'], [
+        'django.middleware.security.SecurityMiddleware',
+    ]),
+]
+
+# The default cache only holds data that can be rebuilt: copies of the version counters (kept in the database, see
+# music_beta/catalog.py), cached users and sessions, and the rate limit counters. Each process has its own LocMemCache
+# unless DJANGO_CACHE_BACKEND selects a shared one, e.g. django.core.cache.backends.redis.RedisCache with
+# DJANGO_CACHE_LOCATION=redis://127.0.0.1:6379, which spreads changes and rate limits across processes.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+
+# Seconds a process serves the catalog, model and session user version counters from the cache before reading them
+# from the database again (see music_beta/catalog.py). Bounds how long other processes take to see a change when the
+# cache is not shared.
+VERSION_COUNTER_CACHE_TIMEOUT = 1
+
 ROOT_URLCONF = 'tfn_ctv.urls'
 
 TEMPLATES = [
@@ -150,9 +194,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so concurrent transactions wait on busy_timeout
+            # instead of failing with "database is locked" when they try to upgrade a read lock
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# PRAGMAs run on every new SQLite connection (see tfn_ctv/sqlite.py). Measure with `python manage.py benchmark_sqlite`.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',  # Readers don't block writers and writers don't block readers
+    'synchronous': 'normal',  # Safe with WAL; a power loss may undo commits since the last checkpoint
+    'mmap_size': 256 * 1024 * 1024,  # Bytes of the database file read through a memory map
+    'cache_size': -64 * 1024,  # Page cache size; negative values are in KiB
+    'busy_timeout': 5000,  # Milliseconds to wait for a lock before raising "database is locked"
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -266,6 +324,90 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Background audio analysis queue (see music_beta/jobs.py)
+ANALYSIS_JOB_MAX_ATTEMPTS = 3  # Attempts before a job is marked failed
+ANALYSIS_JOB_VISIBILITY_TIMEOUT = 300  # Seconds a claimed job is hidden from other workers
+ANALYSIS_JOB_RETRY_DELAY = 30  # Base backoff in seconds, doubled on every retry
+
+# Audio analysis mode: 'full' decodes whole tracks, 'excerpt' decodes a few
+# short windows at a lower sample rate and combines their BPM/key estimates.
+# Compare the two with `python manage.py compare_analysis_modes <reference files>`.
+AUDIO_ANALYSIS_MODE = os.environ.get('AUDIO_ANALYSIS_MODE', 'full')
+AUDIO_EXCERPT_WINDOWS = 3  # Number of windows decoded per track
+AUDIO_EXCERPT_SECONDS = 30  # Length of each window
+AUDIO_EXCERPT_SAMPLE_RATE = 11025  # Sample rate the windows are decoded at
+
+# Analysis results cached by SHA-256 of the audio bytes (see music_beta/analysis_cache.py)
+# Set AUDIO_ANALYSIS_CACHE_DIR to None to disable the cache
+AUDIO_ANALYSIS_CACHE_DIR = BASE_DIR / 'cache' / 'audio_analysis'
+AUDIO_ANALYSIS_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Least recently used entries are evicted past this size
+
+# Waveform peaks computed during analysis and drawn by the player (see music_beta/utils.py waveform_peaks)
+WAVEFORM_PEAKS = 1000  # (min, max) pairs per track
+WAVEFORM_BITS = 8  # 8 (int8, 2 KB per track) or 16 (int16, 4 KB per track)
+
+# Buffered play counting (see music_beta/plays.py). A crashed process loses at
+# most PLAY_COUNT_MAX_PENDING - 1 plays; set it to 1 to write every play through.
+PLAY_COUNT_MAX_PENDING = 100  # Plays buffered per process before a flush
+PLAY_COUNT_FLUSH_INTERVAL = 5  # Seconds after which the next play flushes the buffer
+
+# Catalog API cursor pagination (see music_beta/pagination.py)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200  # Upper bound for ?page_size=
+
+# Catalog change feed /music/api/changes/ (see music_beta/changes.py)
+# Compact the log periodically with `python manage.py compact_catalog_changes`
+CATALOG_CHANGES_RETENTION_DAYS = 30  # Clients offline longer than this must resync
+CATALOG_CHANGES_SETTLE_SECONDS = 1  # Newest entries held back so out-of-order commits are not skipped
+
+# Compressed catalog manifest /music/api/manifest/ (see music_beta/manifest.py)
+# Rebuilt on demand, or ahead of time with `python manage.py build_catalog_manifest`
+CATALOG_MANIFEST_DIR = 'manifests'  # Directory in the default storage (MEDIA_ROOT) holding the manifests
+
+# Image derivatives and placeholders (see music_beta/images.py); needs Pillow
+# Backfill existing uploads with `python manage.py generate_image_derivatives`
+IMAGE_DERIVATIVE_DIR = 'derivatives'  # Directory in the default storage (MEDIA_ROOT) holding the derivatives
+IMAGE_DERIVATIVE_QUALITY = 80  # WebP/JPEG quality of the derivatives
+
+# Audio streaming /music/stream/<track_id>/ (see music_beta/streaming.py)
+# Behind nginx, set 'x-accel-redirect' and map AUDIO_STREAM_ACCEL_PREFIX to MEDIA_ROOT as an internal location;
+# behind Apache/lighttpd with mod_xsendfile, set 'x-sendfile'
+AUDIO_STREAM_OFFLOAD = None  # None streams from Django with memory-mapped reads
+AUDIO_STREAM_ACCEL_PREFIX = '/protected-media/'
+
+# HLS transcoding ladder (see music_beta/transcode.py), encoded after analysis by process_analysis_jobs
+# Needs ffmpeg; backfill existing tracks with `python manage.py transcode_library`
+AUDIO_HLS_LADDER = [64, 128, 256]  # AAC rendition bitrates in kbps; rungs above the source bitrate are skipped
+AUDIO_HLS_SEGMENT_SECONDS = 6  # Segment length of the media playlists
+AUDIO_HLS_DIR = 'hls'  # Directory in the default storage (MEDIA_ROOT) holding the renditions
+AUDIO_TRANSCODER = 'ffmpeg'  # Encoder executable, looked up on PATH
+
+# Rate limits (see tfn_ctv/rate_limiting.py): (path prefix, methods, requests, period in seconds) per client IP.
+# The first matching entry applies. Counters live in the default cache (see CACHES), which must count atomically:
+# locmem (limits per process), Memcached or Redis (limits shared by all processes).
+RATE_LIMITS = [
+    ('/music/signup/', ['POST'], 5, 60),
+    ('/music/login/', ['POST'], 10, 60),
+    ('/music/upload-ad-campaign/', ['POST'], 5, 60),
+    ('/music/service-request/', ['POST'], 5, 60),
+    ('/music/legal/copyright_request/', ['POST'], 5, 60),
+    ('/music/update-play-count/', ['POST'], 60, 60),
+    ('/music/api/', ['POST', 'PUT', 'PATCH', 'DELETE'], 30, 60),
+    ('/music/api/', ['GET', 'HEAD'], 600, 60),
+]
+
+# Session user cache (see music_beta/session_user.py): the logged-in user is loaded once per request and cached
+# for this many seconds. Saving or deleting a user invalidates its entry in every process within
+# VERSION_COUNTER_CACHE_TIMEOUT.
+SESSION_USER_CACHE_TIMEOUT = 60
+
+# Sessions (see tfn_ctv/sessions/): database sessions, saved only when their data changes. With Redis or Memcached as
+# the default cache they are read through it; with any other cache, a logout in one process might not reach the others
+# or the cache would cost more than the query, so they are read from the database. Set
+# DJANGO_SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies to keep sessions in a signed (readable, not
+# encrypted) cookie instead, with no session table at all. Compare with `python manage.py benchmark_sessions`.
+SESSION_ENGINE = os.environ.get('DJANGO_SESSION_ENGINE', default_engine(CACHES['default']['BACKEND']))
+
 # Custom User model
 AUTH_USER_MODEL = 'music_beta.User'
 
@@ -0,0 +1,69 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+"""
+PRAGMAs applied to every new SQLite connection.
+
+With SQLite's default rollback journal a write locks out readers until it
+commits, so page views queue up behind play-count flushes and uploads. The
+SQLITE_PRAGMAS setting lists the PRAGMAs that configure_sqlite runs when a
+connection is opened, by default:
+
+- journal_mode=wal: readers see the last commit while a write is going on,
+  and a write doesn't wait for readers.
+- synchronous=normal: in WAL mode, commits are not fsynced until a
+  checkpoint. The database stays consistent, but a power loss can undo the
+  last few commits.
+- mmap_size and cache_size: read pages through a memory map and keep more
+  of them in the page cache.
+- busy_timeout: wait this many milliseconds for a lock before failing with
+  "database is locked".
+
+The hook is connected when the tfn_ctv package is imported, which loading
+its settings does, so it doesn't depend on any installed app. Compare the
+defaults with these PRAGMAs under load with
+`python manage.py benchmark_sqlite`.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMA_VALUE = re.compile(r'-?\w+')
+
+
+def pragma_statements(pragmas):
+    """
+    Build the PRAGMA statements for a mapping of names to values.
+
+    Args:
+        pragmas (dict): PRAGMA values by name, e.g. {'journal_mode': 'wal'}
+
+    Returns:
+        list: The statements, in the order of the mapping
+
+    Raises:
+        ImproperlyConfigured: If a name or value is not a plain word or number
+    """
+    statements = []
+    for name, value in pragmas.items():
+        # PRAGMAs don't take query parameters, so only allow values that can't change the statement
+        if not name.isidentifier() or not PRAGMA_VALUE.fullmatch(str(value)):
+            raise ImproperlyConfigured(f'Invalid SQLite PRAGMA in SQLITE_PRAGMAS: {name}={value!r}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS to a newly opened SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(getattr(settings, 'SQLITE_PRAGMAS', {})):
+            cursor.execute(statement)
@@ -0,0 +1,101 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .rate_limiting import RateLimitMiddleware, sliding_window_hit
+
+RATE_LIMITS = [
+    ('/music/signup/', ['POST'], 3, 60),
+    ('/music/api/', ['POST', 'PUT', 'PATCH', 'DELETE'], 2, 60),
+    ('/music/api/', ['GET', 'HEAD'], 4, 60),
+]
+
+
+class SlidingWindowTest(SimpleTestCase):
+    """Test case for the sliding-window counter."""
+
+    def setUp(self):
+        """Start from empty counters."""
+        cache.clear()
+
+    def test_limit_within_window(self):
+        """Test that requests past the limit are rejected until the next window."""
+        results = [sliding_window_hit('test', 3, 60, now=6000 + i) for i in range(4)]
+        self.assertEqual(results[:3], [(True, 0)] * 3)
+        self.assertEqual(results[3], (False, 57))
+
+    def test_previous_window_is_weighted(self):
+        """Test that the previous window counts by how much of it still overlaps."""
+        for _ in range(4):
+            sliding_window_hit('test', 4, 60, now=6030)
+        # A quarter into the next window, 3 of the previous 4 requests still count
+        self.assertEqual(sliding_window_hit('test', 4, 60, now=6075), (True, 0))
+        allowed, retry_after = sliding_window_hit('test', 4, 60, now=6075)
+        self.assertFalse(allowed)
+        # Allowed again once half of the previous window has slid out
+        self.assertEqual(retry_after, 15)
+        # Three quarters in, only one of them counts
+        self.assertTrue(sliding_window_hit('test', 4, 60, now=6105)[0])
+
+    def test_concurrent_requests_are_counted_once(self):
+        """Test that concurrent requests can't exceed the limit."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: sliding_window_hit('test', 50, 60, now=6000)[0], range(200)))
+        self.assertEqual(results.count(True), 50)
+        self.assertEqual(cache.get('test:100'), 200)
+
+
+@override_settings(RATE_LIMITS=RATE_LIMITS)
+class RateLimitMiddlewareTest(SimpleTestCase):
+    """Test case for the per-route rate limits."""
+
+    def setUp(self):
+        """Set up the middleware with empty counters."""
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse('ok'))
+
+    def statuses(self, method, path, count, ip='10.0.0.1'):
+        request = getattr(self.factory, method)
+        return [self.middleware(request(path, REMOTE_ADDR=ip)).status_code for _ in range(count)]
+
+    def test_form_route(self):
+        """Test that form submissions get a 429 with Retry-After past the limit."""
+        self.assertEqual(self.statuses('post', '/music/signup/', 4), [200, 200, 200, 429])
+        response = self.middleware(self.factory.post('/music/signup/', REMOTE_ADDR='10.0.0.1'))
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # Other clients and unlimited routes and methods are not affected
+        self.assertEqual(self.statuses('post', '/music/signup/', 1, ip='10.0.0.2'), [200])
+        self.assertEqual(self.statuses('get', '/music/signup/', 5), [200] * 5)
+        self.assertEqual(self.statuses('post', '/music/search/', 5), [200] * 5)
+
+    def test_api_routes(self):
+        """Test that API writes and reads have their own limits."""
+        self.assertEqual(self.statuses('post', '/music/api/tracks/', 3), [200, 200, 429])
+        self.assertEqual(self.statuses('patch', '/music/api/albums/1/', 1), [429])
+        self.assertEqual(self.statuses('get', '/music/api/tracks/', 5), [200] * 4 + [429])
+
+    def test_forwarded_for(self):
+        """Test that the first X-Forwarded-For address identifies the client."""
+        for ip in ('10.0.0.3', '10.0.0.4'):
+            request = self.factory.post('/music/signup/', HTTP_X_FORWARDED_FOR=f'{ip}, 192.168.0.1')
+            self.assertEqual(self.middleware._get_client_ip(request), ip)
+
+    def test_requires_atomic_cache(self):
+        """Test that the limits refuse a cache whose increments can be lost."""
+        file_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                  'LOCATION': '/tmp/rate-limiting-test-cache'}}
+        with override_settings(CACHES=file_cache):
+            with self.assertRaises(ImproperlyConfigured):
+                RateLimitMiddleware(lambda request: HttpResponse('ok'))
+            with override_settings(RATE_LIMITS=[]):
+                RateLimitMiddleware(lambda request: HttpResponse('ok'))
@@ -0,0 +1,92 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+import json
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import path
+
+from .routing import MiddlewareChain, RoutedWSGIHandler
+from .views import health
+
+
+def middleware_seen(request):
+    return HttpResponse(json.dumps({'session': hasattr(request, 'session'), 'user': hasattr(request, 'user')}))
+
+
+def failing_view(request):
+    raise ValueError('view failed')
+
+
+class ExceptionMiddleware:
+    """Turns view exceptions into a 500 naming them."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        return HttpResponse(str(exception), status=500)
+
+
+urlpatterns = [
+    path('page/', middleware_seen),
+    path('api/', middleware_seen),
+    path('api/fail/', failing_view),
+    path('api/form/', middleware_seen),
+    path('health/', health),
+]
+
+FULL = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=FULL,
+    MIDDLEWARE_ROUTES=[
+        (['/api/'], ['tfn_ctv.test_routing.ExceptionMiddleware']),
+        (['/health/'], []),
+    ],
+)
+class RoutedWSGIHandlerTest(TestCase):
+    """Test case for the per-route middleware chains."""
+
+    def setUp(self):
+        """Set up the routed handler."""
+        self.factory = RequestFactory()
+        self.handler = RoutedWSGIHandler()
+
+    def seen(self, path):
+        return json.loads(self.handler.get_response(self.factory.get(path)).content)
+
+    def test_routes(self):
+        """Test that routed paths skip MIDDLEWARE and other paths run it"""
+        self.assertEqual(self.seen('/page/'), {'session': True, 'user': True})
+        self.assertEqual(self.seen('/api/'), {'session': False, 'user': False})
+        self.assertIsNone(self.handler.chain_for('/page/'))
+        self.assertIsInstance(self.handler.chain_for('/api/fail/'), MiddlewareChain)
+
+    def test_hooks(self):
+        """Test that view and exception hooks only run in their own chain"""
+        # CsrfViewMiddleware.process_view rejects the POST only in the full chain
+        self.assertEqual(self.handler.get_response(self.factory.post('/page/')).status_code, 403)
+        self.assertEqual(self.handler.get_response(self.factory.post('/api/form/')).status_code, 200)
+
+        response = self.handler.get_response(self.factory.get('/api/fail/'))
+        self.assertEqual((response.status_code, response.content), (500, b'view failed'))
+
+    def test_health(self):
+        """Test that the health check answers through an empty chain"""
+        response = self.handler.get_response(self.factory.get('/health/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {'status': 'ok'})
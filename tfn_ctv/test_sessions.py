@@ -0,0 +1,96 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from music_beta.management.commands.benchmark_sessions import session_queries
+
+from .sessions import cached_db, db, default_engine
+
+
+class SessionStoreTest(TestCase):
+    """Test case for the cached_db session engine skipping unchanged saves."""
+
+    store = cached_db.SessionStore
+
+    def setUp(self):
+        """Set up a saved session."""
+        cache.clear()
+        session = self.store()
+        session['user_id'] = 1
+        session['cart'] = [1, 2]
+        session.save()
+        self.key = session.session_key
+
+    def writes(self, change):
+        session = self.store(self.key)
+        with CaptureQueriesContext(connection) as queries:
+            change(session)
+            session.save()
+        return session_queries(queries)[1]
+
+    def test_unchanged_data_is_not_written(self):
+        """Test that assigning the stored values again skips the save"""
+        def assign(session):
+            session['user_id'] = 1
+            session['cart'] = [1, 2]
+
+        self.assertEqual(self.writes(assign), 0)
+
+    def test_changed_data_is_written(self):
+        """Test that new values and in-place changes are saved"""
+        def assign(session):
+            session['user_id'] = 2
+
+        def append(session):
+            session['cart'].append(3)
+            session.modified = True
+
+        self.assertEqual(self.writes(assign), 1)
+        self.assertEqual(self.writes(append), 1)
+        self.assertEqual(self.store(self.key).load(), {'user_id': 2, 'cart': [1, 2, 3]})
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_new_and_cycled_sessions_are_saved(self):
+        """Test that new sessions and new keys are created"""
+        session = self.store(self.key)
+        session.cycle_key()
+        self.assertNotEqual(session.session_key, self.key)
+        self.assertEqual(self.store(session.session_key).load(), {'user_id': 1, 'cart': [1, 2]})
+
+        session = self.store()
+        session['user_id'] = 3
+        session.save()
+        self.assertTrue(Session.objects.filter(session_key=session.session_key).exists())
+
+    def test_flush_is_seen_by_new_stores(self):
+        """Test that a flushed session no longer loads"""
+        self.store(self.key).flush()
+        self.assertEqual(self.store(self.key).load(), {})
+
+
+class DBSessionStoreTest(SessionStoreTest):
+    """Test case for the db session engine skipping unchanged saves."""
+
+    store = db.SessionStore
+
+
+class DefaultEngineTest(SimpleTestCase):
+    """Test case for picking the session engine from the default cache."""
+
+    def test_cached_db_only_with_shared_caches(self):
+        """Test that sessions are read through Redis and Memcached only"""
+        for backend in ['django.core.cache.backends.redis.RedisCache',
+                        'django.core.cache.backends.memcached.PyMemcacheCache']:
+            self.assertEqual(default_engine(backend), 'tfn_ctv.sessions.cached_db')
+        for backend in ['django.core.cache.backends.locmem.LocMemCache',
+                        'django.core.cache.backends.filebased.FileBasedCache',
+                        'django.core.cache.backends.db.DatabaseCache']:
+            self.assertEqual(default_engine(backend), 'tfn_ctv.sessions.db')
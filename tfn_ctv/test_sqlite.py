@@ -0,0 +1,51 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from unittest import skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .sqlite import configure_sqlite, pragma_statements
+
+
+class PragmaStatementsTest(SimpleTestCase):
+    """Test case for building the PRAGMA statements."""
+
+    def test_statements(self):
+        """Test that every setting becomes one PRAGMA, in order"""
+        self.assertEqual(pragma_statements({'journal_mode': 'wal', 'cache_size': -2000}),
+                         ['PRAGMA journal_mode = wal', 'PRAGMA cache_size = -2000'])
+
+    def test_invalid(self):
+        """Test that names and values that could change the statement are rejected"""
+        for pragmas in [{'journal_mode': 'wal; DROP TABLE x'}, {'cache size': 10}, {'mmap_size': '1 OR 1'}]:
+            with self.assertRaises(ImproperlyConfigured):
+                pragma_statements(pragmas)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+class ConfigureSQLiteTest(TestCase):
+    """Test case for the connection setup hook."""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def restore(self, pragmas):
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            configure_sqlite(sender=None, connection=connection)
+
+    def test_pragmas_are_applied(self):
+        """Test that the hook runs SQLITE_PRAGMAS on the connection"""
+        previous = {'cache_size': self.pragma('cache_size'), 'busy_timeout': self.pragma('busy_timeout')}
+        self.addCleanup(self.restore, previous)
+        with override_settings(SQLITE_PRAGMAS={'cache_size': -1234, 'busy_timeout': 2500}):
+            configure_sqlite(sender=None, connection=connection)
+        self.assertEqual(self.pragma('cache_size'), -1234)
+        self.assertEqual(self.pragma('busy_timeout'), 2500)
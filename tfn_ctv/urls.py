@@ -22,7 +22,10 @@ from django.conf.urls.static import static
 from rest_framework import routers, serializers, viewsets
 from django.conf.urls.i18n import i18n_patterns
 
+from .views import health
+
 urlpatterns = [
+    path('health/', health, name='health'),
     path('admin/', admin.site.urls),
     path('music/', include('music_beta.urls')),
 ]
@@ -0,0 +1,23 @@
+#  Copyright (c) 2025. Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+#  Morbi non lorem porttitor neque feugiat blandit. Ut vitae ipsum eget quam lacinia accumsan.
+#  Etiam sed turpis ac ipsum condimentum fringilla. Maecenas magna.
+#  Proin dapibus sapien vel ante. Aliquam erat volutpat. Pellentesque sagittis ligula eget metus.
+#  Vestibulum commodo. Ut rhoncus gravida arcu.
+
+from django.db import connection
+from django.http import JsonResponse
+
+
+def health(request):
+    """
+    Health check for load balancers and uptime monitors.
+
+    Returns 200 when the database answers, 503 otherwise.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception as e:
+        print(f"Error in health check: {str(e)}")
+        return JsonResponse({'status': 'error'}, status=503)
+    return JsonResponse({'status': 'ok'})
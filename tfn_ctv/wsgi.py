@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tfn_ctv.settings')
 
-application = get_wsgi_application()
+# Like get_wsgi_application(), but API, media and health paths get the lean
+# middleware chains of MIDDLEWARE_ROUTES (see tfn_ctv/routing.py)
+django.setup(set_prefix=False)
+
+from .routing import RoutedWSGIHandler  # noqa: E402
+
+application = RoutedWSGIHandler()